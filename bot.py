@@ -10,6 +10,7 @@ from telegram.ext import (
 
 # Use centralized settings and i18n
 from config.settings import settings
+from src.services.database import db_service
 from src.utils.i18n import i18n
 from src.utils.logger import setup_logger
 
@@ -166,13 +167,18 @@ async def successful_payment(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await PaymentHandlers.show_subscription_management(update, context)
 
 
+async def close_database(application: Application) -> None:
+    """Flush the batched log and chat history writers before exit."""
+    await db_service.close()
+
+
 def main() -> None:
     """Application entrypoint."""
     if not settings.BOT_TOKEN:
         logger.error("BOT_TOKEN is not configured. Check your environment variables.")
         raise SystemExit(1)
 
-    application = Application.builder().token(settings.BOT_TOKEN).build()
+    application = Application.builder().token(settings.BOT_TOKEN).post_shutdown(close_database).build()
 
     # Commands
     application.add_handler(CommandHandler("start", UserHandlers.start_command))
@@ -1,62 +1,188 @@
 """
 Logging configuration for the Fal Gram Bot.
+
+Call sites only put records on an in-memory queue; a QueueListener thread
+does the formatting (JSON rendering, timestamps, tracebacks) and the console
+and rotating-file I/O, so a slow disk or stdout never stalls the event loop.
 """
 
+import atexit
+import copy
 import logging
+import os
+import queue
 import sys
-from typing import Dict, Any
+import time
+from contextvars import ContextVar, Token
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
 from config.settings import settings
 
+# Optional structlog import (JSON rendering)
+try:
+    import structlog
+    STRUCTLOG_AVAILABLE = True
+except ImportError:
+    STRUCTLOG_AVAILABLE = False
+
+ROOT_LOGGER_NAME = "fal_gram_bot"
+LOG_FILE = os.path.join("logs", "fal_gram_bot.log")
+
+# Per-update context (user id, callback prefix, start time), task-local under asyncio
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("fal_gram_bot_log_context", default={})
+
+_listener: Optional[QueueListener] = None
+
+
+def bind_log_context(**fields: Any) -> Token:
+    """Attach fields to every record logged from the current update/task.
+
+    Returns a token for reset_log_context(). Binding `started` (a
+    time.perf_counter() value) adds the elapsed `latency_ms` to each record.
+    """
+    return _log_context.set({**_log_context.get(), **fields})
+
+
+def reset_log_context(token: Token) -> None:
+    """Restore the context that was active before bind_log_context()."""
+    _log_context.reset(token)
+
+
+class _ContextFilter(logging.Filter):
+    """Copy the per-update context onto the record on the calling task."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        if context:
+            for key, value in context.items():
+                if key == 'started':
+                    record.latency_ms = round((time.perf_counter() - value) * 1000, 1)
+                else:
+                    setattr(record, key, value)
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock prepare() merges args and renders tracebacks on the caller;
+    the queue here is in-process, so the record can travel as-is. Full queues
+    drop the record instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _JsonFormatter(logging.Formatter):
+    """Minimal JSON formatter used when structlog is not installed."""
+
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        import json
+        payload: Dict[str, Any] = {
+            'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        payload.update({k: v for k, v in vars(record).items() if k not in self._RESERVED})
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def _build_formatter(json_output: bool) -> logging.Formatter:
+    if not json_output:
+        if settings.DEBUG:
+            return logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'
+            )
+        return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if STRUCTLOG_AVAILABLE:
+        return structlog.stdlib.ProcessorFormatter(
+            processor=structlog.processors.JSONRenderer(ensure_ascii=False),
+            foreign_pre_chain=[
+                structlog.stdlib.add_log_level,
+                structlog.stdlib.add_logger_name,
+                structlog.processors.TimeStamper(fmt="iso", utc=True),
+                structlog.stdlib.ExtraAdder(),
+                structlog.processors.format_exc_info,
+            ],
+        )
+    return _JsonFormatter()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
 def setup_logging() -> logging.Logger:
-    """Setup logging configuration."""
-    
-    # Create logger
-    logger = logging.getLogger("fal_gram_bot")
-    logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-    
-    # Clear existing handlers
-    logger.handlers.clear()
-    
+    """Setup logging configuration (safe to call more than once)."""
+    global _listener
+    shutdown_logging()
+
+    level = getattr(logging, settings.LOG_LEVEL.upper())
+    formatter = _build_formatter(settings.LOG_FORMAT == "json")
+
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-    
-    # Create formatter
-    if settings.DEBUG:
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'
-        )
-    else:
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-    
+    console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # Create file handler for production
+    handlers = [console_handler]
+
+    # Create size-rotated file handler for production
     if not settings.DEBUG:
-        try:
-            file_handler = logging.FileHandler('logs/fal_gram_bot.log')
-            file_handler.setLevel(logging.INFO)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-        except FileNotFoundError:
-            # Create logs directory if it doesn't exist
-            import os
-            os.makedirs('logs', exist_ok=True)
-            file_handler = logging.FileHandler('logs/fal_gram_bot.log')
-            file_handler.setLevel(logging.INFO)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-    
+        os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+        file_handler = RotatingFileHandler(
+            LOG_FILE,
+            maxBytes=settings.LOG_FILE_MAX_BYTES,
+            backupCount=settings.LOG_FILE_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+        file_handler.setLevel(logging.INFO)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    queue_handler = _DeferredQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(_ContextFilter())
+
+    logger = logging.getLogger(ROOT_LOGGER_NAME)
+    logger.setLevel(level)
+    logger.handlers.clear()
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
     return logger
 
+
 def get_logger(name: str = None) -> logging.Logger:
     """Get a logger instance."""
     if name:
-        return logging.getLogger(f"fal_gram_bot.{name}")
-    return logging.getLogger("fal_gram_bot")
+        return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+    return logging.getLogger(ROOT_LOGGER_NAME)
+
 
 # Initialize logging
-logger = setup_logging()
\ No newline at end of file
+logger = setup_logging()
+atexit.register(shutdown_logging)
@@ -35,6 +35,11 @@ class Settings:
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     DEBUG: bool = os.getenv("DEBUG", "true").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # "json" (structured) or "text"; defaults to text while debugging
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text" if DEBUG else "json")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_FILE_MAX_BYTES: int = int(os.getenv("LOG_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_FILE_BACKUP_COUNT: int = int(os.getenv("LOG_FILE_BACKUP_COUNT", "5"))
     
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
@@ -53,10 +58,109 @@ class Settings:
     # File Paths
     LOCALES_DIR: str = "locales"
     CONFIG_DIR: str = "config"
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "data/cache")
+    EPHEMERIS_DIR: str = os.getenv("EPHEMERIS_DIR", "data/ephemeris")
+    
+    # Precomputed moon phase/event tables (see scripts/build_moon_table.py)
+    MOON_TABLE_START_YEAR: int = int(os.getenv("MOON_TABLE_START_YEAR", "2000"))
+    MOON_TABLE_END_YEAR: int = int(os.getenv("MOON_TABLE_END_YEAR", "2060"))
+    
+    # Locale hot reload (mtime polling of LOCALES_DIR)
+    LOCALES_HOT_RELOAD: bool = os.getenv("LOCALES_HOT_RELOAD", "true").lower() == "true"
+    LOCALES_RELOAD_INTERVAL: float = float(os.getenv("LOCALES_RELOAD_INTERVAL", "5"))
     
     # Webhook Configuration (if using webhooks)
-    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+    # Render web services expose their public URL as RENDER_EXTERNAL_URL
+    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", os.getenv("RENDER_EXTERNAL_URL", ""))
     WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8443"))
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_MAX_CONCURRENT_UPDATES: int = int(os.getenv("WEBHOOK_MAX_CONCURRENT_UPDATES", "16"))
+    WEBHOOK_MAX_PENDING_UPDATES: int = int(os.getenv("WEBHOOK_MAX_PENDING_UPDATES", "256"))
+    WEBHOOK_DRAIN_TIMEOUT: float = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "25"))
+    WEBHOOK_RETRY_AFTER: int = int(os.getenv("WEBHOOK_RETRY_AFTER", "1"))
+    WEBHOOK_MAX_BODY_SIZE: int = int(os.getenv("WEBHOOK_MAX_BODY_SIZE", str(1024 * 1024)))
+    
+    # Web server (health/metrics; also hosts the webhook in production)
+    WEB_SERVER_ENABLED: bool = os.getenv("WEB_SERVER_ENABLED", "true").lower() == "true"
+    PORT: int = int(os.getenv("PORT", "8080"))
+    # Bearer token for /status and /ai-usage; falls back to WEBHOOK_SECRET
+    ADMIN_API_TOKEN: str = os.getenv("ADMIN_API_TOKEN", "")
+    
+    # Event loop watchdog (reports callbacks blocking the loop)
+    WATCHDOG_ENABLED: bool = os.getenv("WATCHDOG_ENABLED", "true").lower() == "true"
+    WATCHDOG_INTERVAL: float = float(os.getenv("WATCHDOG_INTERVAL", "0.1"))
+    WATCHDOG_BLOCK_THRESHOLD: float = float(os.getenv("WATCHDOG_BLOCK_THRESHOLD", "0.25"))
+    WATCHDOG_STACK_LIMIT: int = int(os.getenv("WATCHDOG_STACK_LIMIT", "25"))
+    
+    # Batched log sink (DatabaseService.add_log)
+    LOG_SINK_QUEUE_SIZE: int = int(os.getenv("LOG_SINK_QUEUE_SIZE", "10000"))
+    LOG_SINK_BATCH_SIZE: int = int(os.getenv("LOG_SINK_BATCH_SIZE", "200"))
+    LOG_SINK_FLUSH_INTERVAL: float = float(os.getenv("LOG_SINK_FLUSH_INTERVAL", "2"))
+    LOG_SINK_SPILL_PATH: str = os.getenv("LOG_SINK_SPILL_PATH", "data/log_spill.jsonl")
+    # drop_oldest keeps the most recent events when the queue is full; drop_newest keeps the backlog
+    LOG_SINK_DROP_POLICY: str = os.getenv("LOG_SINK_DROP_POLICY", "drop_oldest")
+    
+    # Revenue statistics cache (admin panel)
+    PAYMENT_STATS_CACHE_TTL: float = float(os.getenv("PAYMENT_STATS_CACHE_TTL", "60"))
+    
+    # Generated reading cache (memory LRU + SQLite under CACHE_DIR)
+    READING_CACHE_ENABLED: bool = os.getenv("READING_CACHE_ENABLED", "true").lower() == "true"
+    READING_CACHE_MEMORY_SIZE: int = int(os.getenv("READING_CACHE_MEMORY_SIZE", "2048"))
+    
+    # Daily card delivery (timer-wheel scheduler) and throttled outbound sends
+    DAILY_CARD_ENABLED: bool = os.getenv("DAILY_CARD_ENABLED", "true").lower() == "true"
+    DAILY_CARD_DEFAULT_TIME: str = os.getenv("DAILY_CARD_DEFAULT_TIME", "09:00")
+    DAILY_CARD_LOAD_PAGE_SIZE: int = int(os.getenv("DAILY_CARD_LOAD_PAGE_SIZE", "1000"))
+    DEFAULT_TIMEZONE: str = os.getenv("DEFAULT_TIMEZONE", "Europe/Istanbul")
+    SEND_RATE_PER_SECOND: float = float(os.getenv("SEND_RATE_PER_SECOND", "25"))
+    SEND_WORKERS: int = int(os.getenv("SEND_WORKERS", "4"))
+    SEND_QUEUE_SIZE: int = int(os.getenv("SEND_QUEUE_SIZE", "5000"))
+    
+    # Moon phase notifications (fan-out at new/full moon instants)
+    MOON_NOTIFICATIONS_ENABLED: bool = os.getenv("MOON_NOTIFICATIONS_ENABLED", "true").lower() == "true"
+    MOON_NOTIFY_PAGE_SIZE: int = int(os.getenv("MOON_NOTIFY_PAGE_SIZE", "1000"))
+    # Events this recent are (re)checked at startup so an interrupted fan-out resumes
+    MOON_NOTIFY_GRACE_HOURS: float = float(os.getenv("MOON_NOTIFY_GRACE_HOURS", "6"))
+    
+    # Astrology chatbot: per-session context trimmed to a token budget,
+    # older turns folded into a running summary
+    CHATBOT_HISTORY_TOKENS: int = int(os.getenv("CHATBOT_HISTORY_TOKENS", "1500"))
+    CHATBOT_SUMMARY_TOKENS: int = int(os.getenv("CHATBOT_SUMMARY_TOKENS", "300"))
+    CHATBOT_SESSION_TTL: float = float(os.getenv("CHATBOT_SESSION_TTL", "1800"))
+    CHATBOT_HISTORY_PAGE_SIZE: int = int(os.getenv("CHATBOT_HISTORY_PAGE_SIZE", "20"))
+    CHATBOT_HISTORY_SPILL_PATH: str = os.getenv("CHATBOT_HISTORY_SPILL_PATH", "data/chatbot_history_spill.jsonl")
+    
+    # Generation profile overrides (prompts table columns) are reloaded this often
+    GENERATION_PROFILE_TTL: float = float(os.getenv("GENERATION_PROFILE_TTL", "300"))
+    
+    # Model routing: per-model quotas (model=requests per minute, comma separated),
+    # the share of each held back for paid plans, and the failure circuit breaker
+    MODEL_QUOTAS: str = os.getenv(
+        "MODEL_QUOTAS", "gemini-2.5-flash-lite=15,gemini-2.0-flash=15,gemini-1.5-flash=15"
+    )
+    MODEL_RESERVED_SHARE: float = float(os.getenv("MODEL_RESERVED_SHARE", "0.3"))
+    MODEL_FAILURE_THRESHOLD: int = int(os.getenv("MODEL_FAILURE_THRESHOLD", "3"))
+    MODEL_COOLDOWN: float = float(os.getenv("MODEL_COOLDOWN", "60"))
+    USER_PLAN_CACHE_TTL: float = float(os.getenv("USER_PLAN_CACHE_TTL", "300"))
+    
+    # LLM concurrency governor: in-flight caps (global and provider=limit pairs)
+    # and how long a call may wait for a slot before failing fast
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    LLM_PROVIDER_CONCURRENCY: str = os.getenv("LLM_PROVIDER_CONCURRENCY", "gemini=24,deepseek=16")
+    LLM_QUEUE_TIMEOUT: float = float(os.getenv("LLM_QUEUE_TIMEOUT", "15"))
+    
+    # Speculative prefetch on menu entry: how long warmed data is kept, how many
+    # prefetch tasks may run at once and how many LLM calls per minute it may spend
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_TTL: float = float(os.getenv("PREFETCH_TTL", "120"))
+    PREFETCH_MAX_TASKS: int = int(os.getenv("PREFETCH_MAX_TASKS", "32"))
+    PREFETCH_LLM_PER_MINUTE: int = int(os.getenv("PREFETCH_LLM_PER_MINUTE", "6"))
+    
+    # Computed birth charts are cached per user and birth data
+    BIRTH_CHART_CACHE_TTL: float = float(os.getenv("BIRTH_CHART_CACHE_TTL", "86400"))
+    
+    # Admin reports are cached per time bucket of this many seconds
+    REPORT_CACHE_SECONDS: int = int(os.getenv("REPORT_CACHE_SECONDS", "300"))
     
     @classmethod
     def validate(cls) -> bool:
@@ -5,6 +5,10 @@ Main entry point for the Fal Gram Bot with modular structure.
 import os
 import asyncio
 import logging
+import re
+import signal
+import time
+from typing import Optional
 from datetime import datetime
 from dotenv import load_dotenv
 from telegram import Update
@@ -18,12 +22,17 @@ load_dotenv()
 
 # Import configuration
 from config.settings import settings
-from config.logging import setup_logging
+from config.logging import setup_logging, bind_log_context, reset_log_context
 
 # Import services
 from src.services.database import db_service
 from src.services.ai_service import ai_service
 from src.services.payment_service import payment_service
+from src.services.web_server import WebhookServer
+from src.services.throttled_sender import throttled_sender
+from src.services.daily_card_scheduler import daily_card_scheduler
+from src.services.moon_notifier import moon_notifier
+from src.services.prefetch_service import prefetch_service
 
 # Import handlers
 from src.handlers.user import UserHandlers
@@ -36,11 +45,38 @@ from src.handlers.referral import referral_handlers
 # Import utilities
 from src.utils.i18n import i18n
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics, start_loop_lag_probe
+from src.utils.watchdog import loop_watchdog
 
 # Setup logging
 setup_logging()
 logger = get_logger("main")
 
+# Handler latency, labelled by update kind and callback prefix
+HANDLER_LATENCY = metrics.histogram(
+    "falgram_handler_seconds", "Telegram handler latency", ["kind", "route"]
+)
+HANDLER_ERRORS = metrics.counter(
+    "falgram_handler_errors_total", "Telegram handler failures", ["kind", "route"]
+)
+
+_NUMERIC_SUFFIX = re.compile(r'(_\d+)+$')
+
+
+def _callback_route(data: Optional[str]) -> str:
+    """Collapse callback data to a low-cardinality label (drop ids, cap length)."""
+    if not data:
+        return "none"
+    return _NUMERIC_SUFFIX.sub('', data)[:32]
+
+# Health/metrics server used in polling mode (webhook mode owns its own instance)
+web_server: Optional[WebhookServer] = None
+
+
+def _use_webhook() -> bool:
+    """Whether the bot receives updates through the webhook server."""
+    return settings.ENVIRONMENT == 'production' and bool(settings.WEBHOOK_URL)
+
 # Initialize services
 async def initialize_services():
     """Initialize all services."""
@@ -49,29 +85,115 @@ async def initialize_services():
         await db_service.initialize()
         logger.info("Database service initialized")
         
-        # Test AI service connections
-        ai_connections = await ai_service.test_connection()
-        logger.info(f"AI service connections: {ai_connections}")
+        # Report which AI providers have credentials; calls fail over between them
+        ai_providers = {
+            'gemini': bool(ai_service.gemini_api_key),
+            'deepseek': bool(ai_service.deepseek_api_key),
+        }
+        logger.info(f"AI providers configured: {ai_providers}")
         
         # Load translations
         i18n.load_translations()
         logger.info("Translations loaded")
         
+        # Pick up locale fixes without a restart
+        if settings.LOCALES_HOT_RELOAD:
+            i18n.start_watcher()
+        
     except Exception as e:
         logger.error(f"Error initializing services: {e}")
         raise
 
 async def post_init(application: Application):
     """Post initialization tasks."""
+    global web_server
     logger.info("Bot initialized successfully")
     
     # Initialize services
     await initialize_services()
+    
+    # Continuous event loop lag measurement for /metrics; the watchdog
+    # additionally captures the stack of callbacks that block the loop
+    if settings.WATCHDOG_ENABLED:
+        loop_watchdog.start()
+    else:
+        start_loop_lag_probe()
+    
+    # Scheduled messages go through the throttled sender to respect flood limits
+    throttled_sender.start(application.bot)
+    if settings.DAILY_CARD_ENABLED and db_service.is_connected():
+        daily_card_scheduler.start()
+    if settings.MOON_NOTIFICATIONS_ENABLED and db_service.is_connected():
+        moon_notifier.start()
+    
+    # In polling mode still expose /health and /metrics on the bot's loop
+    if settings.WEB_SERVER_ENABLED and not _use_webhook():
+        web_server = WebhookServer()
+        await web_server.start()
+
+async def post_shutdown(application: Application):
+    """Shutdown tasks run after the application stopped."""
+    global web_server
+    if web_server is not None:
+        await web_server.stop()
+        web_server = None
+    await daily_card_scheduler.stop()
+    await moon_notifier.stop()
+    await throttled_sender.stop()
+    await prefetch_service.stop()
+    await i18n.stop_watcher()
+    await db_service.close()
+    await loop_watchdog.stop()
+
+async def run_webhook(application: Application) -> None:
+    """Serve the Telegram webhook from our own aiohttp server and drain on SIGTERM."""
+    webhook_path = f"/{settings.BOT_TOKEN}"
+    server = WebhookServer(
+        application,
+        port=settings.PORT,
+        webhook_path=webhook_path,
+        secret_token=settings.WEBHOOK_SECRET or None,
+    )
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Signal handlers are unavailable on some platforms (e.g. Windows)
+            pass
+    
+    await application.initialize()
+    # PTB only runs post_init from run_polling/run_webhook, so call it explicitly
+    await post_init(application)
+    await application.bot.set_webhook(
+        url=f"{settings.WEBHOOK_URL}{webhook_path}",
+        secret_token=settings.WEBHOOK_SECRET or None,
+        allowed_updates=Update.ALL_TYPES,
+        max_connections=settings.WEBHOOK_MAX_CONCURRENT_UPDATES,
+    )
+    await application.start()
+    await server.start()
+    
+    try:
+        await stop_event.wait()
+        logger.info("Shutdown signal received, draining pending updates")
+    finally:
+        await server.stop()
+        await application.stop()
+        await post_shutdown(application)
+        await application.shutdown()
 
 async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Main callback query handler that routes to specific handlers."""
     query = update.callback_query
     data = query.data
+    route = _callback_route(data)
+    started = time.perf_counter()
+    log_token = bind_log_context(user_id=query.from_user.id, route=route, started=started)
+    # Leaving a menu cancels the speculative prefetch started when it opened
+    prefetch_service.navigated(query.from_user.id, data)
     
     try:
         # Route to appropriate handler based on callback data
@@ -83,6 +205,9 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
             await astrology_handlers.show_astrology_menu(update, context)
         elif data.startswith("birth_chart"):
             await astrology_handlers.handle_birth_chart(update, context)
+        # Sign buttons ("daily_horoscope_aries") before the bare horoscope prefixes
+        elif data.startswith(("zodiac_", "daily_horoscope_", "weekly_horoscope_", "monthly_horoscope_")):
+            await astrology_handlers.handle_zodiac_selection(update, context)
         elif data.startswith("daily_horoscope"):
             await astrology_handlers.handle_daily_horoscope(update, context)
         elif data.startswith("weekly_horoscope"):
@@ -91,46 +216,54 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
             await astrology_handlers.handle_monthly_horoscope(update, context)
         elif data.startswith("compatibility"):
             await astrology_handlers.handle_compatibility(update, context)
+        elif data.startswith("astro_chatbot"):
+            await astrology_handlers.handle_astro_chatbot(update, context)
         elif data.startswith("moon_calendar"):
             await astrology_handlers.handle_moon_calendar(update, context)
-        elif data.startswith("zodiac_") or data.startswith("daily_horoscope_") or data.startswith("weekly_horoscope_") or data.startswith("monthly_horoscope_"):
-            await astrology_handlers.handle_zodiac_selection(update, context)
         elif data.startswith("compat_"):
             await astrology_handlers.handle_compatibility_selection(update, context)
         
-        # Fortune handlers
+        # Fortune handlers (menu buttons emit "<kind>_fortune")
         elif data.startswith("fortune"):
             await fortune_handlers.show_fortune_menu(update, context)
-        elif data.startswith("tarot_reading"):
+        elif data.startswith(("tarot_fortune", "tarot_reading")):
             await fortune_handlers.handle_tarot_reading(update, context)
-        elif data.startswith("coffee_reading"):
+        elif data.startswith(("coffee_fortune", "coffee_reading")):
             await fortune_handlers.handle_coffee_reading(update, context)
-        elif data.startswith("dream_interpretation"):
+        elif data.startswith(("dream_fortune", "dream_interpretation")):
             await fortune_handlers.handle_dream_interpretation(update, context)
         elif data.startswith("palm_reading"):
             await fortune_handlers.handle_palm_reading(update, context)
         
-        # Payment handlers
+        # Payment handlers (specific names before the bare "premium" prefix)
+        elif data.startswith("premium_plans"):
+            await payment_handlers.show_premium_plans(update, context)
+        elif data.startswith("premium_info"):
+            await payment_handlers.show_premium_info(update, context)
         elif data.startswith("premium"):
             await payment_handlers.show_premium_menu(update, context)
         elif data.startswith("plan_details_"):
             await payment_handlers.show_plan_details(update, context)
+        elif data.startswith("plan_"):
+            await payment_handlers.handle_plan_selection(update, context)
+        elif data.startswith("pay_"):
+            await payment_handlers.handle_payment(update, context)
         elif data.startswith("buy_plan_"):
             await payment_handlers.initiate_purchase(update, context)
         elif data.startswith("subscription_management"):
             await payment_handlers.show_subscription_management(update, context)
+        elif data.startswith("toggle_auto_renew"):
+            await payment_handlers.toggle_auto_renew(update, context)
         elif data.startswith("cancel_subscription"):
             await payment_handlers.cancel_subscription(update, context)
         elif data.startswith("confirm_cancellation"):
             await payment_handlers.confirm_cancellation(update, context)
         
         # Admin handlers
-        elif data.startswith("admin_"):
+        elif data.startswith("admin_") or data == "back_to_admin":
             await admin_handlers.handle_admin_callback(update, context)
         
-        # Referral handlers
-        elif data.startswith("referral"):
-            await referral_handlers.show_referral_menu(update, context)
+        # Referral handlers (specific names before the bare "referral" prefix)
         elif data.startswith("referral_info"):
             await referral_handlers.show_referral_info(update, context)
         elif data.startswith("referral_stats"):
@@ -139,8 +272,18 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
             await referral_handlers.show_referral_leaderboard(update, context)
         elif data.startswith("referral_rewards"):
             await referral_handlers.show_referral_rewards(update, context)
+        elif data.startswith("referral_share"):
+            await referral_handlers.show_referral_share(update, context)
+        elif data.startswith("referral"):
+            await referral_handlers.show_referral_menu(update, context)
         elif data.startswith("share_referral"):
             await referral_handlers.share_referral_link(update, context)
+        elif data.startswith("share_telegram"):
+            await referral_handlers.handle_share_telegram(update, context)
+        elif data.startswith("share_whatsapp"):
+            await referral_handlers.handle_share_whatsapp(update, context)
+        elif data.startswith("share_twitter"):
+            await referral_handlers.handle_share_twitter(update, context)
         elif data.startswith("copy_referral_link"):
             await UserHandlers.handle_copy_referral_link(update, context)
         
@@ -160,25 +303,36 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
         
         else:
             # Default to user handler
-            await UserHandlers.handle_callback_query(update, context)
+            await UserHandlers.callback_query_handler(update, context)
     
     except Exception as e:
+        HANDLER_ERRORS.inc(kind="callback", route=route)
         logger.error(f"Error handling callback query {data}: {e}")
         await UserHandlers.error_handler(update, context)
+    finally:
+        HANDLER_LATENCY.observe(time.perf_counter() - started, kind="callback", route=route)
+        reset_log_context(log_token)
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle text messages."""
+    route = "text"
+    started = time.perf_counter()
+    log_token = bind_log_context(user_id=getattr(update.effective_user, 'id', None), route=route, started=started)
     try:
         # Check if user is waiting for input
         user_data = context.user_data
         waiting_for = user_data.get('waiting_for')
         
         if waiting_for:
+            route = str(waiting_for)[:32]
+            bind_log_context(route=route)
             # Route to appropriate handler based on what we're waiting for
             if waiting_for in ['coffee_photo', 'palm_photo']:
                 await fortune_handlers.handle_photo_input(update, context)
             elif waiting_for == 'dream_text':
                 await fortune_handlers.handle_text_input(update, context)
+            elif waiting_for == 'astro_chatbot':
+                await astrology_handlers.handle_chatbot_message(update, context)
             else:
                 # Default message handling
                 await UserHandlers.handle_message(update, context)
@@ -187,17 +341,27 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await UserHandlers.handle_message(update, context)
     
     except Exception as e:
+        HANDLER_ERRORS.inc(kind="message", route=route)
         logger.error(f"Error handling message: {e}")
         await UserHandlers.error_handler(update, context)
+    finally:
+        HANDLER_LATENCY.observe(time.perf_counter() - started, kind="message", route=route)
+        reset_log_context(log_token)
 
 async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle photo messages."""
+    started = time.perf_counter()
+    log_token = bind_log_context(user_id=getattr(update.effective_user, 'id', None), route="photo", started=started)
     try:
         # Route to fortune handlers for photo processing
         await fortune_handlers.handle_photo_input(update, context)
     except Exception as e:
+        HANDLER_ERRORS.inc(kind="photo", route="photo")
         logger.error(f"Error handling photo: {e}")
         await UserHandlers.error_handler(update, context)
+    finally:
+        HANDLER_LATENCY.observe(time.perf_counter() - started, kind="photo", route="photo")
+        reset_log_context(log_token)
 
 async def handle_pre_checkout(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle pre-checkout queries."""
@@ -208,10 +372,12 @@ async def handle_pre_checkout(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def handle_successful_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle successful payments."""
-    try:
-        await payment_handlers.handle_successful_payment(update, context)
-    except Exception as e:
-        logger.error(f"Error handling successful payment: {e}")
+    with HANDLER_LATENCY.time(kind="payment", route="successful_payment"):
+        try:
+            await payment_handlers.handle_successful_payment(update, context)
+        except Exception as e:
+            HANDLER_ERRORS.inc(kind="payment", route="successful_payment")
+            logger.error(f"Error handling successful payment: {e}")
 
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Global error handler."""
@@ -224,7 +390,14 @@ def main():
     """Main function to start the bot."""
     try:
         # Create application
-        application = Application.builder().token(settings.BOT_TOKEN).post_init(post_init).build()
+        application = (
+            Application.builder()
+            .token(settings.BOT_TOKEN)
+            .post_init(post_init)
+            .post_shutdown(post_shutdown)
+            .concurrent_updates(settings.WEBHOOK_MAX_CONCURRENT_UPDATES)
+            .build()
+        )
         
         # Command handlers
         application.add_handler(CommandHandler("start", UserHandlers.start_command))
@@ -256,13 +429,8 @@ def main():
         
         if settings.ENVIRONMENT == 'production':
             # Production mode with webhook
-            if settings.WEBHOOK_URL:
-                application.run_webhook(
-                    listen="0.0.0.0",
-                    port=int(os.environ.get('PORT', 8080)),
-                    url_path=settings.BOT_TOKEN,
-                    webhook_url=f"{settings.WEBHOOK_URL}/{settings.BOT_TOKEN}"
-                )
+            if _use_webhook():
+                asyncio.run(run_webhook(application))
             else:
                 logger.error("WEBHOOK_URL not set for production!")
         else:
@@ -274,12 +442,5 @@ def main():
         raise
 
 if __name__ == '__main__':
-    # Start web service in separate thread if needed
-    try:
-        from app import start_web_service
-        start_web_service()
-    except ImportError:
-        logger.info("Web service not available")
-    
-    # Run the bot
+    # Health, metrics and the webhook are served by WebhookServer on the bot's loop
     main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Backfill the referral/revenue rollup tables for the Fal Gram Bot.
+
+Run once after applying sql/add_referral_rollups.sql (and whenever the
+rollups need to be rebuilt); triggers keep them up to date afterwards.
+
+Usage:
+    python scripts/backfill_rollups.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.services.database import db_service
+
+
+async def backfill() -> bool:
+    """Rebuild rollups and print a short summary."""
+    print("🚀 Backfilling referral and revenue rollups...")
+
+    if not db_service.is_connected():
+        print("❌ Database not configured (SUPABASE_URL / SUPABASE_KEY)")
+        return False
+
+    result = await db_service.backfill_referral_rollups()
+    if result is None:
+        print("❌ Backfill failed - is sql/add_referral_rollups.sql applied?")
+        return False
+
+    print(f"✅ referral_daily_counts: {result.get('referral_days', 0)} day(s)")
+    print(f"✅ payment_daily_revenue: {result.get('revenue_days', 0)} day(s)")
+
+    last7 = await db_service.get_referral_counts_by_day(days=7)
+    print(f"📊 Referrals in the last 7 days: {sum(b['count'] for b in last7)}")
+    return True
+
+
+if __name__ == "__main__":
+    success = asyncio.run(backfill())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the webhook server.
+
+Starts WebhookServer with a stub application whose handlers just sleep
+(simulating Supabase/LLM I/O), fires fake Telegram updates at it and reports
+how many requests per second it absorbs and how many were pushed back with 503.
+
+Usage:
+    python scripts/benchmark_webhook.py --requests 5000 --concurrency 200 --handler-ms 50
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import aiohttp
+
+from src.services.web_server import WebhookServer
+
+
+class _StubApplication:
+    """Minimal stand-in for telegram.ext.Application."""
+
+    bot = None
+
+    def __init__(self, handler_seconds: float):
+        self.handler_seconds = handler_seconds
+
+    async def process_update(self, update) -> None:
+        await asyncio.sleep(self.handler_seconds)
+
+
+def _fake_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": 1000 + update_id % 500, "is_bot": False, "first_name": "Bench"},
+            "chat_instance": "bench",
+            "data": "tarot_reading",
+        },
+    }
+
+
+async def _run(args: argparse.Namespace) -> None:
+    server = WebhookServer(
+        _StubApplication(args.handler_ms / 1000.0),
+        host="127.0.0.1",
+        port=args.port,
+        webhook_path="/bench",
+        max_concurrent_updates=args.workers,
+        max_pending_updates=args.queue,
+    )
+    await server.start()
+
+    url = f"http://127.0.0.1:{args.port}/bench"
+    statuses = {}
+    next_id = iter(range(args.requests))
+    latencies = []
+
+    async def client(session: aiohttp.ClientSession) -> None:
+        for update_id in next_id:
+            started = time.perf_counter()
+            async with session.post(url, json=_fake_update(update_id)) as resp:
+                await resp.read()
+                statuses[resp.status] = statuses.get(resp.status, 0) + 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(args.concurrency)))
+    accept_elapsed = time.perf_counter() - started
+
+    await server.stop(drain_timeout=60)
+    total_elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    processed = server.stats['processed']
+
+    print("📊 Webhook benchmark")
+    print(f"   requests={args.requests} concurrency={args.concurrency} workers={args.workers} "
+          f"queue={args.queue} handler={args.handler_ms}ms")
+    print(f"   HTTP statuses: {statuses}")
+    print(f"   accepted req/s: {statuses.get(200, 0) / accept_elapsed:.0f}")
+    print(f"   offered req/s:  {args.requests / accept_elapsed:.0f}")
+    print(f"   processed/s (incl. drain): {processed / total_elapsed:.0f}")
+    print(f"   ack latency p50={p50:.1f}ms p99={p99:.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the webhook server")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--queue", type=int, default=256)
+    parser.add_argument("--handler-ms", type=float, default=50.0)
+    parser.add_argument("--port", type=int, default=8099)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
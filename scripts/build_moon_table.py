@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Precompute the moon phase/event tables for the Fal Gram Bot.
+
+Writes the memory-mappable .npy tables used by src/utils/moon_ephemeris.py
+to EPHEMERIS_DIR. Without them the bot computes the tables in memory at
+first use, so this is an optimisation for startup, not a requirement.
+
+Usage:
+    python scripts/build_moon_table.py [--start-year 2000] [--end-year 2060]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import settings
+from src.utils.moon_ephemeris import MoonEphemeris, NUMPY_AVAILABLE
+
+
+def build(start_year: int, end_year: int) -> bool:
+    """Build, write and spot-check the tables."""
+    print(f"🚀 Building moon tables for {start_year}-{end_year}...")
+
+    if not NUMPY_AVAILABLE:
+        print("❌ NumPy is required to build the tables (pip install numpy)")
+        return False
+
+    started = time.monotonic()
+    ephemeris = MoonEphemeris(start_year=start_year, end_year=end_year)
+    for path in ephemeris.save():
+        print(f"✅ {path} ({os.path.getsize(path) / 1024:.1f} KiB)")
+    print(f"⏱️ {time.monotonic() - started:.2f}s")
+
+    now = datetime.now(timezone.utc)
+    phase = ephemeris.phase(now)
+    print(f"🌙 Now: {phase.emoji} {phase.name}, {phase.illumination * 100:.0f}% illuminated")
+    for kind, when in ephemeris.events_between(now, now + timedelta(days=30)):
+        print(f"   {kind}: {when:%Y-%m-%d %H:%M} UTC")
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute moon phase/event tables")
+    parser.add_argument("--start-year", type=int, default=settings.MOON_TABLE_START_YEAR)
+    parser.add_argument("--end-year", type=int, default=settings.MOON_TABLE_END_YEAR)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(0 if build(args.start_year, args.end_year) else 1)
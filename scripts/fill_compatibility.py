@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Fill the zodiac compatibility caches for the Fal Gram Bot.
+
+Generates the 78 pair analyses per language (skipping pairs already cached
+for the current prompt version) and fills missing
+user_connections.compatibility_score values from the rule-based matrix.
+
+Usage:
+    python scripts/fill_compatibility.py [--languages en tr es] [--concurrency 4] [--limit N]
+                                         [--skip-readings] [--skip-scores] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import settings
+from src.services.compatibility_service import compatibility_service
+from src.services.database import db_service
+
+
+async def fill(args) -> bool:
+    """Run the requested fill steps and print a short summary."""
+    success = True
+    started = time.monotonic()
+
+    if not args.skip_readings:
+        print("🚀 Filling compatibility analyses...")
+        if compatibility_service.readings is None:
+            print("❌ Reading cache disabled (READING_CACHE_ENABLED=false)")
+            return False
+
+        missing = await compatibility_service.missing_pairs(args.languages)
+        print(f"📋 {len(missing)} pair analysis(es) missing for {', '.join(args.languages)}")
+        if missing and not args.dry_run:
+            # The per-user limiter is meant for chat traffic; this job is bounded by --concurrency
+            settings.RATE_LIMIT_ENABLED = False
+            counts = await compatibility_service.fill(args.languages, args.concurrency, args.limit)
+            print(f"✅ Generated: {counts['ok']}")
+            if counts['failed']:
+                print(f"⚠️ Failed: {counts['failed']} (re-run to retry)")
+                success = False
+        compatibility_service.readings.close()
+
+    if not args.skip_scores and not args.dry_run:
+        print("🚀 Scoring user connections...")
+        if not db_service.is_connected():
+            print("❌ Database not configured (SUPABASE_URL / SUPABASE_KEY)")
+            return False
+        updated = await compatibility_service.score_connections()
+        print(f"✅ Scored connections: {updated}")
+
+    print(f"⏱️ {time.monotonic() - started:.1f}s")
+    return success
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fill zodiac compatibility caches")
+    parser.add_argument("--languages", nargs="+", default=settings.SUPPORTED_LANGUAGES)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=0, help="Generate at most N analyses")
+    parser.add_argument("--skip-readings", action="store_true", help="Do not generate pair analyses")
+    parser.add_argument("--skip-scores", action="store_true", help="Do not score user_connections")
+    parser.add_argument("--dry-run", action="store_true", help="Only count missing analyses")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    success = asyncio.run(fill(parse_args()))
+    sys.exit(0 if success else 1)
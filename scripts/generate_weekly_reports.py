@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Generate weekly astrology reports for premium users of the Fal Gram Bot.
+
+Users sharing a sun sign and language get the same report, so each
+(sign, language) group is generated once with at most --concurrency LLM
+calls in flight. Results are bulk-upserted into weekly_reports; progress is
+checkpointed under CACHE_DIR, so an interrupted run resumes where it stopped.
+
+Usage:
+    python scripts/generate_weekly_reports.py [--week YYYY-MM-DD] [--concurrency 4]
+                                              [--page-size 500] [--restart]
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import settings
+from src.services.database import db_service
+from src.services.weekly_report_service import weekly_report_service, week_start
+
+
+async def generate(args) -> bool:
+    """Run the batch job and print a short summary."""
+    if not db_service.is_connected():
+        print("❌ Database not configured (SUPABASE_URL / SUPABASE_KEY)")
+        return False
+
+    week = week_start(date.fromisoformat(args.week) if args.week else None)
+    print(f"🚀 Generating weekly reports for the week of {week}...")
+
+    # The per-user limiter is meant for chat traffic; this job is bounded by --concurrency
+    settings.RATE_LIMIT_ENABLED = False
+    result = await weekly_report_service.run(week, args.concurrency, args.page_size, args.restart)
+    if weekly_report_service.readings is not None:
+        weekly_report_service.readings.close()
+
+    if result['resumed_from']:
+        print(f"↪️ Resumed after user {result['resumed_from']}")
+    print(f"✅ Written: {result['written']} from {result['groups']} sign/language group(s)")
+    if result['skipped']:
+        print(f"⏭️ Skipped (no birth date or expired plan): {result['skipped']}")
+    if not result['complete']:
+        print(f"⚠️ Failed: {result['failed']} (re-run to resume)")
+        return False
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate weekly reports for premium users")
+    parser.add_argument("--week", help="Any date in the target week (default: this week)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    success = asyncio.run(generate(parse_args()))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Warm the tarot interpretation cache for the Fal Gram Bot.
+
+Pre-generates interpretations for single-card spreads (78 cards x 2
+orientations per language). Only the daily card draws single-card spreads;
+the scheduler attaches an interpretation when one is cached and never calls
+the LLM at send time. The fortune menu's tarot reading draws three-card
+spreads (about 3.6 million ordered draws with orientations), which are not
+warmed here. Already cached spreads are skipped, so the job can be re-run
+after a prompt change or interrupted and resumed.
+
+Usage:
+    python scripts/warm_tarot_cache.py [--languages en tr es] [--concurrency 4] [--limit N] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import settings
+from src.services.ai_service import NOT_GENERATED
+from src.services.tarot_service import tarot_service, Spread, DECK_SIZE
+
+
+def single_card_spreads():
+    """Every single-card spread, upright and reversed (what the daily card draws)."""
+    return [Spread('single', (code,)) for code in range(DECK_SIZE * 2)]
+
+
+async def warm(languages, concurrency: int, limit: int, dry_run: bool) -> bool:
+    """Generate and store missing interpretations; print a short summary."""
+    print("🚀 Warming tarot interpretation cache...")
+
+    if tarot_service.readings is None:
+        print("❌ Reading cache disabled (READING_CACHE_ENABLED=false)")
+        return False
+
+    # The per-user limiter is meant for chat traffic; this job is bounded by --concurrency
+    settings.RATE_LIMIT_ENABLED = False
+
+    cached = set(await tarot_service.readings.keys())
+    pending = []
+    for language in languages:
+        template = await tarot_service.prompt_template(language)
+        for spread in single_card_spreads():
+            if tarot_service.cache_key(spread, language, template) not in cached:
+                pending.append((spread, language))
+    if limit:
+        pending = pending[:limit]
+
+    print(f"📋 {len(pending)} interpretation(s) to generate for {', '.join(languages)}")
+    if dry_run or not pending:
+        return True
+
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {'ok': 0, 'failed': 0}
+
+    async def one(spread: Spread, language: str) -> None:
+        async with semaphore:
+            result = await tarot_service.interpret(spread, language)
+        counts['ok' if result and result not in NOT_GENERATED else 'failed'] += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(one(spread, language) for spread, language in pending))
+    tarot_service.readings.close()
+
+    print(f"✅ Generated: {counts['ok']}")
+    if counts['failed']:
+        print(f"⚠️ Failed: {counts['failed']} (re-run to retry)")
+    print(f"⏱️ {time.monotonic() - started:.1f}s")
+    return counts['failed'] == 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Warm the daily card (single-card) tarot interpretation cache")
+    parser.add_argument("--languages", nargs="+", default=settings.SUPPORTED_LANGUAGES)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=0, help="Generate at most N interpretations")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what is missing")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    success = asyncio.run(warm(args.languages, max(1, args.concurrency), args.limit, args.dry_run))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,6 @@
+-- Chatbot history is read newest-first per user with keyset pagination
+-- (WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT n).
+-- Safe to run more than once.
+
+CREATE INDEX IF NOT EXISTS idx_chatbot_history_user_id_id
+    ON chatbot_history(user_id, id DESC);
@@ -0,0 +1,12 @@
+-- Daily card delivery schedule columns.
+-- The scheduler loads subscribers once at startup (keyset-paginated by id);
+-- the partial index keeps that load to subscribed rows only.
+-- Safe to run more than once.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS daily_card_subscribed BOOLEAN DEFAULT FALSE;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS daily_card_time TEXT DEFAULT '09:00';
+ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone TEXT DEFAULT 'Europe/Istanbul';
+
+CREATE INDEX IF NOT EXISTS idx_users_daily_card_subscribed
+    ON users(id)
+    WHERE daily_card_subscribed;
@@ -0,0 +1,7 @@
+-- Day the daily reading counter belongs to.
+-- increment_usage() starts daily_readings_used over when this is not today,
+-- and the free-limit check ignores counts from earlier days, so no nightly
+-- reset job is needed.
+-- Safe to run more than once.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS daily_usage_date DATE;
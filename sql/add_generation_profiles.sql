@@ -0,0 +1,12 @@
+-- Per-reading-type generation settings on the prompts registry.
+-- NULL means "use the default profile" (src/services/generation_profiles.py).
+-- model is a comma-separated list of Gemini models to try first.
+-- Each row applies to its own prompt_type and language.
+-- Safe to run more than once.
+
+ALTER TABLE prompts ADD COLUMN IF NOT EXISTS max_output_tokens INTEGER;
+ALTER TABLE prompts ADD COLUMN IF NOT EXISTS temperature REAL;
+ALTER TABLE prompts ADD COLUMN IF NOT EXISTS model TEXT;
+
+-- Example: shorter, cooler daily horoscopes in every language
+-- UPDATE prompts SET max_output_tokens = 300, temperature = 0.6 WHERE prompt_type = 'daily_horoscope';
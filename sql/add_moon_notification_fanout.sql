@@ -0,0 +1,16 @@
+-- Moon notification fan-out support.
+-- Recipients are streamed keyset-paginated by id; the partial index keeps
+-- that scan to opted-in rows. moon_phase holds the event id
+-- ('full_moon:2026-10-26T04:11Z'), and the unique index lets a restarted
+-- fan-out re-insert rows without duplicating them.
+-- Safe to run more than once.
+
+CREATE INDEX IF NOT EXISTS idx_users_moon_notifications
+    ON users(id)
+    WHERE moon_notifications;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_moon_notifications_user_event
+    ON moon_notifications(user_id, moon_phase);
+
+CREATE INDEX IF NOT EXISTS idx_moon_notifications_event_user
+    ON moon_notifications(moon_phase, user_id DESC);
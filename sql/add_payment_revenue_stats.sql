@@ -0,0 +1,20 @@
+-- Revenue statistics in a single cheap call.
+-- Reads the payment_daily_revenue rollup (sql/add_referral_rollups.sql must
+-- be applied first), so the cost depends on the number of days with sales,
+-- not on the number of payments. Safe to run more than once.
+
+CREATE OR REPLACE FUNCTION payment_revenue_stats()
+RETURNS TABLE(total_revenue BIGINT, revenue_today BIGINT, revenue_month BIGINT, total_payments BIGINT) AS $$
+    SELECT
+        COALESCE(SUM(p.revenue), 0)::BIGINT,
+        COALESCE(SUM(p.revenue) FILTER (WHERE p.day = (NOW() AT TIME ZONE 'UTC')::date), 0)::BIGINT,
+        COALESCE(SUM(p.revenue) FILTER (
+            WHERE p.day >= date_trunc('month', NOW() AT TIME ZONE 'UTC')::date
+        ), 0)::BIGINT,
+        COALESCE(SUM(p.payments), 0)::BIGINT
+    FROM payment_daily_revenue p;
+$$ LANGUAGE sql STABLE;
+
+-- Supports the client-side fallback and ad-hoc date range queries
+CREATE INDEX IF NOT EXISTS idx_payment_transactions_status_created_at
+    ON payment_transactions(status, created_at);
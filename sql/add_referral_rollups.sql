@@ -0,0 +1,126 @@
+-- Referral and revenue rollups maintained incrementally by triggers.
+-- The admin dashboard reads O(days) rollup rows instead of scanning
+-- referrals / payment_transactions. Safe to run more than once.
+-- After applying, run: python scripts/backfill_rollups.py
+
+-- 1) Daily referral counts (UTC days)
+CREATE TABLE IF NOT EXISTS referral_daily_counts (
+    day DATE PRIMARY KEY,
+    referrals INTEGER NOT NULL DEFAULT 0
+);
+
+-- 2) Daily completed revenue in Telegram Stars (UTC days)
+CREATE TABLE IF NOT EXISTS payment_daily_revenue (
+    day DATE PRIMARY KEY,
+    revenue BIGINT NOT NULL DEFAULT 0,
+    payments INTEGER NOT NULL DEFAULT 0
+);
+
+-- 3) Keep referral_daily_counts in sync with referrals
+CREATE OR REPLACE FUNCTION referrals_rollup_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO referral_daily_counts (day, referrals)
+        VALUES ((COALESCE(NEW.created_at, NOW()) AT TIME ZONE 'UTC')::date, 1)
+        ON CONFLICT (day) DO UPDATE SET referrals = referral_daily_counts.referrals + 1;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE referral_daily_counts
+        SET referrals = GREATEST(referrals - 1, 0)
+        WHERE day = (COALESCE(OLD.created_at, NOW()) AT TIME ZONE 'UTC')::date;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_referrals_rollup ON referrals;
+CREATE TRIGGER trg_referrals_rollup
+    AFTER INSERT OR DELETE OR UPDATE OF created_at ON referrals
+    FOR EACH ROW EXECUTE FUNCTION referrals_rollup_trigger();
+
+-- 4) Keep payment_daily_revenue in sync with completed payment_transactions
+--    (payments usually move pending -> completed via UPDATE)
+CREATE OR REPLACE FUNCTION payment_revenue_rollup_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'completed' THEN
+        UPDATE payment_daily_revenue
+        SET revenue = revenue - OLD.amount,
+            payments = GREATEST(payments - 1, 0)
+        WHERE day = (COALESCE(OLD.created_at, NOW()) AT TIME ZONE 'UTC')::date;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'completed' THEN
+        INSERT INTO payment_daily_revenue (day, revenue, payments)
+        VALUES ((COALESCE(NEW.created_at, NOW()) AT TIME ZONE 'UTC')::date, NEW.amount, 1)
+        ON CONFLICT (day) DO UPDATE SET
+            revenue = payment_daily_revenue.revenue + EXCLUDED.revenue,
+            payments = payment_daily_revenue.payments + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_payment_revenue_rollup ON payment_transactions;
+CREATE TRIGGER trg_payment_revenue_rollup
+    AFTER INSERT OR DELETE OR UPDATE OF status, amount, created_at ON payment_transactions
+    FOR EACH ROW EXECUTE FUNCTION payment_revenue_rollup_trigger();
+
+-- 5) Read RPCs used by DatabaseService
+CREATE OR REPLACE FUNCTION referral_counts_by_day(p_days INTEGER DEFAULT 7)
+RETURNS TABLE(day DATE, referrals INTEGER) AS $$
+    SELECT r.day, r.referrals
+    FROM referral_daily_counts r
+    WHERE r.day >= (NOW() AT TIME ZONE 'UTC')::date - p_days
+      AND r.referrals > 0
+    ORDER BY r.day;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION referral_counts_by_month(p_months INTEGER DEFAULT 6)
+RETURNS TABLE(month TEXT, referrals BIGINT) AS $$
+    SELECT to_char(date_trunc('month', r.day), 'YYYY-MM') AS month, SUM(r.referrals) AS referrals
+    FROM referral_daily_counts r
+    WHERE r.day >= (date_trunc('month', NOW() AT TIME ZONE 'UTC') - make_interval(months => p_months))::date
+    GROUP BY 1
+    HAVING SUM(r.referrals) > 0
+    ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+-- p_days NULL means all time
+CREATE OR REPLACE FUNCTION revenue_per_referral(p_days INTEGER DEFAULT NULL)
+RETURNS TABLE(total_revenue BIGINT, total_referrals BIGINT) AS $$
+    SELECT
+        (SELECT COALESCE(SUM(p.revenue), 0)::BIGINT FROM payment_daily_revenue p
+         WHERE p_days IS NULL OR p.day >= (NOW() AT TIME ZONE 'UTC')::date - p_days),
+        (SELECT COALESCE(SUM(r.referrals), 0)::BIGINT FROM referral_daily_counts r
+         WHERE p_days IS NULL OR r.day >= (NOW() AT TIME ZONE 'UTC')::date - p_days);
+$$ LANGUAGE sql STABLE;
+
+-- 6) Backfill / rebuild both rollups from the raw tables
+CREATE OR REPLACE FUNCTION backfill_referral_rollups()
+RETURNS TABLE(referral_days INTEGER, revenue_days INTEGER) AS $$
+DECLARE
+    v_referral_days INTEGER;
+    v_revenue_days INTEGER;
+BEGIN
+    LOCK TABLE referral_daily_counts, payment_daily_revenue IN EXCLUSIVE MODE;
+
+    DELETE FROM referral_daily_counts;
+    INSERT INTO referral_daily_counts (day, referrals)
+    SELECT (created_at AT TIME ZONE 'UTC')::date, COUNT(*)
+    FROM referrals
+    WHERE created_at IS NOT NULL
+    GROUP BY 1;
+    GET DIAGNOSTICS v_referral_days = ROW_COUNT;
+
+    DELETE FROM payment_daily_revenue;
+    INSERT INTO payment_daily_revenue (day, revenue, payments)
+    SELECT (created_at AT TIME ZONE 'UTC')::date, SUM(amount), COUNT(*)
+    FROM payment_transactions
+    WHERE status = 'completed' AND created_at IS NOT NULL
+    GROUP BY 1;
+    GET DIAGNOSTICS v_revenue_days = ROW_COUNT;
+
+    RETURN QUERY SELECT v_referral_days, v_revenue_days;
+END;
+$$ LANGUAGE plpgsql;
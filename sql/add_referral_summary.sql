@@ -0,0 +1,19 @@
+-- Per-user referral summary computed in SQL.
+-- The composite index lets referral_summary() answer from an index range
+-- scan on (referrer_id, created_at) instead of shipping every row to the bot.
+-- Safe to run more than once.
+
+CREATE INDEX IF NOT EXISTS idx_referrals_referrer_created_at
+    ON referrals(referrer_id, created_at);
+
+-- Weeks start on Monday 00:00 UTC, months on the 1st 00:00 UTC
+CREATE OR REPLACE FUNCTION referral_summary(p_referrer_id BIGINT)
+RETURNS TABLE(total_count BIGINT, this_week BIGINT, this_month BIGINT, last_invite_at TIMESTAMP WITH TIME ZONE) AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE r.created_at >= date_trunc('week', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'),
+        COUNT(*) FILTER (WHERE r.created_at >= date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'),
+        MAX(r.created_at)
+    FROM referrals r
+    WHERE r.referrer_id = p_referrer_id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,14 @@
+-- Idempotent usage charges.
+-- Each reading is charged under an operation id; inserting the same id again
+-- is ignored, so a retried or duplicated operation counts once.
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS usage_charges (
+    operation_id TEXT PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    usage_type TEXT NOT NULL DEFAULT 'reading',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_usage_charges_user_created
+    ON usage_charges(user_id, created_at DESC);
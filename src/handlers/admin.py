@@ -8,6 +8,7 @@ from typing import Optional, Dict, Any, List
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from src.services.database import db_service
+from src.services.report_service import report_service
 from src.keyboards.admin import AdminKeyboards
 from src.utils.i18n import i18n
 from src.utils.logger import get_logger
@@ -332,28 +333,35 @@ class AdminHandlers:
     
     @staticmethod
     async def _download_admin_pdf(query, language: str) -> None:
-        """Download admin PDF report."""
+        """Download admin PDF report (generated in the background)."""
+        keyboard = AdminKeyboards.get_back_to_admin_keyboard(language)
+        text = i18n.get_text("admin.pdf_generating", language)
+        await query.edit_message_text(text, reply_markup=keyboard)
+        
+        report_service.spawn(AdminHandlers._deliver_admin_pdf(query, language))
+    
+    @staticmethod
+    async def _deliver_admin_pdf(query, language: str) -> None:
+        """Send the cached or freshly generated admin PDF once it is ready."""
+        keyboard = AdminKeyboards.get_back_to_admin_keyboard(language)
         try:
-            # Generate PDF report
-            pdf_data = await AdminHandlers._generate_admin_pdf()
+            pdf_data, generated_at = await report_service.get_admin_pdf(AdminHandlers._get_admin_stats)
             
             # Send PDF file
             await query.bot.send_document(
                 chat_id=query.from_user.id,
                 document=pdf_data,
-                filename=f"admin_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                filename=f"admin_report_{generated_at.strftime('%Y%m%d_%H%M%S')}.pdf",
                 caption=i18n.get_text("admin.pdf_report", language)
             )
             
             # Update message
             text = i18n.get_text("admin.pdf_sent", language)
-            keyboard = AdminKeyboards.get_back_to_admin_keyboard(language)
             await query.edit_message_text(text, reply_markup=keyboard)
             
         except Exception as e:
             logger.error(f"Error generating admin PDF: {e}")
             text = i18n.get_text("admin.error_generating_pdf", language)
-            keyboard = AdminKeyboards.get_back_to_admin_keyboard(language)
             await query.edit_message_text(text, reply_markup=keyboard)
     
     @staticmethod
@@ -535,38 +543,6 @@ class AdminHandlers:
                 'vip_count': 0,
                 'total_revenue': 0
             }
-    
-    @staticmethod
-    async def _generate_admin_pdf() -> bytes:
-        """Generate admin PDF report."""
-        try:
-            from fpdf import FPDF
-            
-            # Create PDF
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            
-            # Add title
-            pdf.cell(200, 10, txt="Fal Gram Bot - Admin Report", ln=True, align='C')
-            pdf.cell(200, 10, txt=f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ln=True, align='C')
-            pdf.ln(10)
-            
-            # Get statistics
-            stats = await AdminHandlers._get_admin_stats()
-            
-            # Add statistics
-            pdf.cell(200, 10, txt=f"Total Users: {stats['total_users']}", ln=True)
-            pdf.cell(200, 10, txt=f"Active Users: {stats['active_users']}", ln=True)
-            pdf.cell(200, 10, txt=f"Premium Users: {stats['premium_users']}", ln=True)
-            pdf.cell(200, 10, txt=f"New Users Today: {stats['new_users_today']}", ln=True)
-            pdf.cell(200, 10, txt=f"Total Revenue: {format_currency(stats['total_revenue'], 'TRY')}", ln=True)
-            
-            return pdf.output(dest='S').encode('latin-1')
-            
-        except Exception as e:
-            logger.error(f"Error generating admin PDF: {e}")
-            return b"Error generating PDF"
 
 # Global handlers instance
 admin_handlers = AdminHandlers()
\ No newline at end of file
@@ -6,12 +6,20 @@ import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ChatAction
 from telegram.ext import ContextTypes
 from src.services.database import db_service
-from src.services.ai_service import ai_service
+from src.services.ai_service import ai_service, not_generated_key
+from src.services.birth_chart_service import birth_chart_service
+from src.services.chatbot_service import chatbot_service
+from src.services.compatibility_service import compatibility_service, ZODIAC_SIGNS
+from src.services.horoscope_service import horoscope_service, PERIODS
+from src.services.prefetch_service import prefetch_service
 from src.keyboards.astrology import AstrologyKeyboards
 from src.utils.i18n import i18n
+from src.utils.inflight import collapse_duplicates
 from src.utils.logger import get_logger
+from src.utils.pipeline import concurrently, quietly
 from src.utils.helpers import calculate_age, is_valid_birth_date
 from src.utils.validators import validator
 from src.models.user import User
@@ -25,8 +33,6 @@ class AstrologyHandlers:
     async def show_astrology_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Show astrology menu."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
@@ -34,7 +40,7 @@ class AstrologyHandlers:
         text = i18n.get_text("astrology.menu_title", language)
         # Append plan status indicators if applicable
         try:
-            user_data = await db_service.get_user(user.id)
+            _, user_data = await concurrently(quietly(query.answer()), quietly(db_service.get_user(user.id)))
             if user_data and user_data.get('is_premium'):
                 plan = (user_data.get('premium_plan') or '').lower()
                 if plan == 'vip':
@@ -42,21 +48,23 @@ class AstrologyHandlers:
                 else:
                     text += f"\n\n{i18n.get_text('astrology_menu.premium_active', language)}"
         except Exception:
-            pass
+            user_data = None
         
         await query.edit_message_text(text, reply_markup=keyboard)
+        # Warm the user's likely next tap (their sign's daily horoscope) while they read the menu
+        if user:
+            prefetch_service.on_menu(user.id, 'astrology', language, user_data)
     
     @staticmethod
+    @collapse_duplicates('birth_chart')
     async def handle_birth_chart(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle birth chart request."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
         # Check if user has birth date
-        user_data = await db_service.get_user(user.id)
+        _, user_data = await concurrently(quietly(query.answer()), prefetch_service.user(user.id))
         if not user_data or not user_data.get('birth_date'):
             text = i18n.get_text("astrology.birth_date_required", language)
             keyboard = AstrologyKeyboards.get_back_button(language, "astrology_menu")
@@ -64,7 +72,8 @@ class AstrologyHandlers:
             return
         
         # Birth chart available starting from Basic plan
-        premium_check = await AstrologyHandlers._check_premium_access(user.id, language, required_plan='basic')
+        premium_check = await AstrologyHandlers._check_premium_access(user.id, language, required_plan='basic',
+                                                                      user_data=user_data)
         if not premium_check['has_access']:
             await query.edit_message_text(premium_check['message'], reply_markup=premium_check['keyboard'])
             return
@@ -81,7 +90,7 @@ class AstrologyHandlers:
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
-        keyboard = AstrologyKeyboards.get_zodiac_selection(language, "daily_horoscope")
+        keyboard = AstrologyKeyboards.get_zodiac_selection(callback_prefix="daily_horoscope", language=language)
         text = i18n.get_text("astrology.select_zodiac_daily", language)
         
         await query.edit_message_text(text, reply_markup=keyboard)
@@ -90,18 +99,19 @@ class AstrologyHandlers:
     async def handle_weekly_horoscope(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle weekly horoscope request."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
         # Monthly horoscope requires Premium plan
-        premium_check = await AstrologyHandlers._check_premium_access(user.id, language, required_plan='premium')
+        _, premium_check = await concurrently(
+            quietly(query.answer()),
+            AstrologyHandlers._check_premium_access(user.id, language, required_plan='premium')
+        )
         if not premium_check['has_access']:
             await query.edit_message_text(premium_check['message'], reply_markup=premium_check['keyboard'])
             return
         
-        keyboard = AstrologyKeyboards.get_zodiac_selection(language, "weekly_horoscope")
+        keyboard = AstrologyKeyboards.get_zodiac_selection(callback_prefix="weekly_horoscope", language=language)
         text = i18n.get_text("weekly_horoscope.title", language)
         
         await query.edit_message_text(text, reply_markup=keyboard)
@@ -110,82 +120,153 @@ class AstrologyHandlers:
     async def handle_monthly_horoscope(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle monthly horoscope request."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
         # Compatibility requires Premium plan
-        premium_check = await AstrologyHandlers._check_premium_access(user.id, language, required_plan='premium')
+        _, premium_check = await concurrently(
+            quietly(query.answer()),
+            AstrologyHandlers._check_premium_access(user.id, language, required_plan='premium')
+        )
         if not premium_check['has_access']:
             await query.edit_message_text(premium_check['message'], reply_markup=premium_check['keyboard'])
             return
         
-        keyboard = AstrologyKeyboards.get_zodiac_selection(language, "monthly_horoscope")
+        keyboard = AstrologyKeyboards.get_zodiac_selection(callback_prefix="monthly_horoscope", language=language)
         text = i18n.get_text("monthly_horoscope.title", language)
         
         await query.edit_message_text(text, reply_markup=keyboard)
     
     @staticmethod
     async def handle_compatibility(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Handle compatibility request."""
+        """Handle compatibility request: type menu, then first sign selection."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
-        # Moon calendar requires Premium plan
-        premium_check = await AstrologyHandlers._check_premium_access(user.id, language, required_plan='premium')
+        # Compatibility requires Premium plan
+        _, premium_check = await concurrently(
+            quietly(query.answer()),
+            AstrologyHandlers._check_premium_access(user.id, language, required_plan='premium')
+        )
         if not premium_check['has_access']:
             await query.edit_message_text(premium_check['message'], reply_markup=premium_check['keyboard'])
             return
         
-        keyboard = AstrologyKeyboards.get_compatibility_menu(language)
-        text = i18n.get_text("astrology.compatibility_menu", language)
+        if (query.data or "").startswith("compatibility_"):
+            # Type chosen ("compatibility_love"): start a new pair with the first sign
+            keyboard = AstrologyKeyboards.get_zodiac_selection(callback_prefix="compat_first", language=language)
+            text = i18n.get_text("compatibility_menu", language)
+        else:
+            keyboard = AstrologyKeyboards.get_compatibility_menu(language)
+            text = i18n.get_text("astrology.compatibility_menu", language)
         
         await query.edit_message_text(text, reply_markup=keyboard)
     
     @staticmethod
+    @collapse_duplicates('moon_calendar')
     async def handle_moon_calendar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle moon calendar request."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
         # Moon calendar requires Premium plan
-        premium_check = await AstrologyHandlers._check_premium_access(user.id, language, required_plan='premium')
+        _, premium_check = await concurrently(
+            quietly(query.answer()),
+            AstrologyHandlers._check_premium_access(user.id, language, required_plan='premium')
+        )
         if not premium_check['has_access']:
             await query.edit_message_text(premium_check['message'], reply_markup=premium_check['keyboard'])
             return
         
         await AstrologyHandlers._generate_moon_calendar(query, language)
-    
+
+    @staticmethod
+    async def handle_astro_chatbot(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Open or close the astrology chatbot."""
+        query = update.callback_query
+        await query.answer()
+
+        user = update.effective_user
+        language = user.language_code or "en" if user else "en"
+
+        if query.data == "astro_chatbot_close":
+            context.user_data.pop('waiting_for', None)
+            chatbot_service.end_session(user.id)
+            text = i18n.get_text("astro_chatbot.closed", language)
+            await query.edit_message_text(text, reply_markup=AstrologyKeyboards.get_back_button(language))
+            return
+
+        # Chatbot is a VIP feature
+        premium_check = await AstrologyHandlers._check_premium_access(user.id, language, required_plan='vip')
+        if not premium_check['has_access']:
+            text = (
+                f"{i18n.get_text('astro_chatbot.title', language)}\n\n"
+                f"{i18n.get_text('astro_chatbot.vip_only', language)}\n"
+                f"{i18n.get_text('astro_chatbot.upgrade_message', language)}"
+            )
+            await query.edit_message_text(text, reply_markup=premium_check['keyboard'])
+            return
+
+        context.user_data['waiting_for'] = 'astro_chatbot'
+        examples = i18n.get_raw("astro_chatbot.examples", language) or []
+        text = (
+            f"{i18n.get_text('astro_chatbot.active_title', language)}\n\n"
+            f"{i18n.get_text('astro_chatbot.greeting', language)}\n\n"
+            f"{i18n.get_text('astro_chatbot.examples_label', language)}\n"
+            + "\n".join(examples)
+            + f"\n\n{i18n.get_text('astro_chatbot.footer', language)}"
+        )
+        await query.edit_message_text(text, reply_markup=AstrologyKeyboards.get_chatbot_keyboard(language))
+
     @staticmethod
+    async def handle_chatbot_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Answer a chatbot question; the chat stays open until closed."""
+        user = update.effective_user
+        try:
+            user_data = await db_service.get_user(user.id) if user else None
+        except Exception:
+            user_data = None
+        language = (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
+
+        question = validator.sanitize_text(update.message.text, max_length=1000)
+        if not question:
+            return
+
+        status = await update.message.reply_text(i18n.get_text("chatbot_processing", language))
+        try:
+            answer = await chatbot_service.ask(user.id, language, question, (user.first_name or '').strip())
+            text = answer or i18n.get_text("error.generation_failed", language)
+        except Exception as e:
+            logger.error(f"Error answering chatbot message: {e}")
+            text = i18n.get_text("error.generation_failed", language)
+        await status.edit_text(text, reply_markup=AstrologyKeyboards.get_chatbot_keyboard(language))
+
+    @staticmethod
+    @collapse_duplicates(lambda update, context: update.callback_query.data)
     async def handle_zodiac_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle zodiac sign selection."""
         query = update.callback_query
-        await query.answer()
         
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
-        # Parse callback data: "daily_horoscope_0" -> ("daily_horoscope", 0)
-        data_parts = query.data.split("_")
-        horoscope_type = data_parts[0] + "_" + data_parts[1]  # "daily_horoscope"
-        zodiac_index = int(data_parts[2])
-        
-        zodiac_signs = [
-            "aries", "taurus", "gemini", "cancer", "leo", "virgo",
-            "libra", "scorpio", "sagittarius", "capricorn", "aquarius", "pisces"
-        ]
+        # Parse callback data: "daily_horoscope_aries" -> ("daily_horoscope", "aries")
+        horoscope_type, zodiac_sign = query.data.rsplit("_", 1)
+        if horoscope_type not in PERIODS or zodiac_sign not in ZODIAC_SIGNS:
+            await quietly(query.answer())
+            return
         
-        zodiac_sign = zodiac_signs[zodiac_index]
+        # The prompt does not depend on the callback answer or the typing indicator
+        _, prompt_template, _ = await concurrently(
+            quietly(query.answer()),
+            prefetch_service.prompt(horoscope_type, language),
+            quietly(context.bot.send_chat_action(update.effective_chat.id, ChatAction.TYPING)),
+        )
         
         # Generate horoscope
-        await AstrologyHandlers._generate_horoscope(query, horoscope_type, zodiac_sign, language)
+        await AstrologyHandlers._generate_horoscope(query, horoscope_type, zodiac_sign, language, prompt_template)
     
     @staticmethod
     async def handle_compatibility_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -196,30 +277,36 @@ class AstrologyHandlers:
         user = update.effective_user
         language = user.language_code or "en" if user else "en"
         
-        # Parse callback data: "compat_first_0" -> ("first", 0)
-        data_parts = query.data.split("_")
-        selection_type = data_parts[1]  # "first" or "second"
-        zodiac_index = int(data_parts[2])
-        
-        # Store selection in context
-        if 'compatibility_selection' not in context.user_data:
-            context.user_data['compatibility_selection'] = {}
-        
-        context.user_data['compatibility_selection'][selection_type] = zodiac_index
+        # Parse callback data: "compat_first_aries" -> ("first", "aries")
+        _, selection_type, zodiac_sign = query.data.split("_", 2)
+        if zodiac_sign not in ZODIAC_SIGNS:
+            return
         
-        # Check if both signs are selected
-        if len(context.user_data['compatibility_selection']) == 2:
-            await AstrologyHandlers._generate_compatibility(query, context.user_data['compatibility_selection'], language)
+        selection = context.user_data.get('compatibility_selection') or {}
+        if selection_type == 'first':
+            context.user_data['compatibility_selection'] = {'first': zodiac_sign}
+        elif 'first' in selection:
+            # Both signs selected
+            pair = context.user_data.pop('compatibility_selection')
+            pair['second'] = zodiac_sign
+            await AstrologyHandlers._generate_compatibility(query, pair, language)
+            return
         else:
-            # Show second sign selection
-            keyboard = AstrologyKeyboards.get_zodiac_selection(language, "compat_second")
-            text = i18n.get_text("astrology.select_second_sign", language)
-            await query.edit_message_text(text, reply_markup=keyboard)
+            # Second sign from a stale keyboard: start over with the first sign
+            keyboard = AstrologyKeyboards.get_zodiac_selection(callback_prefix="compat_first", language=language)
+            await query.edit_message_text(i18n.get_text("compatibility_menu", language), reply_markup=keyboard)
+            return
+        
+        # Show second sign selection
+        keyboard = AstrologyKeyboards.get_zodiac_selection(callback_prefix="compat_second", language=language)
+        text = i18n.get_text("astrology.select_second_sign", language)
+        await query.edit_message_text(text, reply_markup=keyboard)
     
     @staticmethod
-    async def _check_premium_access(user_id: int, language: str, required_plan: str = 'basic') -> Dict[str, Any]:
+    async def _check_premium_access(user_id: int, language: str, required_plan: str = 'basic',
+                                    user_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Check if user has required plan access for astrology features."""
-        user_data = await db_service.get_user(user_id)
+        user_data = user_data or await db_service.get_user(user_id)
         
         if not user_data:
             return {
@@ -249,18 +336,16 @@ class AstrologyHandlers:
             # Get birth date
             birth_date = datetime.fromisoformat(user_data['birth_date'])
             
-            # Build prompt from Supabase template if available
-            prompt_template = await db_service.get_prompt('birth_chart', language) or i18n.get_text("astrology.birth_chart_prompt", language)
+            # Placements are computed locally; the LLM only narrates them
             user_name = (query.from_user.first_name or '').strip() if hasattr(query, 'from_user') and query.from_user else ''
-            prompt = (
-                prompt_template
-                .replace('{username}', user_name)
-                .replace('{birth_date}', birth_date.strftime('%Y-%m-%d'))
-                .replace('{birth_time}', user_data.get('birth_time', 'unknown'))
-                .replace('{birth_place}', user_data.get('birth_place', 'unknown'))
-            )
             requester_id = query.from_user.id if hasattr(query, 'from_user') and query.from_user else 0
-            interpretation = await ai_service.generate_with_fallback(requester_id, prompt)
+            interpretation = await birth_chart_service.interpret(user_data, language, user_name, requester_id)
+            
+            notice = not_generated_key(interpretation)
+            if notice:
+                await query.edit_message_text(i18n.get_text(notice, language),
+                                              reply_markup=AstrologyKeyboards.get_back_button(language, "astrology_menu"))
+                return
             
             # Format response
             text = i18n.get_text("astrology.birth_chart_title", language).format(
@@ -279,38 +364,22 @@ class AstrologyHandlers:
             await query.edit_message_text(text, reply_markup=keyboard)
     
     @staticmethod
-    async def _generate_horoscope(query, horoscope_type: str, zodiac_sign: str, language: str) -> None:
-        """Generate horoscope interpretation."""
+    async def _generate_horoscope(query, horoscope_type: str, zodiac_sign: str, language: str,
+                                  prompt_template: Optional[str] = None) -> None:
+        """Generate horoscope interpretation (prompt_template: already fetched Supabase prompt)."""
         try:
-            # Create prompt from Supabase based on type
-            if horoscope_type == "daily_horoscope":
-                prompt_template = await db_service.get_prompt('daily_horoscope', language) or i18n.get_text("astrology.daily_horoscope_prompt", language)
-                date_str = datetime.now().strftime("%Y-%m-%d")
-                prompt = (
-                    prompt_template
-                    .replace('{sign}', zodiac_sign)
-                    .replace('{date}', date_str)
-                )
-            elif horoscope_type == "weekly_horoscope":
-                prompt_template = await db_service.get_prompt('weekly_horoscope', language) or i18n.get_text("astrology.weekly_horoscope_prompt", language)
-                week_start = datetime.now().strftime("%Y-%m-%d")
-                prompt = (
-                    prompt_template
-                    .replace('{sign}', zodiac_sign)
-                    .replace('{week_start}', week_start)
-                )
-            elif horoscope_type == "monthly_horoscope":
-                prompt_template = await db_service.get_prompt('monthly_horoscope', language) or i18n.get_text("astrology.monthly_horoscope_prompt", language)
-                month_str = datetime.now().strftime("%B %Y")
-                prompt = (
-                    prompt_template
-                    .replace('{sign}', zodiac_sign)
-                    .replace('{month}', month_str)
-                )
-            
-            # Generate interpretation via fallback
             requester_id = query.from_user.id if hasattr(query, 'from_user') and query.from_user else 0
-            interpretation = await ai_service.generate_with_fallback(requester_id, prompt)
+            prefetch_service.horoscope_served(requester_id, horoscope_type, zodiac_sign, language)
+            # Shared per sign, language and period; generated only on a cache miss
+            interpretation = await horoscope_service.horoscope(
+                horoscope_type, zodiac_sign, language, requester_id, prompt_template
+            )
+            
+            notice = not_generated_key(interpretation)
+            if notice:
+                await query.edit_message_text(i18n.get_text(notice, language),
+                                              reply_markup=AstrologyKeyboards.get_back_button(language, "astrology_menu"))
+                return
             
             # Format response
             zodiac_names = {
@@ -336,30 +405,21 @@ class AstrologyHandlers:
             await query.edit_message_text(text, reply_markup=keyboard)
     
     @staticmethod
-    async def _generate_compatibility(query, selection: Dict[str, int], language: str) -> None:
-        """Generate compatibility analysis."""
+    async def _generate_compatibility(query, selection: Dict[str, str], language: str) -> None:
+        """Generate compatibility analysis (selection: {'first': sign, 'second': sign})."""
         try:
-            zodiac_signs = [
-                "aries", "taurus", "gemini", "cancer", "leo", "virgo",
-                "libra", "scorpio", "sagittarius", "capricorn", "aquarius", "pisces"
-            ]
+            sign1 = selection['first']
+            sign2 = selection['second']
             
-            sign1 = zodiac_signs[selection['first']]
-            sign2 = zodiac_signs[selection['second']]
-            
-            # Create compatibility prompt from Supabase if available
-            prompt_template = await db_service.get_prompt('compatibility', language) or i18n.get_text("astrology.compatibility_prompt", language)
-            user_name = (query.from_user.first_name or '').strip() if hasattr(query, 'from_user') and query.from_user else ''
-            prompt = (
-                prompt_template
-                .replace('{sign1}', sign1)
-                .replace('{sign2}', sign2)
-                .replace('{username}', user_name)
-            )
-            
-            # Generate interpretation via fallback
+            # Pair analyses are shared per language, so repeat pairs skip the LLM
             requester_id = query.from_user.id if hasattr(query, 'from_user') and query.from_user else 0
-            interpretation = await ai_service.generate_with_fallback(requester_id, prompt)
+            interpretation = await compatibility_service.analysis(sign1, sign2, language, requester_id)
+            
+            notice = not_generated_key(interpretation)
+            if notice:
+                await query.edit_message_text(i18n.get_text(notice, language),
+                                              reply_markup=AstrologyKeyboards.get_back_button(language, "astrology_menu"))
+                return
             
             # Format response
             zodiac_names = {
@@ -398,12 +458,20 @@ class AstrologyHandlers:
             prompt = (
                 prompt_template
                 .replace('{moon_phase}', moon_phase.get('phase', ''))
-                .replace('{illumination}', str(moon_phase.get('illumination', '')))
+                .replace('{illumination}', f"{moon_phase.get('illumination', '')}%")
             )
             
             # Generate interpretation via fallback
             requester_id = query.from_user.id if hasattr(query, 'from_user') and query.from_user else 0
-            interpretation = await ai_service.generate_with_fallback(requester_id, prompt)
+            interpretation = await ai_service.generate_with_fallback(
+                requester_id, prompt, reading_type='moon_calendar', language=language
+            )
+            
+            notice = not_generated_key(interpretation)
+            if notice:
+                await query.edit_message_text(i18n.get_text(notice, language),
+                                              reply_markup=AstrologyKeyboards.get_back_button(language, "astrology_menu"))
+                return
             
             # Format response
             text = i18n.get_text("astrology.moon_calendar_title", language)
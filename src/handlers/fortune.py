@@ -3,16 +3,21 @@ Fortune telling handlers for the Fal Gram Bot.
 """
 
 import asyncio
-import random
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ChatAction
 from telegram.ext import ContextTypes
-from src.services.database import db_service
-from src.services.ai_service import ai_service
+from config.settings import settings
+from src.services.database import db_service, readings_today
+from src.services.ai_service import ai_service, NOT_GENERATED, not_generated_key
+from src.services.prefetch_service import prefetch_service
+from src.services.tarot_service import tarot_service, Spread
 from src.keyboards.fortune import FortuneKeyboards
 from src.utils.i18n import i18n
+from src.utils.inflight import collapse_duplicates
 from src.utils.logger import get_logger
+from src.utils.pipeline import concurrently, quietly
 # Use validator's sanitize to support max_length
 from src.utils.validators import validator
 
@@ -21,47 +26,62 @@ logger = get_logger("fortune_handlers")
 class FortuneHandlers:
     """Fortune telling handlers."""
     
+    @staticmethod
+    async def _get_user(user, prefetched: bool = True) -> Optional[Dict[str, Any]]:
+        """User record; the copy warmed on fortune menu entry is used when present."""
+        try:
+            if not user:
+                return None
+            return await (prefetch_service.user(user.id) if prefetched else db_service.get_user(user.id))
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _language(user, user_data: Optional[Dict[str, Any]]) -> str:
+        return (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
+    
+    @staticmethod
+    async def _typing(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        await quietly(context.bot.send_chat_action(update.effective_chat.id, ChatAction.TYPING))
+    
     @staticmethod
     async def show_fortune_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Show fortune telling menu."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
         # Use stored language preference from DB for consistency
-        try:
-            user_data = await db_service.get_user(user.id) if user else None
-        except Exception:
-            user_data = None
-        language = (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
+        _, user_data = await concurrently(quietly(query.answer()), FortuneHandlers._get_user(user, prefetched=False))
+        language = FortuneHandlers._language(user, user_data)
         
         keyboard = FortuneKeyboards.get_fortune_menu(language)
         text = i18n.get_text("menu.fortune", language)
         
         await query.edit_message_text(text, reply_markup=keyboard)
+        # Warm the user record and tarot prompt for the next tap
+        if user:
+            prefetch_service.on_menu(user.id, 'fortune', language, user_data)
     
     @staticmethod
-    async def handle_tarot_reading(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    @collapse_duplicates('tarot_reading')
+    async def handle_tarot_reading(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                   operation_id: Optional[str] = None) -> None:
         """Handle tarot reading request."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
-        try:
-            user_data = await db_service.get_user(user.id) if user else None
-        except Exception:
-            user_data = None
-        language = (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
+        _, user_data = await concurrently(quietly(query.answer()), FortuneHandlers._get_user(user))
+        language = FortuneHandlers._language(user, user_data)
         
         # Check usage limits
-        usage_check = await FortuneHandlers._check_usage_limits(user.id, language)
+        usage_check = await FortuneHandlers._check_usage_limits(user.id, language, user_data)
         if not usage_check['can_use']:
             await query.edit_message_text(usage_check['message'], reply_markup=usage_check['keyboard'])
             return
         
-        # Get tarot cards
-        cards = await FortuneHandlers._get_tarot_cards()
-        if not cards:
+        # Draw a three-card spread from the full deck
+        try:
+            spread = tarot_service.draw('three_card')
+        except Exception as e:
+            logger.error(f"Error drawing tarot spread: {e}")
             text = i18n.get_text("error.general", language)
             # Provide Back to Fortune and Main Menu buttons
             action_keyboard = InlineKeyboardMarkup([
@@ -71,30 +91,19 @@ class FortuneHandlers:
             await query.edit_message_text(text, reply_markup=action_keyboard)
             return
         
-        # Draw random cards
-        drawn_cards = random.sample(cards, min(3, len(cards)))
-        
-        # Generate interpretation
-        await FortuneHandlers._generate_tarot_interpretation(query, drawn_cards, language)
-        
-        # Update usage
-        await db_service.increment_usage(user.id)
+        # Generate interpretation (charges usage before replying)
+        await FortuneHandlers._generate_tarot_interpretation(query, spread, language, operation_id)
     
     @staticmethod
     async def handle_coffee_reading(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle coffee reading request."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
-        try:
-            user_data = await db_service.get_user(user.id) if user else None
-        except Exception:
-            user_data = None
-        language = (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
+        _, user_data = await concurrently(quietly(query.answer()), FortuneHandlers._get_user(user))
+        language = FortuneHandlers._language(user, user_data)
         
         # Check usage limits
-        usage_check = await FortuneHandlers._check_usage_limits(user.id, language)
+        usage_check = await FortuneHandlers._check_usage_limits(user.id, language, user_data)
         if not usage_check['can_use']:
             await query.edit_message_text(usage_check['message'], reply_markup=usage_check['keyboard'])
             return
@@ -112,17 +121,12 @@ class FortuneHandlers:
     async def handle_dream_interpretation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle dream interpretation request."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
-        try:
-            user_data = await db_service.get_user(user.id) if user else None
-        except Exception:
-            user_data = None
-        language = (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
+        _, user_data = await concurrently(quietly(query.answer()), FortuneHandlers._get_user(user))
+        language = FortuneHandlers._language(user, user_data)
         
         # Check usage limits
-        usage_check = await FortuneHandlers._check_usage_limits(user.id, language)
+        usage_check = await FortuneHandlers._check_usage_limits(user.id, language, user_data)
         if not usage_check['can_use']:
             await query.edit_message_text(usage_check['message'], reply_markup=usage_check['keyboard'])
             return
@@ -140,17 +144,12 @@ class FortuneHandlers:
     async def handle_palm_reading(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle palm reading request."""
         query = update.callback_query
-        await query.answer()
-        
         user = update.effective_user
-        try:
-            user_data = await db_service.get_user(user.id) if user else None
-        except Exception:
-            user_data = None
-        language = (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
+        _, user_data = await concurrently(quietly(query.answer()), FortuneHandlers._get_user(user))
+        language = FortuneHandlers._language(user, user_data)
         
         # Check usage limits
-        usage_check = await FortuneHandlers._check_usage_limits(user.id, language)
+        usage_check = await FortuneHandlers._check_usage_limits(user.id, language, user_data)
         if not usage_check['can_use']:
             await query.edit_message_text(usage_check['message'], reply_markup=usage_check['keyboard'])
             return
@@ -166,31 +165,36 @@ class FortuneHandlers:
         await query.edit_message_text(text, reply_markup=keyboard)
     
     @staticmethod
-    async def handle_photo_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    @collapse_duplicates(lambda update, context: context.user_data.get('waiting_for') or 'photo')
+    async def handle_photo_input(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                 operation_id: Optional[str] = None) -> None:
         """Handle photo input for fortune telling."""
-        user = update.effective_user
-        try:
-            user_data = await db_service.get_user(user.id) if user else None
-        except Exception:
-            user_data = None
-        language = (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
-        
         waiting_for = context.user_data.get('waiting_for')
         if not waiting_for:
             return
         
+        user = update.effective_user
         # Get the largest photo
         photo = update.message.photo[-1]
         
-        try:
-            # Download photo
+        async def download() -> bytes:
             file = await context.bot.get_file(photo.file_id)
-            photo_bytes = await file.download_as_bytearray()
+            return await file.download_as_bytearray()
+        
+        # User, photo and the typing indicator do not depend on each other
+        user_data, photo_bytes, _ = await concurrently(
+            FortuneHandlers._get_user(user), quietly(download()), FortuneHandlers._typing(update, context)
+        )
+        language = FortuneHandlers._language(user, user_data)
+        
+        try:
+            if photo_bytes is None:
+                raise RuntimeError("photo download failed")
             
             if waiting_for == 'coffee_photo':
-                await FortuneHandlers._process_coffee_photo(update, context, photo_bytes, language)
+                await FortuneHandlers._process_coffee_photo(update, context, photo_bytes, language, operation_id)
             elif waiting_for == 'palm_photo':
-                await FortuneHandlers._process_palm_photo(update, context, photo_bytes, language)
+                await FortuneHandlers._process_palm_photo(update, context, photo_bytes, language, operation_id)
             
             # Clear waiting state
             context.user_data.pop('waiting_for', None)
@@ -201,33 +205,32 @@ class FortuneHandlers:
             await update.message.reply_text(text)
     
     @staticmethod
-    async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    @collapse_duplicates(lambda update, context: context.user_data.get('waiting_for') or 'text')
+    async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                operation_id: Optional[str] = None) -> None:
         """Handle text input for fortune telling."""
-        user = update.effective_user
-        # Use stored language preference from DB for consistency across flows
-        try:
-            user_data = await db_service.get_user(user.id) if user else None
-        except Exception:
-            user_data = None
-        language = (user_data.get('language') if user_data else None) or (user.language_code if user and user.language_code else 'en')
-        
         waiting_for = context.user_data.get('waiting_for')
         if not waiting_for:
             return
         
+        user = update.effective_user
+        # Use stored language preference from DB for consistency across flows
+        user_data, _ = await concurrently(FortuneHandlers._get_user(user), FortuneHandlers._typing(update, context))
+        language = FortuneHandlers._language(user, user_data)
+        
         text = update.message.text
         sanitized_text = validator.sanitize_text(text, max_length=1000)
         
         if waiting_for == 'dream_text':
-            await FortuneHandlers._process_dream_text(update, context, sanitized_text, language)
+            await FortuneHandlers._process_dream_text(update, context, sanitized_text, language, operation_id)
         
         # Clear waiting state
         context.user_data.pop('waiting_for', None)
     
     @staticmethod
-    async def _check_usage_limits(user_id: int, language: str) -> Dict[str, Any]:
+    async def _check_usage_limits(user_id: int, language: str, user_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Check if user can use fortune telling services."""
-        user_data = await db_service.get_user(user_id)
+        user_data = user_data or await db_service.get_user(user_id)
         
         if not user_data:
             return {
@@ -240,9 +243,9 @@ class FortuneHandlers:
         if user_data.get('is_premium'):
             return {'can_use': True}
         
-        # Check daily usage for free users
-        daily_usage = user_data.get('daily_usage_count', 0)
-        free_limit = 3  # Free users get 3 readings per day
+        # Check daily usage for free users (increment_usage counts daily_readings_used per day)
+        daily_usage = readings_today(user_data)
+        free_limit = settings.FREE_DAILY_LIMIT
         
         if daily_usage >= free_limit:
             return {
@@ -254,58 +257,29 @@ class FortuneHandlers:
         return {'can_use': True}
     
     @staticmethod
-    async def _get_tarot_cards() -> List[Dict[str, Any]]:
-        """Get tarot cards from database."""
-        try:
-            # Prefer localized cards from locales if provided (list of {name, meaning})
-            # Fallback to English sample set
-            # Note: Language will be handled at the call site by selecting desired items
-            localized = i18n.get_raw('tarot.cards', 'tr')  # probe key existence
-            # We don't know the target language here; return English fallback, caller will format
-            default_cards = [
-                {"name": "The Fool", "meaning": "New beginnings, innocence, spontaneity"},
-                {"name": "The Magician", "meaning": "Manifestation, resourcefulness, power"},
-                {"name": "The High Priestess", "meaning": "Intuition, mystery, spirituality"},
-                {"name": "The Empress", "meaning": "Fertility, nurturing, abundance"},
-                {"name": "The Emperor", "meaning": "Authority, structure, control"},
-                {"name": "The Hierophant", "meaning": "Tradition, conformity, morality"},
-                {"name": "The Lovers", "meaning": "Love, harmony, relationships"},
-                {"name": "The Chariot", "meaning": "Control, willpower, determination"},
-                {"name": "Strength", "meaning": "Inner strength, courage, persuasion"},
-                {"name": "The Hermit", "meaning": "Soul-searching, introspection, solitude"}
-            ]
-            return default_cards
-        except Exception as e:
-            logger.error(f"Error getting tarot cards: {e}")
-            return []
-    
-    @staticmethod
-    async def _generate_tarot_interpretation(query, cards: List[Dict[str, Any]], language: str) -> None:
+    async def _generate_tarot_interpretation(query, spread: Spread, language: str,
+                                             operation_id: Optional[str] = None) -> None:
         """Generate tarot card interpretation."""
         try:
-            # Build a localized spread prompt from Supabase/i18n if available
             user_id = query.from_user.id if hasattr(query, "from_user") and query.from_user else None
-            # Attempt to localize card names/meanings if locales provide them
-            # If not available, use provided card objects as-is
-            card_names = ", ".join([c.get('name', '') for c in cards])
-            card_meanings = "; ".join([c.get('meaning', '') for c in cards])
-            prompt_template = (
-                await db_service.get_prompt('tarot_spread', language)
-                or i18n.get_text('tarot.spread_prompt', language)
-            )
-            if not prompt_template or prompt_template == 'tarot.spread_prompt':
-                prompt_template = (
-                    "You are an expert tarot reader. Provide a cohesive interpretation for the spread.\n\n"
-                    "Include: overall theme, present situation, guidance, and a hopeful message."
-                )
-            spread_prompt = f"{prompt_template}\n\nCards: {card_names}\nMeanings: {card_meanings}"
-            interpretation = await ai_service.generate_with_fallback(user_id or 0, spread_prompt)
+            table = tarot_service.table(language)
+            cards = tarot_service.resolve(spread, language)
+            interpretation = await tarot_service.interpret(spread, language, user_id or 0)
+            if interpretation in NOT_GENERATED:
+                # Busy or rate limited: nothing was read, so nothing is charged
+                text = i18n.get_text(not_generated_key(interpretation), language)
+                await query.edit_message_text(text, reply_markup=FortuneKeyboards.get_back_button(language))
+                return
             
             # Format response
             title = i18n.get_text("tarot_fortune", language)
-            lines = [f"{idx}. {card.get('name','')}: {card.get('meaning','')}" for idx, card in enumerate(cards, 1)]
+            lines = [f"{idx}. {card.position} — {table.display_name(card)}: {card.meaning}" for idx, card in enumerate(cards, 1)]
             text = f"{title}\n\n" + "\n".join(lines) + (f"\n\n{interpretation}" if interpretation else "")
             
+            # The daily limit check reads this counter, so it is written before the reply
+            if user_id:
+                await db_service.increment_usage(user_id, operation_id=operation_id)
+            
             keyboard = FortuneKeyboards.get_back_button(language)
             await query.edit_message_text(text, reply_markup=keyboard)
             
@@ -316,17 +290,20 @@ class FortuneHandlers:
             await query.edit_message_text(text, reply_markup=keyboard)
     
     @staticmethod
-    async def _process_coffee_photo(update: Update, context: ContextTypes.DEFAULT_TYPE, photo_bytes: bytes, language: str) -> None:
+    async def _process_coffee_photo(update: Update, context: ContextTypes.DEFAULT_TYPE, photo_bytes: bytes, language: str,
+                                    operation_id: Optional[str] = None) -> None:
         """Process coffee cup photo for reading."""
         try:
-            # Send processing message in correct language
+            # Send processing message in correct language while fetching the coffee prompt
             processing_text = i18n.get_text("coffee_fortune_processing", language)
-            await update.message.reply_text(processing_text)
+            _, prompt_template = await concurrently(
+                update.message.reply_text(processing_text), db_service.get_prompt('coffee', language)
+            )
 
-            # Fetch coffee prompt and run via AI fallback with image
+            # Run via AI fallback with image
             user_id = update.effective_user.id
             prompt_template = (
-                await db_service.get_prompt('coffee', language)
+                prompt_template
                 or await db_service.get_prompt('coffee_fortune', language)
                 or i18n.get_text('coffee_fortune_prompt', language)
             )
@@ -334,8 +311,15 @@ class FortuneHandlers:
             user_name = (update.effective_user.first_name or '').strip() if update.effective_user else ''
             if user_name:
                 prompt_template = prompt_template.replace('{username}', user_name)
-            interpretation = await ai_service.generate_with_fallback(user_id, prompt_template, image_data=photo_bytes)
-            interpretation = interpretation or prompt_template
+            interpretation = await ai_service.generate_with_fallback(
+                user_id, prompt_template, image_data=photo_bytes, reading_type='coffee', language=language
+            )
+            notice = not_generated_key(interpretation)
+            if notice:
+                # Failed, busy or rate limited: nothing was read, so nothing is charged
+                await update.message.reply_text(i18n.get_text(notice, language),
+                                                reply_markup=FortuneKeyboards.get_back_button(language))
+                return
             
             # Format response
             title = i18n.get_text("coffee_fortune", language)
@@ -356,18 +340,18 @@ class FortuneHandlers:
             
             keyboard = FortuneKeyboards.get_back_button(language)
             # Send interpretation and share prompt together in one message block
+            # The daily limit check reads this counter, so it is written before the reply
+            await db_service.increment_usage(update.effective_user.id, operation_id=operation_id)
             await update.message.reply_text(text + "\n\n" + i18n.get_text('coffee_fortune_share_twitter_message', language), reply_markup=share_keyboard)
             
-            # Update usage
-            await db_service.increment_usage(update.effective_user.id)
-            
         except Exception as e:
             logger.error(f"Error processing coffee photo: {e}")
             text = i18n.get_text("error.general", language)
             await update.message.reply_text(text)
     
     @staticmethod
-    async def _process_palm_photo(update: Update, context: ContextTypes.DEFAULT_TYPE, photo_bytes: bytes, language: str) -> None:
+    async def _process_palm_photo(update: Update, context: ContextTypes.DEFAULT_TYPE, photo_bytes: bytes, language: str,
+                                  operation_id: Optional[str] = None) -> None:
         """Process palm photo for reading."""
         try:
             # Use fallback with palm-specific hint
@@ -378,8 +362,15 @@ class FortuneHandlers:
             if user_name:
                 base_prompt = base_prompt.replace('{username}', user_name)
             palm_prompt = palm_hint + ' - ' + base_prompt
-            interpretation = await ai_service.generate_with_fallback(user_id, palm_prompt, image_data=photo_bytes)
-            interpretation = interpretation or base_prompt
+            interpretation = await ai_service.generate_with_fallback(
+                user_id, palm_prompt, image_data=photo_bytes, reading_type='palm', language=language
+            )
+            notice = not_generated_key(interpretation)
+            if notice:
+                # Failed, busy or rate limited: nothing was read, so nothing is charged
+                await update.message.reply_text(i18n.get_text(notice, language),
+                                                reply_markup=FortuneKeyboards.get_back_button(language))
+                return
             
             # Format response
             title = i18n.get_text("fortune.palm_reading", language)
@@ -389,18 +380,18 @@ class FortuneHandlers:
                 [InlineKeyboardButton(i18n.get_text('common.back', language), callback_data='fortune')],
                 [InlineKeyboardButton(i18n.get_text('main_menu', language), callback_data='main_menu')]
             ])
+            # The daily limit check reads this counter, so it is written before the reply
+            await db_service.increment_usage(update.effective_user.id, operation_id=operation_id)
             await update.message.reply_text(text, reply_markup=action_keyboard)
             
-            # Update usage
-            await db_service.increment_usage(update.effective_user.id)
-            
         except Exception as e:
             logger.error(f"Error processing palm photo: {e}")
             text = i18n.get_text("error.general", language)
             await update.message.reply_text(text)
     
     @staticmethod
-    async def _process_dream_text(update: Update, context: ContextTypes.DEFAULT_TYPE, dream_text: str, language: str) -> None:
+    async def _process_dream_text(update: Update, context: ContextTypes.DEFAULT_TYPE, dream_text: str, language: str,
+                                  operation_id: Optional[str] = None) -> None:
         """Process dream text for interpretation."""
         try:
             # Fetch dream prompt and send to AI with fallback
@@ -409,8 +400,15 @@ class FortuneHandlers:
             if user_name:
                 prompt_template = prompt_template.replace('{username}', user_name)
             filled_prompt = f"{prompt_template}\n\nDream: {dream_text}"
-            interpretation = await ai_service.generate_with_fallback(update.effective_user.id, filled_prompt)
-            interpretation = interpretation or prompt_template
+            interpretation = await ai_service.generate_with_fallback(
+                update.effective_user.id, filled_prompt, reading_type='dream', language=language
+            )
+            notice = not_generated_key(interpretation)
+            if notice:
+                # Failed, busy or rate limited: nothing was read, so nothing is charged
+                await update.message.reply_text(i18n.get_text(notice, language),
+                                                reply_markup=FortuneKeyboards.get_back_button(language))
+                return
             
             # Format response
             title = i18n.get_text("dream_analysis", language)
@@ -428,11 +426,10 @@ class FortuneHandlers:
             ])
             
             keyboard = FortuneKeyboards.get_back_button(language)
+            # The daily limit check reads this counter, so it is written before the reply
+            await db_service.increment_usage(update.effective_user.id, operation_id=operation_id)
             await update.message.reply_text(text + "\n\n" + i18n.get_text('coffee_fortune_share_twitter_message', language), reply_markup=share_keyboard)
             
-            # Update usage
-            await db_service.increment_usage(update.effective_user.id)
-            
         except Exception as e:
             logger.error(f"Error processing dream text: {e}")
             text = i18n.get_text("error.general", language)
@@ -451,4 +451,7 @@ class PaymentHandlers:
             
         except Exception as e:
             logger.error(f"Error cancelling subscription: {e}")
-            await update.callback_query.answer("❌ An error occurred") 
\ No newline at end of file
+            await update.callback_query.answer("❌ An error occurred") 
+
+# Global handlers instance
+payment_handlers = PaymentHandlers()
@@ -513,4 +513,7 @@ class ReferralHandlers:
 
     @staticmethod
     async def complete_referral(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        await ReferralHandlers.show_referral_info(update, context)
\ No newline at end of file
+        await ReferralHandlers.show_referral_info(update, context)
+
+# Global handlers instance
+referral_handlers = ReferralHandlers()
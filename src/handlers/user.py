@@ -8,7 +8,7 @@ from telegram.ext import ContextTypes
 from config.settings import settings
 from src.utils.i18n import i18n
 from src.utils.logger import logger
-from src.services.database import db_service
+from src.services.database import db_service, readings_today
 from src.keyboards.main import MainKeyboards
 
 
@@ -136,7 +136,7 @@ class UserHandlers:
             
             # Usage stats
             total_readings = user_data.get('total_readings', 0)
-            daily_readings = user_data.get('daily_readings_used', 0)
+            daily_readings = readings_today(user_data)
             profile_text += f"\n**{i18n.get_text('profile.usage_stats', language)}:**\n"
             profile_text += f"Total readings: {total_readings}\n"
             profile_text += f"Today's readings: {daily_readings}/{settings.FREE_DAILY_LIMIT}"
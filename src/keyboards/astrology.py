@@ -46,6 +46,12 @@ class AstrologyKeyboards:
                     callback_data="moon_calendar"
                 )
             ],
+            [
+                InlineKeyboardButton(
+                    i18n.get_text("astrology_menu.buttons.chatbot", language),
+                    callback_data="astro_chatbot"
+                )
+            ],
             [
                 InlineKeyboardButton(
                     i18n.get_text("common.back", language),
@@ -232,13 +238,26 @@ class AstrologyKeyboards:
         return InlineKeyboardMarkup(keyboard)
     
     @staticmethod
-    def get_astrology_back_keyboard(language: str = "en") -> InlineKeyboardMarkup:
+    def get_chatbot_keyboard(language: str = "en") -> InlineKeyboardMarkup:
+        """Get keyboard shown with chatbot answers."""
+        keyboard = [
+            [
+                InlineKeyboardButton(
+                    i18n.get_text("astro_chatbot.buttons.close", language),
+                    callback_data="astro_chatbot_close"
+                )
+            ]
+        ]
+        return InlineKeyboardMarkup(keyboard)
+    
+    @staticmethod
+    def get_astrology_back_keyboard(language: str = "en", callback_data: str = "astrology") -> InlineKeyboardMarkup:
         """Get astrology back keyboard."""
         keyboard = [
             [
                 InlineKeyboardButton(
                     i18n.get_text("common.back", language),
-                    callback_data="astrology"
+                    callback_data=callback_data
                 )
             ]
         ]
@@ -260,5 +279,5 @@ class AstrologyKeyboards:
         return PaymentKeyboards.get_premium_upgrade_keyboard(language)
 
     @staticmethod
-    def get_back_button(language: str = "en") -> InlineKeyboardMarkup:
-        return AstrologyKeyboards.get_astrology_back_keyboard(language)
\ No newline at end of file
+    def get_back_button(language: str = "en", callback_data: str = "astrology") -> InlineKeyboardMarkup:
+        return AstrologyKeyboards.get_astrology_back_keyboard(language, callback_data)
\ No newline at end of file
@@ -4,11 +4,57 @@ Handles integrations with Gemini and DeepSeek AI APIs.
 """
 
 import asyncio
+import time
 import aiohttp
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from config.settings import settings
 from src.utils.logger import logger
+from src.utils.metrics import metrics, AI_LATENCY_BUCKETS, TOKEN_BUCKETS, RATE_LIMIT_REJECTIONS
+from src.services.generation_profiles import generation_profiles, usage_stats, GenerationProfile, DEFAULT_TYPE
+from src.services.model_router import model_router, Route
+from src.services.llm_governor import llm_governor, LLMQueueTimeout
+
+# Returned instead of a completion when the per-user rate limit is hit
+RATE_LIMIT_MESSAGE = "Rate limit exceeded. Please try again later."
+# Returned when no LLM slot frees up within LLM_QUEUE_TIMEOUT
+BUSY_MESSAGE = "The stars are very busy right now. Please try again in a minute."
+# Placeholder replies that are not generated readings (never cache or store these)
+NOT_GENERATED = (RATE_LIMIT_MESSAGE, BUSY_MESSAGE)
+# Localized notices handlers show instead of a result that is not a reading
+NOT_GENERATED_KEYS = {RATE_LIMIT_MESSAGE: 'error.rate_limited', BUSY_MESSAGE: 'error.ai_busy'}
+
+
+def not_generated_key(text: Optional[str]) -> Optional[str]:
+    """i18n key to show instead of `text` when no reading was generated (None, rate limited or busy)."""
+    if not text:
+        return 'error.generation_failed'
+    return NOT_GENERATED_KEYS.get(text)
+
+AI_LATENCY = metrics.histogram(
+    "falgram_ai_request_seconds", "LLM request latency", ["provider", "model", "status"],
+    buckets=AI_LATENCY_BUCKETS
+)
+AI_TOKENS = metrics.counter(
+    "falgram_ai_tokens_total", "LLM tokens reported by the provider", ["provider", "model", "direction"]
+)
+AI_OUTPUT_TOKENS = metrics.histogram(
+    "falgram_ai_output_tokens", "Output tokens per LLM response", ["provider", "model"],
+    buckets=TOKEN_BUCKETS
+)
+AI_ERRORS = metrics.counter(
+    "falgram_ai_errors_total", "Failed LLM requests", ["provider", "model", "reason"]
+)
+AI_READING_TOKENS = metrics.histogram(
+    "falgram_ai_reading_tokens", "Prompt/output tokens per LLM call by reading type", ["reading_type", "direction"],
+    buckets=TOKEN_BUCKETS
+)
+AI_TRUNCATED = metrics.counter(
+    "falgram_ai_truncated_total", "LLM responses cut off by the output token cap", ["reading_type"]
+)
+
+# Rough chars-per-token ratio used when a provider reports no usage
+CHARS_PER_TOKEN = 4
 
 # Optional supabase import
 try:
@@ -28,6 +74,11 @@ class AIService:
         self.rate_limit_cache = {}
         self.rate_limit_window = settings.RATE_LIMIT_WINDOW
         self.rate_limit_requests = settings.RATE_LIMIT_REQUESTS
+        # Provider calls by name; replaceable with stubs for offline runs
+        self.providers = {
+            'gemini': self._make_gemini_request,
+            'deepseek': self._make_deepseek_request,
+        }
     
     def _check_rate_limit(self, user_id: int) -> bool:
         """Check if user has exceeded rate limit."""
@@ -43,6 +94,7 @@ class AIService:
         
         # Check if user has exceeded limit
         if len(user_cache) >= self.rate_limit_requests:
+            RATE_LIMIT_REJECTIONS.inc(limiter="ai_user")
             return False
         
         # Add current request
@@ -51,8 +103,32 @@ class AIService:
         
         return True
     
-    async def _make_gemini_request(self, prompt: str, image_data: Optional[bytes] = None, model: Optional[str] = None) -> Optional[str]:
-        """Make request to Gemini API with optional model override."""
+    @staticmethod
+    def _record_tokens(provider: str, model: str, prompt_tokens: Optional[int], output_tokens: Optional[int]) -> None:
+        """Count prompt/output tokens reported by a provider."""
+        if prompt_tokens:
+            AI_TOKENS.inc(prompt_tokens, provider=provider, model=model, direction="input")
+        if output_tokens:
+            AI_TOKENS.inc(output_tokens, provider=provider, model=model, direction="output")
+            AI_OUTPUT_TOKENS.observe(output_tokens, provider=provider, model=model)
+
+    @staticmethod
+    def _record_usage(reading_type: str, prompt: str, text: str, prompt_tokens: Optional[int],
+                      output_tokens: Optional[int], latency: float, truncated: bool) -> None:
+        """Per-reading-type size/latency accounting (estimated from length when not reported)."""
+        prompt_tokens = prompt_tokens or len(prompt) // CHARS_PER_TOKEN + 1
+        output_tokens = output_tokens or len(text) // CHARS_PER_TOKEN + 1
+        AI_READING_TOKENS.observe(prompt_tokens, reading_type=reading_type, direction="input")
+        AI_READING_TOKENS.observe(output_tokens, reading_type=reading_type, direction="output")
+        if truncated:
+            AI_TRUNCATED.inc(reading_type=reading_type)
+        usage_stats.record(reading_type, prompt_tokens, output_tokens, latency, truncated)
+    
+    async def _make_gemini_request(self, prompt: str, image_data: Optional[bytes] = None, model: Optional[str] = None,
+                                   profile: Optional[GenerationProfile] = None,
+                                   reading_type: str = DEFAULT_TYPE) -> Optional[str]:
+        """Make request to Gemini API with optional model override and generation profile."""
+        profile = profile or generation_profiles.get(reading_type)
         if not self.gemini_api_key:
             logger.warning("Gemini API key not configured")
             return None
@@ -86,57 +162,88 @@ class AIService:
             payload = {
                 "contents": [{"parts": content}],
                 "generationConfig": {
-                    "temperature": 0.7,
+                    "temperature": profile.temperature,
                     "topK": 40,
                     "topP": 0.95,
-                    "maxOutputTokens": 1024,
+                    "maxOutputTokens": profile.max_output_tokens,
                 }
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if 'candidates' in data and data['candidates']:
-                            return data['candidates'][0]['content']['parts'][0]['text']
-                    else:
-                        logger.error(f"Gemini API error: {response.status}")
-                        return None
+            started = time.perf_counter()
+            status = "error"
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(url, json=payload, headers=headers) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            usage = data.get('usageMetadata') or {}
+                            self._record_tokens("gemini", model, usage.get('promptTokenCount'), usage.get('candidatesTokenCount'))
+                            if 'candidates' in data and data['candidates']:
+                                status = "ok"
+                                candidate = data['candidates'][0]
+                                text = candidate['content']['parts'][0]['text']
+                                self._record_usage(
+                                    reading_type, prompt, text, usage.get('promptTokenCount'),
+                                    usage.get('candidatesTokenCount'), time.perf_counter() - started,
+                                    candidate.get('finishReason') == 'MAX_TOKENS'
+                                )
+                                return text
+                            AI_ERRORS.inc(provider="gemini", model=model, reason="empty")
+                        else:
+                            AI_ERRORS.inc(provider="gemini", model=model, reason=f"http_{response.status}")
+                            logger.error(f"Gemini API error: {response.status}")
+                            return None
+            finally:
+                AI_LATENCY.observe(time.perf_counter() - started, provider="gemini", model=model, status=status)
                         
         except Exception as e:
+            AI_ERRORS.inc(provider="gemini", model=model or "default", reason=type(e).__name__)
             logger.error(f"Error making Gemini request: {e}")
             return None
 
-    async def generate_with_fallback(self, user_id: int, prompt: str, image_data: Optional[bytes] = None) -> Optional[str]:
-        """Generate text using provider fallback: Gemini 2.5 Flash Lite -> 2.0 Flash -> DeepSeek -> Gemini 1.5 -> legacy.
-        Does rate limiting per user.
+    async def _call_route(self, route: Route, prompt: str, image_data: Optional[bytes],
+                          profile: GenerationProfile, reading_type: str) -> Optional[str]:
+        if route.provider == 'deepseek':
+            # DeepSeek is text only
+            if image_data:
+                prompt += "\n\n(Visual reference provided; describe based on text instructions as needed.)"
+            return await self.providers['deepseek'](prompt, profile=profile, reading_type=reading_type)
+        return await self.providers['gemini'](prompt, image_data=image_data, model=route.model,
+                                              profile=profile, reading_type=reading_type)
+
+    async def generate_with_fallback(self, user_id: int, prompt: str, image_data: Optional[bytes] = None,
+                                     reading_type: str = DEFAULT_TYPE, language: Optional[str] = None,
+                                     plan: Optional[str] = None) -> Optional[str]:
+        """Generate text, walking the provider/model chain chosen by the routing policy.
+        Does rate limiting per user. The reading type's generation profile sets the output
+        cap and temperature; the user's plan (looked up when not given), provider health
+        and remaining quota decide the model order. Each attempt waits for a slot from the
+        concurrency governor; if none frees up in time the call fails fast with BUSY_MESSAGE.
         """
         if not self._check_rate_limit(user_id):
-            return "Rate limit exceeded. Please try again later."
-
-        # Preferred Gemini model order
-        gemini_models = [
-            "gemini-2.5-flash-lite",
-            "gemini-2.0-flash",
-            "gemini-1.5-flash",
-        ]
-        for model in gemini_models:
-            result = await self._make_gemini_request(prompt, image_data=image_data, model=model)
-            if result:
-                return result
+            return RATE_LIMIT_MESSAGE
 
-        # DeepSeek as fallback (text only)
-        ds_prompt = prompt if not image_data else prompt + "\n\n(Visual reference provided; describe based on text instructions as needed.)"
-        result = await self._make_deepseek_request(ds_prompt)
-        if result:
-            return result
+        profile = await generation_profiles.resolve(reading_type, language)
+        if plan is None:
+            plan = await model_router.plan_for(user_id)
 
-        # Gemini legacy last chance
-        result = await self._make_gemini_request(prompt, image_data=image_data, model=None)
-        return result
+        for route in model_router.route(plan, profile.models):
+            try:
+                async with llm_governor.slot(user_id, plan, route.provider):
+                    model_router.acquire(route, plan)
+                    result = await self._call_route(route, prompt, image_data, profile, reading_type)
+            except LLMQueueTimeout as e:
+                logger.warning(f"LLM queue timeout for user {user_id} ({plan}): {e}")
+                return BUSY_MESSAGE
+            model_router.record(route, bool(result))
+            if result:
+                return result
+        return None
     
-    async def _make_deepseek_request(self, prompt: str) -> Optional[str]:
-        """Make request to DeepSeek API."""
+    async def _make_deepseek_request(self, prompt: str, profile: Optional[GenerationProfile] = None,
+                                     reading_type: str = DEFAULT_TYPE) -> Optional[str]:
+        """Make request to DeepSeek API with the reading type's generation profile."""
+        profile = profile or generation_profiles.get(reading_type)
         if not self.deepseek_api_key:
             logger.warning("DeepSeek API key not configured")
             return None
@@ -155,29 +262,47 @@ class AIService:
                     {"role": "system", "content": "You are a mystical fortune teller and astrologer. Provide insightful, positive, and helpful interpretations."},
                     {"role": "user", "content": prompt}
                 ],
-                "temperature": 0.7,
-                "max_tokens": 1024
+                "temperature": profile.temperature,
+                "max_tokens": profile.max_output_tokens
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if 'choices' in data and data['choices']:
-                            return data['choices'][0]['message']['content']
-                    else:
-                        logger.error(f"DeepSeek API error: {response.status}")
-                        return None
+            model = payload["model"]
+            started = time.perf_counter()
+            status = "error"
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(url, json=payload, headers=headers) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            usage = data.get('usage') or {}
+                            self._record_tokens("deepseek", model, usage.get('prompt_tokens'), usage.get('completion_tokens'))
+                            if 'choices' in data and data['choices']:
+                                status = "ok"
+                                choice = data['choices'][0]
+                                text = choice['message']['content']
+                                self._record_usage(
+                                    reading_type, prompt, text, usage.get('prompt_tokens'),
+                                    usage.get('completion_tokens'), time.perf_counter() - started,
+                                    choice.get('finish_reason') == 'length'
+                                )
+                                return text
+                            AI_ERRORS.inc(provider="deepseek", model=model, reason="empty")
+                        else:
+                            AI_ERRORS.inc(provider="deepseek", model=model, reason=f"http_{response.status}")
+                            logger.error(f"DeepSeek API error: {response.status}")
+                            return None
+            finally:
+                AI_LATENCY.observe(time.perf_counter() - started, provider="deepseek", model=model, status=status)
                         
         except Exception as e:
+            AI_ERRORS.inc(provider="deepseek", model="deepseek-chat", reason=type(e).__name__)
             logger.error(f"Error making DeepSeek request: {e}")
             return None
     
+    # Fixed-prompt helpers; like every other caller they go through generate_with_fallback
+    
     async def generate_coffee_fortune(self, user_id: int, image_data: bytes) -> Optional[str]:
         """Generate coffee fortune from image."""
-        if not self._check_rate_limit(user_id):
-            return "Rate limit exceeded. Please try again later."
-        
         prompt = """You are an expert coffee fortune teller. Analyze this coffee cup image and provide a detailed, mystical interpretation.
 
 Include:
@@ -189,20 +314,10 @@ Include:
 
 Make it mystical, positive, and inspiring. Write in a warm, caring tone."""
 
-        # Try Gemini first (better for image analysis)
-        result = await self._make_gemini_request(prompt, image_data)
-        if result:
-            return result
-        
-        # Fallback to DeepSeek (text only)
-        result = await self._make_deepseek_request(prompt + "\n\nNote: I cannot see the image, so I'll provide a general coffee fortune reading.")
-        return result
+        return await self.generate_with_fallback(user_id, prompt, image_data=image_data, reading_type='coffee')
     
     async def generate_tarot_interpretation(self, user_id: int, card: str) -> Optional[str]:
         """Generate tarot card interpretation."""
-        if not self._check_rate_limit(user_id):
-            return "Rate limit exceeded. Please try again later."
-        
         prompt = f"""You are an expert tarot reader. Provide a detailed interpretation of the {card} card.
 
 Include:
@@ -214,42 +329,22 @@ Include:
 
 Make it mystical, insightful, and uplifting. Write in a caring, supportive tone."""
 
-        # Try DeepSeek first (better for text generation)
-        result = await self._make_deepseek_request(prompt)
-        if result:
-            return result
-        
-        # Fallback to Gemini
-        result = await self._make_gemini_request(prompt)
-        return result
+        return await self.generate_with_fallback(user_id, prompt, reading_type='tarot')
     
     async def generate_tarot_spread_interpretation(self, user_id: int, cards: List[Dict[str, Any]]) -> Optional[str]:
         """Generate interpretation for a spread of tarot cards using both names and meanings."""
-        if not self._check_rate_limit(user_id):
-            return "Rate limit exceeded. Please try again later."
-        try:
-            card_names = ", ".join(card.get("name", "") for card in cards)
-            card_meanings = "; ".join(card.get("meaning", "") for card in cards)
-            prompt = (
-                "You are an expert tarot reader. Provide a cohesive interpretation for the following spread.\n\n"
-                f"Cards: {card_names}\n"
-                f"Card meanin gs (provided as hints): {card_meanings}\n\n"
-                "Include: overall theme, present situation, guidance, and a hopeful message."
-            )
-            # Prefer DeepSeek for text
-            result = await self._make_deepseek_request(prompt)
-            if result:
-                return result
-            return await self._make_gemini_request(prompt)
-        except Exception as e:
-            logger.error(f"Error generating spread interpretation: {e}")
-            return None
+        card_names = ", ".join(card.get("name", "") for card in cards)
+        card_meanings = "; ".join(card.get("meaning", "") for card in cards)
+        prompt = (
+            "You are an expert tarot reader. Provide a cohesive interpretation for the following spread.\n\n"
+            f"Cards: {card_names}\n"
+            f"Card meanings (provided as hints): {card_meanings}\n\n"
+            "Include: overall theme, present situation, guidance, and a hopeful message."
+        )
+        return await self.generate_with_fallback(user_id, prompt, reading_type='tarot')
     
     async def generate_dream_interpretation(self, user_id: int, dream_text: str) -> Optional[str]:
         """Generate dream interpretation."""
-        if not self._check_rate_limit(user_id):
-            return "Rate limit exceeded. Please try again later."
-        
         prompt = f"""You are an expert dream interpreter. Analyze this dream and provide a detailed interpretation.
 
 Dream: {dream_text}
@@ -263,20 +358,10 @@ Include:
 
 Make it insightful, supportive, and encouraging. Focus on personal growth and understanding."""
 
-        # Try DeepSeek first
-        result = await self._make_deepseek_request(prompt)
-        if result:
-            return result
-        
-        # Fallback to Gemini
-        result = await self._make_gemini_request(prompt)
-        return result
+        return await self.generate_with_fallback(user_id, prompt, reading_type='dream')
     
     async def generate_horoscope(self, user_id: int, sign: str, period: str = "daily") -> Optional[str]:
         """Generate horoscope for zodiac sign."""
-        if not self._check_rate_limit(user_id):
-            return "Rate limit exceeded. Please try again later."
-        
         prompt = f"""You are an expert astrologer. Create a detailed {period} horoscope for {sign} sign.
 
 Include:
@@ -288,20 +373,10 @@ Include:
 
 Make it personalized, positive, and inspiring. Write in a warm, encouraging tone that resonates with {sign} characteristics."""
 
-        # Try DeepSeek first
-        result = await self._make_deepseek_request(prompt)
-        if result:
-            return result
-        
-        # Fallback to Gemini
-        result = await self._make_gemini_request(prompt)
-        return result
+        return await self.generate_with_fallback(user_id, prompt, reading_type=f"{period}_horoscope")
     
     async def generate_compatibility_analysis(self, user_id: int, sign1: str, sign2: str) -> Optional[str]:
         """Generate compatibility analysis between two signs."""
-        if not self._check_rate_limit(user_id):
-            return "Rate limit exceeded. Please try again later."
-        
         prompt = f"""You are an expert astrologer. Analyze the compatibility between {sign1} and {sign2} signs.
 
 Include:
@@ -314,20 +389,10 @@ Include:
 
 Make it balanced, insightful, and constructive. Focus on understanding and growth opportunities."""
 
-        # Try DeepSeek first
-        result = await self._make_deepseek_request(prompt)
-        if result:
-            return result
-        
-        # Fallback to Gemini
-        result = await self._make_gemini_request(prompt)
-        return result
+        return await self.generate_with_fallback(user_id, prompt, reading_type='compatibility')
     
     async def generate_birth_chart_analysis(self, user_id: int, sign: str, birth_info: str) -> Optional[str]:
         """Generate birth chart analysis."""
-        if not self._check_rate_limit(user_id):
-            return "Rate limit exceeded. Please try again later."
-        
         prompt = f"""You are an expert astrologer. Create a detailed birth chart analysis for {sign} sign.
 
 Birth Information: {birth_info}
@@ -342,14 +407,7 @@ Include:
 
 Make it comprehensive, personalized, and inspiring. Write in a warm, supportive tone."""
 
-        # Try DeepSeek first
-        result = await self._make_deepseek_request(prompt)
-        if result:
-            return result
-        
-        # Fallback to Gemini
-        result = await self._make_gemini_request(prompt)
-        return result
+        return await self.generate_with_fallback(user_id, prompt, reading_type='birth_chart')
 
 
 # Global AI service instance
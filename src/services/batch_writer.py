@@ -0,0 +1,257 @@
+"""
+Batch writer for the Fal Gram Bot.
+Buffers rows in memory and bulk-inserts them from a background task so
+callers never wait on a database round-trip.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics, OUTBOUND_QUEUE_DEPTH
+
+logger = get_logger("batch_writer")
+
+BATCH_ITEMS = metrics.counter(
+    "falgram_batch_writer_items_total", "Rows handled by batch writers", ["writer", "result"]
+)
+BATCH_FLUSH_SECONDS = metrics.histogram(
+    "falgram_batch_writer_flush_seconds", "Bulk insert latency", ["writer"]
+)
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class BatchWriter:
+    """Bounded in-memory queue drained by a background task in batches.
+
+    - `submit()` never blocks: when the queue is full the drop policy decides
+      whether the oldest queued row or the new row is discarded (counted as
+      `dropped`). The first submit on a running loop starts the flush task if
+      `start()` was not called; after `stop()` rows stay queued until the next
+      `start()`.
+    - Batches are written with `flush_fn` (a synchronous bulk insert) in a
+      worker thread.
+    - When a flush fails the batch is appended to a JSONL spill file (and so
+      are further batches for an exponential back-off period); spilled rows
+      are replayed after the next successful flush. Rows being replayed sit
+      in a `.replay` file until they are written, so a crash mid-replay
+      leaves them for the next replay rather than losing them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[List[Dict[str, Any]]], None],
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        spill_path: Optional[str] = None,
+        spill_max_bytes: int = 50 * 1024 * 1024,
+        drop_policy: str = DROP_OLDEST,
+    ):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self.drop_policy = drop_policy
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Back off after a failed flush: batches go straight to the spill file
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self.stats: Dict[str, int] = {
+            'submitted': 0,
+            'written': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'lost': 0,
+        }
+
+    @property
+    def depth(self) -> int:
+        """Rows waiting to be written."""
+        return len(self._queue)
+
+    def _count(self, result: str, amount: int = 1) -> None:
+        self.stats[result] += amount
+        BATCH_ITEMS.inc(amount, writer=self.name, result=result)
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """Queue a row for writing. Returns False if the row was dropped."""
+        if len(self._queue) >= self.max_queue:
+            self._count('dropped')
+            if self.drop_policy == DROP_NEWEST:
+                return False
+            self._queue.popleft()
+        self._queue.append(row)
+        self._count('submitted')
+        if (self._task is None or self._task.done()) and not self._closing:
+            self._start_on_running_loop()
+        if self._wakeup is not None and len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _start_on_running_loop(self) -> None:
+        """Start lazily when a row arrives on a loop (entry points that never call start())."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.start()
+
+    def start(self) -> None:
+        """Start the background flush task on the running loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=f"batch-writer-{self.name}")
+        OUTBOUND_QUEUE_DEPTH.set_function(lambda: self.depth, queue=self.name)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush what is queued (spilling on failure) and stop the task."""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+                logger.warning(f"{self.name}: flush on shutdown timed out, spilling {self.depth} row(s)")
+            self._task = None
+        if self._queue:
+            rows = list(self._queue)
+            self._queue.clear()
+            await asyncio.to_thread(self._spill, rows)
+        OUTBOUND_QUEUE_DEPTH.remove_function(queue=self.name)
+
+    async def _run(self) -> None:
+        while True:
+            if len(self._queue) < self.batch_size and not self._closing:
+                # Wait for a full batch or the flush interval, whichever comes first
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            if not self._queue:
+                if self._closing:
+                    return
+                continue
+
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if await self._flush(batch):
+                await self._replay_spill()
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write one batch; spill it if the database is unreachable."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if started < self._retry_at:
+            await asyncio.to_thread(self._spill, batch)
+            return False
+        try:
+            await asyncio.to_thread(self.flush_fn, batch)
+        except Exception as e:
+            self._backoff = min(max(self._backoff * 2, self.flush_interval), 60.0)
+            self._retry_at = loop.time() + self._backoff
+            logger.error(
+                f"{self.name}: bulk insert of {len(batch)} row(s) failed, "
+                f"spilling for {self._backoff:.1f}s: {e}"
+            )
+            await asyncio.to_thread(self._spill, batch)
+            return False
+        self._backoff = 0.0
+        BATCH_FLUSH_SECONDS.observe(loop.time() - started, writer=self.name)
+        self._count('written', len(batch))
+        return True
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        """Append rows to the JSONL spill file (runs in a worker thread)."""
+        if not self.spill_path:
+            self._count('lost', len(rows))
+            return
+        try:
+            if os.path.exists(self.spill_path) and os.path.getsize(self.spill_path) >= self.spill_max_bytes:
+                logger.error(f"{self.name}: spill file full, discarding {len(rows)} row(s)")
+                self._count('lost', len(rows))
+                return
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+            self._count('spilled', len(rows))
+        except OSError as e:
+            logger.error(f"{self.name}: could not spill {len(rows)} row(s): {e}")
+            self._count('lost', len(rows))
+
+    def _claimed_path(self) -> str:
+        return f"{self.spill_path}.replay"
+
+    def _take_spill(self) -> List[Dict[str, Any]]:
+        """Move the spill file behind any unfinished replay and return all rows to replay."""
+        if not self.spill_path:
+            return []
+        claimed = self._claimed_path()
+        if os.path.exists(self.spill_path):
+            if os.path.exists(claimed):
+                # A previous replay did not finish (crash): keep its rows and add the new ones
+                with open(self.spill_path, encoding='utf-8') as src, open(claimed, 'a', encoding='utf-8') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.spill_path)
+            else:
+                os.replace(self.spill_path, claimed)
+        if not os.path.exists(claimed):
+            return []
+        rows = []
+        with open(claimed, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    self._count('lost')
+        return rows
+
+    def _finish_replay(self) -> None:
+        try:
+            os.remove(self._claimed_path())
+        except FileNotFoundError:
+            pass
+
+    async def _replay_spill(self) -> None:
+        """Re-insert spilled rows once the database is reachable again."""
+        if not self.spill_path or not (os.path.exists(self.spill_path) or os.path.exists(self._claimed_path())):
+            return
+        rows = await asyncio.to_thread(self._take_spill)
+        if rows:
+            logger.info(f"{self.name}: replaying {len(rows)} spilled row(s)")
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                await asyncio.to_thread(self.flush_fn, batch)
+            except Exception as e:
+                logger.error(f"{self.name}: replay failed, re-spilling: {e}")
+                await asyncio.to_thread(self._spill, rows[start:])
+                await asyncio.to_thread(self._finish_replay)
+                return
+            self._count('replayed', len(batch))
+        await asyncio.to_thread(self._finish_replay)
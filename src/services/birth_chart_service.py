@@ -0,0 +1,94 @@
+"""
+Birth chart service for the Fal Gram Bot.
+Computes placements locally and asks the LLM only to narrate them.
+
+Charts are cached per user and birth data in memory; narrations are cached
+per user, chart, language and prompt version in a ReadingCache, so a
+repeated chart view needs neither the engine nor the LLM.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from src.services.ai_service import ai_service, NOT_GENERATED
+from src.services.database import db_service
+from src.services.reading_cache import ReadingCache
+from src.utils.astro_engine import BirthChart, compute_chart
+from src.utils.cache import TTLCache
+from src.utils.i18n import i18n
+from src.utils.logger import get_logger
+
+logger = get_logger("birth_chart_service")
+
+CHART_INSTRUCTIONS = (
+    "Computed placements (tropical zodiac, whole-sign houses). Use them exactly as given; "
+    "do not recalculate or invent other placements. Interpret them:"
+)
+
+
+class BirthChartService:
+    """Per-user chart computation and narration with two cache layers."""
+
+    def __init__(self):
+        self.charts = TTLCache("birth_charts", ttl=settings.BIRTH_CHART_CACHE_TTL, maxsize=4096)
+        self.readings = ReadingCache("birth_chart_readings") if settings.READING_CACHE_ENABLED else None
+
+    @staticmethod
+    def _birth_data(user_data: Dict[str, Any]) -> tuple:
+        return (
+            user_data.get('id'),
+            str(user_data.get('birth_date') or ''),
+            str(user_data.get('birth_time') or ''),
+            str(user_data.get('birth_place') or ''),
+        )
+
+    def chart(self, user_data: Dict[str, Any]) -> Optional[BirthChart]:
+        """Chart for a user's stored birth data (cached until the data changes)."""
+        key = self._birth_data(user_data)
+        chart = self.charts.get(key)
+        if chart is None:
+            chart = compute_chart(user_data.get('birth_date'), user_data.get('birth_time'), user_data.get('birth_place'))
+            if chart is not None:
+                self.charts.set(key, chart)
+        return chart
+
+    @staticmethod
+    def build_prompt(template: str, user_data: Dict[str, Any], user_name: str, chart: Optional[BirthChart]) -> str:
+        prompt = (
+            template
+            .replace('{username}', user_name)
+            .replace('{birth_date}', str(user_data.get('birth_date', ''))[:10])
+            .replace('{birth_time}', user_data.get('birth_time') or 'unknown')
+            .replace('{birth_place}', user_data.get('birth_place') or 'unknown')
+        )
+        if chart is None:
+            return prompt
+        placements = f"{CHART_INSTRUCTIONS}\n{chart.summary()}"
+        if '{chart}' in prompt:
+            return prompt.replace('{chart}', placements)
+        return f"{prompt}\n\n{placements}"
+
+    async def interpret(self, user_data: Dict[str, Any], language: str, user_name: str = '',
+                        user_id: int = 0) -> Optional[str]:
+        """Narrated birth chart, served from the cache when the same chart was already read."""
+        template = await db_service.get_prompt('birth_chart', language) or i18n.get_text("astrology.birth_chart_prompt", language)
+        chart = self.chart(user_data)
+        prompt = self.build_prompt(template, user_data, user_name, chart)
+
+        key = f"{user_data.get('id')}|{language}|{hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:16]}"
+        if self.readings is not None:
+            cached = await self.readings.get(key)
+            if cached:
+                return cached
+
+        interpretation = await ai_service.generate_with_fallback(
+            user_id, prompt, reading_type='birth_chart', language=language
+        )
+        if self.readings is not None and interpretation and interpretation not in NOT_GENERATED:
+            await self.readings.set(key, interpretation)
+        return interpretation
+
+
+# Global birth chart service instance
+birth_chart_service = BirthChartService()
@@ -0,0 +1,192 @@
+"""
+Astrology chatbot service for the Fal Gram Bot.
+Conversational mode on top of AIService's single-shot prompts.
+
+Each user has an in-memory session holding a running summary and the most
+recent turns. Sessions are seeded from `chatbot_history` (newest first,
+keyset-paginated) and kept in a TTL cache. The recent turns are trimmed to
+CHATBOT_HISTORY_TOKENS; turns that fall out are folded into the summary by a
+background LLM call, so the prompt stays about the same size however long
+the conversation gets. New turns are written through a batch writer.
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional
+
+from config.settings import settings
+from src.services.ai_service import ai_service, NOT_GENERATED
+from src.services.database import db_service
+from src.utils.cache import TTLCache
+from src.utils.i18n import i18n
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics, TOKEN_BUCKETS
+
+logger = get_logger("chatbot_service")
+
+CHATBOT_PROMPT_TOKENS = metrics.histogram(
+    "falgram_chatbot_prompt_tokens", "Estimated prompt size of chatbot requests", buckets=TOKEN_BUCKETS
+)
+CHATBOT_SUMMARIES = metrics.counter(
+    "falgram_chatbot_summaries_total", "Incremental chatbot history summaries", ["result"]
+)
+
+# Rough token estimate without a tokenizer; good enough for budgeting
+CHARS_PER_TOKEN = 4
+# Share of CHATBOT_HISTORY_TOKENS kept after a trim
+TRIM_TO = 0.5
+
+SUMMARY_INSTRUCTIONS = (
+    "Update the summary of an astrology chat with the new messages below. Keep the user's "
+    "zodiac details, questions and advice already given; drop small talk. Answer with the "
+    "updated summary only, at most {words} words, in the conversation's language."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+@dataclass
+class Turn:
+    question: str
+    response: str
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.question) + estimate_tokens(self.response)
+
+    def render(self) -> str:
+        return f"User: {self.question}\nAssistant: {self.response}"
+
+
+@dataclass
+class ChatSession:
+    user_id: int
+    language: str
+    turns: Deque[Turn] = field(default_factory=deque)
+    summary: str = ''
+    # Turns trimmed from the context and not yet folded into the summary
+    pending: List[Turn] = field(default_factory=list)
+    summarizing: Optional[asyncio.Task] = None
+
+    @property
+    def tokens(self) -> int:
+        return sum(turn.tokens for turn in self.turns)
+
+
+class ChatbotService:
+    """Token-budgeted chat sessions over chatbot_history."""
+
+    def __init__(self):
+        self.sessions = TTLCache("chatbot_sessions", ttl=settings.CHATBOT_SESSION_TTL, maxsize=4096)
+
+    async def _load(self, user_id: int, language: str) -> ChatSession:
+        """Seed a session with the newest turns that fit the budget."""
+        session = ChatSession(user_id, language)
+        budget = settings.CHATBOT_HISTORY_TOKENS
+        before_id = None
+        while True:
+            rows = await db_service.get_chatbot_history(user_id, before_id, settings.CHATBOT_HISTORY_PAGE_SIZE)
+            for row in rows:
+                turn = Turn(row.get('question') or '', row.get('response') or '')
+                if session.pending or (session.turns and session.tokens + turn.tokens > budget):
+                    # Over budget: summarise instead (pages further back are not loaded)
+                    session.pending.insert(0, turn)
+                else:
+                    session.turns.appendleft(turn)
+            if session.pending or len(rows) < settings.CHATBOT_HISTORY_PAGE_SIZE:
+                break
+            before_id = rows[-1]['id']
+        self._schedule_summary(session)
+        return session
+
+    async def session(self, user_id: int, language: str) -> ChatSession:
+        session = self.sessions.get(user_id)
+        if session is None:
+            session = await self._load(user_id, language)
+        session.language = language
+        # Re-set on every use so the TTL counts from the last message
+        self.sessions.set(user_id, session)
+        return session
+
+    def end_session(self, user_id: int) -> None:
+        session = self.sessions.get(user_id)
+        if session is not None and session.summarizing is not None:
+            session.summarizing.cancel()
+        self.sessions.invalidate(user_id)
+
+    # Context window
+
+    def _trim(self, session: ChatSession) -> None:
+        """Over budget: move the oldest turns out until TRIM_TO of the budget is left."""
+        if session.tokens <= settings.CHATBOT_HISTORY_TOKENS:
+            return
+        # Trimming below the budget batches several turns into each summary call
+        target = settings.CHATBOT_HISTORY_TOKENS * TRIM_TO
+        while len(session.turns) > 1 and session.tokens > target:
+            session.pending.append(session.turns.popleft())
+        self._schedule_summary(session)
+
+    def _schedule_summary(self, session: ChatSession) -> None:
+        if session.pending and (session.summarizing is None or session.summarizing.done()):
+            session.summarizing = asyncio.get_running_loop().create_task(self._summarize(session))
+
+    async def _summarize(self, session: ChatSession) -> None:
+        """Fold the pending turns into the summary (one LLM call, off the reply path)."""
+        folded = list(session.pending)
+        words = settings.CHATBOT_SUMMARY_TOKENS * 3 // 4
+        parts = [SUMMARY_INSTRUCTIONS.format(words=words)]
+        if session.summary:
+            parts.append(f"Current summary:\n{session.summary}")
+        parts.append("New messages:\n" + "\n".join(turn.render() for turn in folded))
+        try:
+            summary = await ai_service.generate_with_fallback(
+                session.user_id, "\n\n".join(parts), reading_type='chatbot_summary', language=session.language
+            )
+        except Exception as e:
+            logger.error(f"Chatbot summary for user {session.user_id} failed: {e}")
+            summary = None
+        if not summary or summary in NOT_GENERATED:
+            # Keep the turns pending; the next trim retries
+            CHATBOT_SUMMARIES.inc(result="failed")
+            return
+        session.summary = summary.strip()[:settings.CHATBOT_SUMMARY_TOKENS * CHARS_PER_TOKEN]
+        del session.pending[:len(folded)]
+        CHATBOT_SUMMARIES.inc(result="ok")
+
+    async def system_prompt(self, language: str, user_name: str) -> str:
+        template = await db_service.get_prompt('astro_chatbot', language)
+        template = template or i18n.get_text("astro_chatbot.system_prompt", language)
+        return template.replace('{username}', user_name)
+
+    @staticmethod
+    def build_prompt(system: str, session: ChatSession, question: str) -> str:
+        parts = [system]
+        if session.summary:
+            parts.append(f"Summary of the earlier conversation:\n{session.summary}")
+        if session.turns:
+            parts.append("Recent messages:\n" + "\n".join(turn.render() for turn in session.turns))
+        parts.append(f"User: {question}\nAssistant:")
+        return "\n\n".join(parts)
+
+    async def ask(self, user_id: int, language: str, question: str, user_name: str = '') -> Optional[str]:
+        """Answer one chat message with the session's summary and recent turns as context."""
+        session = await self.session(user_id, language)
+        prompt = self.build_prompt(await self.system_prompt(language, user_name), session, question)
+        CHATBOT_PROMPT_TOKENS.observe(estimate_tokens(prompt))
+
+        response = await ai_service.generate_with_fallback(
+            user_id, prompt, reading_type='astro_chatbot', language=language
+        )
+        if not response or response in NOT_GENERATED:
+            return response
+        session.turns.append(Turn(question, response))
+        self._trim(session)
+        await db_service.add_chatbot_turn(user_id, question, response)
+        return response
+
+
+# Global chatbot service instance
+chatbot_service = ChatbotService()
@@ -0,0 +1,160 @@
+"""
+Compatibility service for the Fal Gram Bot.
+Zodiac pair analyses served from a symmetric, per-language cache.
+
+There are only 78 unordered sign pairs (12 * 13 / 2), so every analysis is
+generated once per language and prompt version and then reused: pairs are
+normalised to zodiac order, so Leo/Aries and Aries/Leo share an entry.
+A rule-based score matrix provides `user_connections.compatibility_score`
+without any LLM call.
+"""
+
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.settings import settings
+from src.services.ai_service import ai_service, NOT_GENERATED
+from src.services.database import db_service
+from src.services.reading_cache import ReadingCache
+from src.utils.helpers import get_zodiac_sign
+from src.utils.i18n import i18n
+from src.utils.logger import get_logger
+
+logger = get_logger("compatibility_service")
+
+ZODIAC_SIGNS: Tuple[str, ...] = (
+    "aries", "taurus", "gemini", "cancer", "leo", "virgo",
+    "libra", "scorpio", "sagittarius", "capricorn", "aquarius", "pisces",
+)
+SIGN_INDEX: Dict[str, int] = {sign: i for i, sign in enumerate(ZODIAC_SIGNS)}
+
+# Score by the aspect the two signs form (distance around the zodiac, 0..6):
+# conjunction, semi-sextile, sextile, square, trine, quincunx, opposition
+ASPECT_SCORES: Tuple[int, ...] = (80, 55, 82, 45, 95, 50, 68)
+
+
+def normalize_pair(sign1: str, sign2: str) -> Tuple[str, str]:
+    """Order a pair by zodiac position so the cache is symmetric."""
+    a, b = SIGN_INDEX[sign1], SIGN_INDEX[sign2]
+    return (sign1, sign2) if a <= b else (sign2, sign1)
+
+
+def all_pairs() -> List[Tuple[str, str]]:
+    """The 78 unordered sign pairs, including same-sign pairs."""
+    return [(a, b) for i, a in enumerate(ZODIAC_SIGNS) for b in ZODIAC_SIGNS[i:]]
+
+
+def _build_score_matrix() -> Tuple[Tuple[int, ...], ...]:
+    rows = []
+    for i in range(12):
+        row = []
+        for j in range(12):
+            row.append(ASPECT_SCORES[min((i - j) % 12, (j - i) % 12)])
+        rows.append(tuple(row))
+    return tuple(rows)
+
+
+SCORE_MATRIX = _build_score_matrix()
+
+
+def compatibility_score(sign1: str, sign2: str) -> int:
+    """Rule-based 0-100 compatibility score (symmetric, no LLM)."""
+    return SCORE_MATRIX[SIGN_INDEX[sign1]][SIGN_INDEX[sign2]]
+
+
+class CompatibilityService:
+    """Symmetric pair analyses: memory LRU + SQLite, filled on demand or in bulk."""
+
+    def __init__(self):
+        self.readings = ReadingCache("compatibility_readings") if settings.READING_CACHE_ENABLED else None
+
+    async def prompt_template(self, language: str) -> str:
+        template = await db_service.get_prompt('compatibility', language)
+        return template or i18n.get_text("astrology.compatibility_prompt", language)
+
+    @staticmethod
+    def build_prompt(template: str, sign1: str, sign2: str) -> str:
+        # Cached analyses are shared by everyone, so the prompt is not personalised
+        return template.replace('{sign1}', sign1).replace('{sign2}', sign2).replace('{username}', '')
+
+    @staticmethod
+    def cache_key(sign1: str, sign2: str, language: str, template: str) -> str:
+        version = hashlib.sha1(template.encode('utf-8')).hexdigest()[:10]
+        return f"{sign1}:{sign2}|{language}|{version}"
+
+    async def analysis(self, sign1: str, sign2: str, language: str, user_id: int = 0) -> Optional[str]:
+        """Compatibility analysis for a pair, generated only on a cache miss."""
+        sign1, sign2 = normalize_pair(sign1, sign2)
+        template = await self.prompt_template(language)
+        key = self.cache_key(sign1, sign2, language, template)
+        if self.readings is not None:
+            cached = await self.readings.get(key)
+            if cached:
+                return cached
+
+        analysis = await ai_service.generate_with_fallback(
+            user_id, self.build_prompt(template, sign1, sign2), reading_type='compatibility', language=language
+        )
+        if self.readings is not None and analysis and analysis not in NOT_GENERATED:
+            await self.readings.set(key, analysis)
+        return analysis
+
+    async def missing_pairs(self, languages: Iterable[str]) -> List[Tuple[str, str, str]]:
+        """(sign1, sign2, language) combinations not yet in the persistent cache."""
+        if self.readings is None:
+            return []
+        cached = set(await self.readings.keys())
+        missing = []
+        for language in languages:
+            template = await self.prompt_template(language)
+            for sign1, sign2 in all_pairs():
+                if self.cache_key(sign1, sign2, language, template) not in cached:
+                    missing.append((sign1, sign2, language))
+        return missing
+
+    async def fill(self, languages: Iterable[str], concurrency: int = 4, limit: int = 0) -> Dict[str, int]:
+        """Generate every missing pair analysis with at most `concurrency` LLM calls in flight."""
+        pending = await self.missing_pairs(languages)
+        if limit:
+            pending = pending[:limit]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        counts = {'ok': 0, 'failed': 0}
+
+        async def one(sign1: str, sign2: str, language: str) -> None:
+            async with semaphore:
+                result = await self.analysis(sign1, sign2, language)
+            counts['ok' if result and result not in NOT_GENERATED else 'failed'] += 1
+
+        await asyncio.gather(*(one(*item) for item in pending))
+        return counts
+
+    async def score_connections(self, batch_size: int = 500) -> int:
+        """Fill missing user_connections.compatibility_score values from birth dates."""
+        updated = 0
+        after_id = 0
+        while True:
+            connections = await db_service.get_unscored_connections(after_id, batch_size)
+            if not connections:
+                return updated
+            after_id = connections[-1]['id']
+
+            user_ids = {c['user_id'] for c in connections} | {c['friend_user_id'] for c in connections}
+            signs = {}
+            for user_id, birth_date in (await db_service.get_birth_dates(list(user_ids))).items():
+                try:
+                    signs[user_id] = get_zodiac_sign(datetime.fromisoformat(str(birth_date)[:10]))
+                except ValueError:
+                    continue
+
+            scores = {
+                c['id']: compatibility_score(signs[c['user_id']], signs[c['friend_user_id']])
+                for c in connections
+                if c['user_id'] in signs and c['friend_user_id'] in signs
+            }
+            updated += await db_service.update_connection_scores(scores)
+
+
+# Global compatibility service instance
+compatibility_service = CompatibilityService()
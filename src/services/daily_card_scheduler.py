@@ -0,0 +1,303 @@
+"""
+Daily card scheduler for the Fal Gram Bot.
+Delivers the tarot "card of the day" at each subscriber's chosen local time.
+
+Subscribers are loaded once and grouped by (time zone, local minute). Each
+group sits in a two-level timer wheel over the UTC day (24 hour slots of
+60 minute slots), so the scheduler sleeps until the next non-empty minute
+instead of scanning users. Subscription changes are applied to the wheel
+incrementally; groups are re-slotted at UTC midnight so DST shifts apply.
+"""
+
+import asyncio
+import random
+from datetime import date as date_cls, datetime, time as time_cls, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from config.settings import settings
+from src.services.database import db_service
+from src.services.tarot_service import tarot_service
+from src.services.throttled_sender import throttled_sender, ThrottledSender
+from src.utils.i18n import i18n
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+    ZoneInfoNotFoundError = KeyError
+
+logger = get_logger("daily_card_scheduler")
+
+DAILY_CARDS = metrics.counter(
+    "falgram_daily_cards_total", "Daily card deliveries", ["result"]
+)
+DAILY_CARD_SUBSCRIBERS = metrics.gauge(
+    "falgram_daily_card_subscribers", "Users in the daily card timer wheel"
+)
+
+MINUTES_PER_DAY = 24 * 60
+
+Group = Tuple[str, int]  # (IANA time zone, local minute of day)
+
+
+class Subscriber(NamedTuple):
+    user_id: int
+    language: str
+    group: Group
+
+
+class TimerWheel:
+    """Two-level wheel over the minutes of a day holding sets of keys.
+
+    Hour slots only hold the minutes that have entries, so finding the next
+    due minute looks at no more than 24 hour slots plus one slot's minutes.
+    """
+
+    def __init__(self):
+        self._hours: List[Dict[int, Set[Group]]] = [{} for _ in range(24)]
+
+    def add(self, minute: int, key: Group) -> None:
+        self._hours[minute // 60].setdefault(minute % 60, set()).add(key)
+
+    def discard(self, minute: int, key: Group) -> None:
+        slot = self._hours[minute // 60]
+        keys = slot.get(minute % 60)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del slot[minute % 60]
+
+    def bucket(self, minute: int) -> Set[Group]:
+        return set(self._hours[minute // 60].get(minute % 60, ()))
+
+    def next_due(self, minute: int) -> Optional[int]:
+        """First non-empty minute >= `minute` (same day), or None."""
+        hour = minute // 60
+        for h in range(hour, 24):
+            slot = self._hours[h]
+            if not slot:
+                continue
+            floor = minute % 60 if h == hour else 0
+            due = [m for m in slot if m >= floor]
+            if due:
+                return h * 60 + min(due)
+        return None
+
+    def __len__(self) -> int:
+        return sum(len(keys) for slot in self._hours for keys in slot.values())
+
+
+def _parse_minute(value: Optional[str]) -> int:
+    try:
+        hour, minute = str(value or settings.DAILY_CARD_DEFAULT_TIME).split(':')[:2]
+        return (int(hour) % 24) * 60 + int(minute) % 60
+    except (TypeError, ValueError):
+        hour, minute = settings.DAILY_CARD_DEFAULT_TIME.split(':')
+        return int(hour) * 60 + int(minute)
+
+
+def _zone(name: Optional[str]):
+    if ZoneInfo is None:
+        return timezone.utc
+    try:
+        return ZoneInfo(name or settings.DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(settings.DEFAULT_TIMEZONE)
+
+
+class DailyCardScheduler:
+    """Timer-wheel scheduler fanning daily cards out through a ThrottledSender."""
+
+    def __init__(self, sender: ThrottledSender = throttled_sender):
+        self.sender = sender
+        self.wheel = TimerWheel()
+        self._groups: Dict[Group, Set[int]] = {}
+        self._group_minute: Dict[Group, int] = {}
+        self._subscribers: Dict[int, Subscriber] = {}
+        self._day: Optional[date_cls] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._rng = random.Random()
+
+    # Wheel maintenance
+
+    def _utc_minute(self, group: Group, day: date_cls) -> int:
+        tz_name, local_minute = group
+        local = datetime.combine(day, time_cls(local_minute // 60, local_minute % 60), tzinfo=_zone(tz_name))
+        moment = local.astimezone(timezone.utc)
+        return moment.hour * 60 + moment.minute
+
+    def _add(self, subscriber: Subscriber) -> None:
+        members = self._groups.get(subscriber.group)
+        if members is None:
+            members = self._groups[subscriber.group] = set()
+            minute = self._utc_minute(subscriber.group, self._day or datetime.now(timezone.utc).date())
+            self._group_minute[subscriber.group] = minute
+            self.wheel.add(minute, subscriber.group)
+        members.add(subscriber.user_id)
+        self._subscribers[subscriber.user_id] = subscriber
+
+    def _remove(self, user_id: int) -> None:
+        subscriber = self._subscribers.pop(user_id, None)
+        if subscriber is None:
+            return
+        members = self._groups.get(subscriber.group)
+        if members is not None:
+            members.discard(user_id)
+            if not members:
+                del self._groups[subscriber.group]
+                self.wheel.discard(self._group_minute.pop(subscriber.group), subscriber.group)
+
+    def _reslot(self, day: date_cls) -> None:
+        """Recompute UTC minutes for a new day (only groups whose offset changed move)."""
+        self._day = day
+        for group, old in list(self._group_minute.items()):
+            new = self._utc_minute(group, day)
+            if new != old:
+                self.wheel.discard(old, group)
+                self.wheel.add(new, group)
+                self._group_minute[group] = new
+
+    def subscribe(self, user_id: int, daily_time: Optional[str] = None, tz_name: Optional[str] = None,
+                  language: Optional[str] = None) -> None:
+        """Add or move one subscriber without touching anyone else."""
+        previous = self._subscribers.get(user_id)
+        group = (tz_name or (previous.group[0] if previous else settings.DEFAULT_TIMEZONE),
+                 _parse_minute(daily_time) if daily_time else (previous.group[1] if previous else _parse_minute(None)))
+        language = language or (previous.language if previous else settings.DEFAULT_LANGUAGE)
+        self._remove(user_id)
+        self._add(Subscriber(user_id, language, group))
+        DAILY_CARD_SUBSCRIBERS.set(len(self._subscribers))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def unsubscribe(self, user_id: int) -> None:
+        self._remove(user_id)
+        DAILY_CARD_SUBSCRIBERS.set(len(self._subscribers))
+
+    def on_user_updated(self, user_id: int, updates: Dict) -> None:
+        """DatabaseService listener: apply subscription changes incrementally."""
+        if updates.get('daily_card_subscribed') is False:
+            self.unsubscribe(user_id)
+        elif updates.get('daily_card_subscribed') or (
+                user_id in self._subscribers and {'daily_card_time', 'timezone', 'language'} & updates.keys()):
+            self.subscribe(user_id, updates.get('daily_card_time'), updates.get('timezone'), updates.get('language'))
+
+    async def on_blocked(self, user_id: int) -> None:
+        """ThrottledSender listener: drop users who blocked the bot."""
+        if user_id in self._subscribers:
+            self.unsubscribe(user_id)
+            await db_service.update_user(user_id, {'daily_card_subscribed': False})
+
+    async def load(self) -> int:
+        """Load every subscriber once (keyset-paginated)."""
+        self._day = datetime.now(timezone.utc).date()
+        after_id = 0
+        while True:
+            rows = await db_service.get_daily_card_subscribers(after_id, settings.DAILY_CARD_LOAD_PAGE_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                self._add(Subscriber(
+                    row['id'],
+                    row.get('language') or settings.DEFAULT_LANGUAGE,
+                    (row.get('timezone') or settings.DEFAULT_TIMEZONE, _parse_minute(row.get('daily_card_time'))),
+                ))
+            after_id = rows[-1]['id']
+        DAILY_CARD_SUBSCRIBERS.set(len(self._subscribers))
+        logger.info(f"Daily cards: {len(self._subscribers)} subscriber(s) in {len(self._groups)} slot group(s)")
+        return len(self._subscribers)
+
+    # Delivery
+
+    async def _messages(self, user_ids: List[Tuple[int, str]]) -> List[Tuple[int, str, dict]]:
+        """One freshly drawn card per user; interpretations only come from the reading cache."""
+        templates: Dict[str, str] = {}
+        messages = []
+        for user_id, language in user_ids:
+            spread = tarot_service.draw('single', rng=self._rng)
+            table = tarot_service.table(language)
+            card = tarot_service.resolve(spread, language)[0]
+            text = i18n.get_text("daily_card_message", language).format(
+                card=table.display_name(card), meaning=card.meaning
+            )
+            if tarot_service.readings is not None:
+                if language not in templates:
+                    templates[language] = await tarot_service.prompt_template(language)
+                cached = await tarot_service.readings.get(tarot_service.cache_key(spread, language, templates[language]))
+                if cached:
+                    text += f"\n\n{cached}"
+            messages.append((user_id, text, {}))
+        return messages
+
+    async def deliver(self, minute: int) -> Dict[str, int]:
+        """Send the cards of every group due at this UTC minute."""
+        recipients = [
+            (user_id, self._subscribers[user_id].language)
+            for group in self.wheel.bucket(minute)
+            for user_id in list(self._groups.get(group, ()))
+            if user_id in self._subscribers
+        ]
+        if not recipients:
+            return {}
+        counts = await self.sender.send_many(await self._messages(recipients))
+        for result, count in counts.items():
+            DAILY_CARDS.inc(count, result=result)
+        logger.info(f"Daily cards at {minute // 60:02d}:{minute % 60:02d} UTC: {counts}")
+        return counts
+
+    async def _run(self) -> None:
+        await self.load()
+        next_minute = None
+        while True:
+            now = datetime.now(timezone.utc)
+            if now.date() != self._day:
+                self._reslot(now.date())
+                next_minute = 0
+            current = now.hour * 60 + now.minute
+            if next_minute is None:
+                # Start with the next minute so a restart never re-sends the current one
+                next_minute = current + 1
+            if next_minute <= current:
+                # Fire everything due since the last wake-up (covers short stalls)
+                for minute in range(next_minute, current + 1):
+                    if self.wheel.bucket(minute):
+                        try:
+                            await self.deliver(minute)
+                        except Exception as e:
+                            logger.error(f"Daily card delivery at minute {minute} failed: {e}")
+                next_minute = current + 1
+
+            due = self.wheel.next_due(next_minute) if next_minute < MINUTES_PER_DAY else None
+            day_start = datetime.combine(self._day, time_cls(), tzinfo=timezone.utc)
+            target = day_start + timedelta(minutes=due if due is not None else MINUTES_PER_DAY)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, (target - datetime.now(timezone.utc)).total_seconds()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Load subscribers and start the scheduler on the running loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        db_service.add_user_update_listener(self.on_user_updated)
+        self.sender.add_blocked_listener(self.on_blocked)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="daily-card-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        db_service.remove_user_update_listener(self.on_user_updated)
+
+
+# Global daily card scheduler instance
+daily_card_scheduler = DailyCardScheduler()
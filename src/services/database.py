@@ -4,10 +4,14 @@ Handles all database operations using Supabase.
 """
 
 import os
-from typing import Dict, Any, List, Optional
+import time
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from config.settings import settings
 from src.utils.logger import logger
+from src.utils.metrics import metrics
+from src.services.batch_writer import BatchWriter
+from src.utils.cache import TTLCache
 
 # Optional supabase import
 try:
@@ -18,12 +22,128 @@ except ImportError:
     print("⚠️ Supabase not available - database features will be limited")
 
 
+SUPABASE_LATENCY = metrics.histogram(
+    "falgram_supabase_request_seconds", "Supabase request latency", ["table", "operation"]
+)
+SUPABASE_ERRORS = metrics.counter(
+    "falgram_supabase_errors_total", "Failed Supabase requests", ["table", "operation"]
+)
+
+_QUERY_OPERATIONS = ('select', 'insert', 'update', 'upsert', 'delete')
+
+
+class _TimedQuery:
+    """Wraps a postgrest request builder and times its execute() call."""
+
+    __slots__ = ('_builder', '_table', '_operation')
+
+    def __init__(self, builder: Any, table: str, operation: Optional[str] = None):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if name == 'execute':
+            return self._timed_execute(attr)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not hasattr(result, 'execute'):
+                return result
+            operation = self._operation or (name if name in _QUERY_OPERATIONS else None)
+            return _TimedQuery(result, self._table, operation)
+        return chained
+
+    def _timed_execute(self, execute):
+        def run(*args, **kwargs):
+            operation = self._operation or 'select'
+            started = time.perf_counter()
+            try:
+                return execute(*args, **kwargs)
+            except Exception:
+                SUPABASE_ERRORS.inc(table=self._table, operation=operation)
+                raise
+            finally:
+                SUPABASE_LATENCY.observe(time.perf_counter() - started, table=self._table, operation=operation)
+        return run
+
+
+class _InstrumentedClient:
+    """Supabase client proxy recording latency per table and operation."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def table(self, name: str) -> _TimedQuery:
+        return _TimedQuery(self._client.table(name), name)
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None) -> _TimedQuery:
+        return _TimedQuery(self._client.rpc(fn, params or {}), f"rpc:{fn}", 'rpc')
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def premium_active(user: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+    """True unless the user's premium_expires_at is known and in the past (naive UTC)."""
+    exp = user.get('premium_expires_at')
+    if not exp:
+        return True
+    try:
+        dt = datetime.fromisoformat(str(exp).replace('Z', '+00:00'))
+        return dt > (now or datetime.utcnow())
+    except Exception:
+        return True
+
+
+def readings_today(user: Dict[str, Any], today: Optional[str] = None) -> int:
+    """daily_readings_used if it was counted today, else 0 (the counter resets by date stamp).
+
+    Rows without daily_usage_date (before sql/add_daily_usage_date.sql) fall back to last_activity.
+    """
+    stamp = user.get('daily_usage_date') or user.get('last_activity')
+    if not stamp or str(stamp)[:10] != (today or datetime.now().date().isoformat()):
+        return 0
+    return user.get('daily_readings_used', 0) or 0
+
+
 class DatabaseService:
     """Database service for Supabase operations."""
     
     def __init__(self):
         self.supabase: Client = None
+        # SQL functions found missing (migration not applied); use the fallbacks
+        self._missing_rpcs: set = set()
+        self._profile_columns_missing = False
+        self._usage_charges_missing = False
+        # Operation ids already charged (fast path; usage_charges is authoritative)
+        self._charged_operations = TTLCache("usage_charges", ttl=3600, maxsize=10000)
+        self._payment_stats_cache = TTLCache("payment_stats", ttl=settings.PAYMENT_STATS_CACHE_TTL, maxsize=1)
+        # Callbacks run after a successful update_user (e.g. schedulers keeping in-memory state)
+        self._user_update_listeners: List[Callable[[int, Dict[str, Any]], None]] = []
         self._initialize_client()
+        # Logs are written in batches from a background task (see add_log)
+        self.log_writer = BatchWriter(
+            "logs",
+            self._insert_logs,
+            max_queue=settings.LOG_SINK_QUEUE_SIZE,
+            batch_size=settings.LOG_SINK_BATCH_SIZE,
+            flush_interval=settings.LOG_SINK_FLUSH_INTERVAL,
+            spill_path=settings.LOG_SINK_SPILL_PATH,
+            drop_policy=settings.LOG_SINK_DROP_POLICY,
+        )
+        # Chatbot turns are written the same way (see add_chatbot_turn)
+        self.chat_writer = BatchWriter(
+            "chatbot_history",
+            self._insert_chatbot_history,
+            max_queue=settings.LOG_SINK_QUEUE_SIZE,
+            batch_size=settings.LOG_SINK_BATCH_SIZE,
+            flush_interval=settings.LOG_SINK_FLUSH_INTERVAL,
+            spill_path=settings.CHATBOT_HISTORY_SPILL_PATH,
+        )
     
     def _initialize_client(self) -> None:
         """Initialize Supabase client."""
@@ -36,7 +156,7 @@ class DatabaseService:
                 logger.warning("Supabase credentials not configured")
                 return
             
-            self.supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+            self.supabase = _InstrumentedClient(create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY))
             logger.info("✅ Supabase client initialized successfully")
         except Exception as e:
             logger.error(f"❌ Error initializing Supabase client: {e}")
@@ -45,6 +165,32 @@ class DatabaseService:
         """Check if database is connected."""
         return self.supabase is not None
     
+    async def initialize(self) -> bool:
+        """Start background writers (requires a running event loop)."""
+        if self.is_connected():
+            self.log_writer.start()
+            self.chat_writer.start()
+        return self.is_connected()
+    
+    async def close(self) -> None:
+        """Flush queued writes before shutdown."""
+        await self.log_writer.stop()
+        await self.chat_writer.stop()
+    
+    def _call_rpc(self, fn: str, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Call a SQL function; None if it is not installed or the call failed."""
+        if fn in self._missing_rpcs:
+            return None
+        try:
+            return self.supabase.rpc(fn, params or {}).execute().data or []
+        except Exception as e:
+            if 'does not exist' in str(e) or 'PGRST202' in str(e):
+                logger.warning(f"SQL function {fn} not found, using client-side fallback (apply the sql/ migrations)")
+                self._missing_rpcs.add(fn)
+            else:
+                logger.error(f"Error calling {fn}: {e}")
+            return None
+    
     # User operations
     async def create_user(self, user_data: Dict[str, Any]) -> bool:
         """Create a new user. Be tolerant to schema differences."""
@@ -109,6 +255,7 @@ class DatabaseService:
             try:
                 response = self.supabase.table('users').update(enriched_updates).eq(key, user_id).execute()
                 if len(response.data) > 0:
+                    self._notify_user_updated(user_id, updates)
                     return True
             except Exception as e:
                 last_err = e
@@ -117,7 +264,7 @@ class DatabaseService:
         try:
             sanitized = dict(enriched_updates)
             for optional_key in (
-                'last_activity', 'total_readings', 'daily_readings_used', 'updated_at',
+                'last_activity', 'total_readings', 'daily_readings_used', 'daily_usage_date', 'updated_at',
                 'premium_expires_at', 'premium_plan', 'referral_code', 'premium_purchased_at'
             ):
                 sanitized.pop(optional_key, None)
@@ -125,6 +272,7 @@ class DatabaseService:
                 try:
                     response = self.supabase.table('users').update(sanitized).eq(key, user_id).execute()
                     if len(response.data) > 0:
+                        self._notify_user_updated(user_id, sanitized)
                         return True
                 except Exception:
                     continue
@@ -133,6 +281,42 @@ class DatabaseService:
         logger.error(f"Error updating user {user_id}: {str(last_err) if 'last_err' in locals() else 'unknown'}")
         return False
     
+    def add_user_update_listener(self, listener: Callable[[int, Dict[str, Any]], None]) -> None:
+        """Register a callback invoked with (user_id, updates) after update_user succeeds."""
+        if listener not in self._user_update_listeners:
+            self._user_update_listeners.append(listener)
+
+    def remove_user_update_listener(self, listener: Callable[[int, Dict[str, Any]], None]) -> None:
+        if listener in self._user_update_listeners:
+            self._user_update_listeners.remove(listener)
+
+    def _notify_user_updated(self, user_id: int, updates: Dict[str, Any]) -> None:
+        for listener in list(self._user_update_listeners):
+            try:
+                listener(user_id, updates)
+            except Exception as e:
+                logger.error(f"User update listener failed: {e}")
+
+    async def get_daily_card_subscribers(self, after_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Daily card subscribers (id, language, daily_card_time, timezone), keyset-paginated by id."""
+        try:
+            if not self.is_connected():
+                return []
+
+            response = (
+                self.supabase.table('users')
+                .select('id, language, daily_card_time, timezone')
+                .eq('daily_card_subscribed', True)
+                .gt('id', after_id)
+                .order('id')
+                .limit(limit)
+                .execute()
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error getting daily card subscribers: {e}")
+            return []
+
     async def get_all_users(self) -> List[Dict[str, Any]]:
         """Get all users."""
         try:
@@ -162,19 +346,7 @@ class DatabaseService:
                 users = response.data or []
                 # Filter locally by expiry if available
                 now = datetime.utcnow()
-                active: List[Dict[str, Any]] = []
-                for u in users:
-                    exp = u.get('premium_expires_at')
-                    if not exp:
-                        active.append(u)
-                        continue
-                    try:
-                        dt = datetime.fromisoformat(str(exp).replace('Z', '+00:00'))
-                        if dt > now:
-                            active.append(u)
-                    except Exception:
-                        active.append(u)
-                return active
+                return [u for u in users if premium_active(u, now)]
             except Exception:
                 # Fallback: any user marked is_premium
                 response2 = self.supabase.table('users').select('*').eq('is_premium', True).execute()
@@ -183,60 +355,139 @@ class DatabaseService:
             logger.error(f"Error getting premium users: {e}")
             return []
 
+    async def get_premium_users_page(self, after_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Users on a non-free plan (id, language, birth_date, expiry), keyset-paginated by id.
+
+        Expired plans are included so callers can keep paginating; filter with premium_active().
+        """
+        try:
+            if not self.is_connected():
+                return []
+
+            response = (
+                self.supabase.table('users')
+                .select('id, language, birth_date, premium_plan, premium_expires_at')
+                .neq('premium_plan', 'free')
+                .gt('id', after_id)
+                .order('id')
+                .limit(limit)
+                .execute()
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error getting premium users page: {e}")
+            return []
+
     async def get_payment_statistics(self) -> Dict[str, int]:
-        """Aggregate payment stats from payment_transactions if available."""
-        result = {'total_revenue': 0, 'revenue_today': 0, 'revenue_month': 0}
+        """Total, today and month revenue of completed payment_transactions.
+
+        One RPC over the daily revenue rollup, cached for PAYMENT_STATS_CACHE_TTL.
+        Transactions are written by SQL functions, not by the bot, so the cache
+        is not invalidated on writes; new payments show up within the TTL.
+        A failed load returns zeros without caching them, so the next call retries.
+        """
         if not self.is_connected():
-            return result
+            return {'total_revenue': 0, 'revenue_today': 0, 'revenue_month': 0}
         try:
-            # Fetch recent payments to aggregate locally
-            resp = (
+            stats = await self._payment_stats_cache.get_or_load('all', self._load_payment_statistics)
+        except Exception as e:
+            logger.error(f"Error aggregating payment statistics: {e}")
+            return {'total_revenue': 0, 'revenue_today': 0, 'revenue_month': 0}
+        return dict(stats)
+    
+    async def _load_payment_statistics(self) -> Dict[str, int]:
+        rows = self._call_rpc('payment_revenue_stats')
+        if rows:
+            row = rows[0]
+            return {
+                'total_revenue': int(row.get('total_revenue') or 0),
+                'revenue_today': int(row.get('revenue_today') or 0),
+                'revenue_month': int(row.get('revenue_month') or 0),
+            }
+        return self._scan_payment_statistics()
+    
+    def _scan_payment_statistics(self, page_size: int = 1000) -> Dict[str, int]:
+        """Client-side fallback: page through every completed payment (no silent truncation).
+
+        Raises on a failed page so a partial sum is never reported or cached.
+        """
+        result = {'total_revenue': 0, 'revenue_today': 0, 'revenue_month': 0}
+        now = datetime.utcnow()
+        start_today = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+        start_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat()
+        offset = 0
+        while True:
+            rows = (
                 self.supabase
                 .table('payment_transactions')
-                .select('*')
+                .select('amount, created_at')
                 .eq('status', 'completed')
-                .order('created_at', desc=True)
-                .limit(1000)
+                .order('id')
+                .range(offset, offset + page_size - 1)
                 .execute()
-            )
-            rows = resp.data or []
-            now = datetime.utcnow()
-            start_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            start_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            ).data or []
             for r in rows:
                 amount = int(r.get('amount') or 0)
                 result['total_revenue'] += amount
-                ts = r.get('created_at')
-                try:
-                    dt = datetime.fromisoformat(str(ts).replace('Z', '+00:00'))
-                except Exception:
-                    dt = None
-                if dt:
-                    if dt >= start_today:
-                        result['revenue_today'] += amount
-                    if dt >= start_month:
-                        result['revenue_month'] += amount
-        except Exception as e:
-            logger.error(f"Error aggregating payment statistics: {e}")
+                # ISO-8601 timestamps compare correctly as strings
+                ts = str(r.get('created_at') or '')
+                if ts >= start_today:
+                    result['revenue_today'] += amount
+                if ts >= start_month:
+                    result['revenue_month'] += amount
+            if len(rows) < page_size:
+                break
+            offset += page_size
         return result
     
     # Usage tracking
-    async def increment_usage(self, user_id: int, usage_type: str = "reading") -> bool:
-        """Increment user usage count."""
+    async def _claim_usage_charge(self, user_id: int, usage_type: str, operation_id: str) -> bool:
+        """Record an operation's charge; False if it was charged already."""
+        if self._charged_operations.get(operation_id):
+            return False
+        self._charged_operations.set(operation_id, True)
+        if self._usage_charges_missing:
+            return True
+        try:
+            response = self.supabase.table('usage_charges').upsert(
+                {'operation_id': operation_id, 'user_id': user_id, 'usage_type': usage_type,
+                 'created_at': datetime.now().isoformat()},
+                on_conflict='operation_id',
+                ignore_duplicates=True,
+            ).execute()
+            # Ignored duplicates are not returned
+            return bool(response.data)
+        except Exception as e:
+            if 'does not exist' in str(e) or 'PGRST205' in str(e) or '42P01' in str(e):
+                logger.warning("usage_charges table missing, de-duplicating charges in memory (apply the sql/ migrations)")
+                self._usage_charges_missing = True
+            else:
+                logger.error(f"Error recording usage charge {operation_id}: {e}")
+            return True
+
+    async def increment_usage(self, user_id: int, usage_type: str = "reading",
+                              operation_id: Optional[str] = None) -> bool:
+        """Increment user usage count. With an operation id the charge is applied at most once."""
         try:
             if not self.is_connected():
                 return False
             
+            if operation_id and not await self._claim_usage_charge(user_id, usage_type, operation_id):
+                logger.info(f"Usage for operation {operation_id} already charged")
+                return True
+            
             # Get current usage
             user = await self.get_user(user_id)
             if not user:
                 return False
             
-            # Update usage
+            # Update usage; the daily count starts over on the first reading of a new day
+            now = datetime.now()
             updates = {
                 'total_readings': user.get('total_readings', 0) + 1,
-                'daily_readings_used': user.get('daily_readings_used', 0) + 1,
-                'last_activity': datetime.now().isoformat()
+                'daily_readings_used': readings_today(user, now.date().isoformat()) + 1,
+                'daily_usage_date': now.date().isoformat(),
+                'last_activity': now.isoformat()
             }
             
             return await self.update_user(user_id, updates)
@@ -245,7 +496,7 @@ class DatabaseService:
             return False
     
     async def reset_daily_usage(self) -> bool:
-        """Reset daily usage for all users."""
+        """Reset daily usage for all users (not needed for limits: readings_today() ignores past days)."""
         try:
             if not self.is_connected():
                 return False
@@ -381,9 +632,16 @@ class DatabaseService:
             return []
 
     async def get_referral_counts_by_day(self, days: int = 7) -> List[Dict[str, Any]]:
-        """Return counts of referrals per day for the last N days (client-side aggregation)."""
+        """Return counts of referrals per day for the last N days (from the daily rollup)."""
         if not self.is_connected():
             return []
+        rows = self._call_rpc('referral_counts_by_day', {'p_days': days})
+        if rows is not None:
+            return [{'date': str(r['day']), 'count': int(r['referrals'])} for r in rows]
+        return await self._scan_referral_counts_by_day(days)
+
+    async def _scan_referral_counts_by_day(self, days: int) -> List[Dict[str, Any]]:
+        """Client-side aggregation used until sql/add_referral_rollups.sql is applied."""
         try:
             since = datetime.utcnow() - timedelta(days=days)
             resp = (
@@ -416,6 +674,13 @@ class DatabaseService:
         """Return counts of referrals per calendar month for the last N months."""
         if not self.is_connected():
             return []
+        rows = self._call_rpc('referral_counts_by_month', {'p_months': months})
+        if rows is not None:
+            return [{'month': r['month'], 'count': int(r['referrals'])} for r in rows]
+        return await self._scan_referral_counts_by_month(months)
+
+    async def _scan_referral_counts_by_month(self, months: int) -> List[Dict[str, Any]]:
+        """Client-side aggregation used until sql/add_referral_rollups.sql is applied."""
         try:
             now = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
             # Approximate N months back by subtracting months*31 days, then filter client-side by month keys
@@ -458,8 +723,18 @@ class DatabaseService:
         }
         if not self.is_connected():
             return result
+        rows = self._call_rpc('revenue_per_referral', {'p_days': days})
+        if rows:
+            total_rev = int(rows[0].get('total_revenue') or 0)
+            total_refs = int(rows[0].get('total_referrals') or 0)
+            result.update({
+                'total_revenue': total_rev,
+                'total_referrals': total_refs,
+                'avg_revenue_per_referral': round(total_rev / total_refs, 2) if total_refs > 0 else 0.0,
+            })
+            return result
         try:
-            # Time window
+            # Fallback: client-side sums until the rollup migration is applied
             since_iso = None
             if days is not None:
                 since_iso = (datetime.utcnow() - timedelta(days=days)).isoformat()
@@ -493,11 +768,29 @@ class DatabaseService:
             logger.error(f"Error computing revenue per referral: {e}")
         return result
 
+    async def backfill_referral_rollups(self) -> Optional[Dict[str, int]]:
+        """Rebuild the referral/revenue rollup tables from the raw tables."""
+        if not self.is_connected():
+            return None
+        rows = self._call_rpc('backfill_referral_rollups')
+        return rows[0] if rows else None
+
     async def get_referral_summary(self, user_id: int) -> Dict[str, Any]:
         """Compute referral summary (this week, this month, last invite) for a user.
 
-        Falls back to zeros if table or fields are missing.
+        Uses the referral_summary() RPC (one aggregated row); falls back to
+        scanning the user's referrals, or zeros if table or fields are missing.
         """
+        if self.is_connected():
+            rows = self._call_rpc('referral_summary', {'p_referrer_id': user_id})
+            if rows:
+                row = rows[0]
+                return {
+                    'this_week': int(row.get('this_week') or 0),
+                    'this_month': int(row.get('this_month') or 0),
+                    'last_invite_at': row.get('last_invite_at'),
+                    'total_count': int(row.get('total_count') or 0),
+                }
         try:
             referrals = await self.get_user_referrals(user_id)
             if not referrals:
@@ -509,7 +802,8 @@ class DatabaseService:
                 }
 
             now = datetime.utcnow()
-            week_start = now - timedelta(days=now.weekday())  # Monday
+            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            week_start = today_start - timedelta(days=now.weekday())  # Monday 00:00, as in referral_summary()
             month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
             def parse_dt(value: Any) -> Optional[datetime]:
@@ -547,26 +841,174 @@ class DatabaseService:
                 'last_invite_at': None,
                 'total_count': 0,
             }
-    
-    # Logging operations
-    async def add_log(self, message: str, level: str = "info", user_id: Optional[int] = None) -> bool:
-        """Add a log entry."""
+
+    # Connection operations
+    async def get_unscored_connections(self, after_id: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """Connections without a compatibility score, keyset-paginated by id."""
         try:
             if not self.is_connected():
-                return False
-            
-            log_data = {
-                'message': message,
-                'level': level,
-                'user_id': user_id,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            response = self.supabase.table('logs').insert(log_data).execute()
-            return len(response.data) > 0
+                return []
+
+            response = (
+                self.supabase.table('user_connections')
+                .select('id, user_id, friend_user_id')
+                .is_('compatibility_score', 'null')
+                .gt('id', after_id)
+                .order('id')
+                .limit(limit)
+                .execute()
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error getting unscored connections: {e}")
+            return []
+
+    async def get_birth_dates(self, user_ids: List[int]) -> Dict[int, Any]:
+        """Map of user id -> birth_date for users that have one."""
+        try:
+            if not self.is_connected() or not user_ids:
+                return {}
+
+            response = self.supabase.table('users').select('id, birth_date').in_('id', user_ids).execute()
+            return {row['id']: row['birth_date'] for row in response.data or [] if row.get('birth_date')}
         except Exception as e:
-            logger.error(f"Error adding log: {e}")
+            logger.error(f"Error getting birth dates: {e}")
+            return {}
+
+    async def update_connection_scores(self, scores: Dict[int, int]) -> int:
+        """Set compatibility_score per connection id; returns the number updated."""
+        if not self.is_connected():
+            return 0
+
+        updated = 0
+        for connection_id, score in scores.items():
+            try:
+                self.supabase.table('user_connections').update({'compatibility_score': score}).eq('id', connection_id).execute()
+                updated += 1
+            except Exception as e:
+                logger.error(f"Error updating compatibility score for connection {connection_id}: {e}")
+        return updated
+
+    # Weekly report operations
+    async def upsert_weekly_reports(self, rows: List[Dict[str, Any]]) -> bool:
+        """Bulk upsert weekly_reports rows on (user_id, week_start, report_type)."""
+        if not self.is_connected() or not rows:
+            return False
+        try:
+            self.supabase.table('weekly_reports').upsert(
+                rows, on_conflict='user_id,week_start,report_type'
+            ).execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting {len(rows)} weekly report(s): {e}")
             return False
+
+    # Chatbot history operations
+    async def get_chatbot_history(self, user_id: int, before_id: Optional[int] = None,
+                                  limit: int = 20) -> List[Dict[str, Any]]:
+        """A user's chatbot turns, newest first, keyset-paginated by id (pass the last id as before_id)."""
+        try:
+            if not self.is_connected():
+                return []
+
+            query = (
+                self.supabase.table('chatbot_history')
+                .select('id, question, response')
+                .eq('user_id', user_id)
+            )
+            if before_id is not None:
+                query = query.lt('id', before_id)
+            response = query.order('id', desc=True).limit(limit).execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error getting chatbot history for user {user_id}: {e}")
+            return []
+
+    async def add_chatbot_turn(self, user_id: int, question: str, response: str) -> bool:
+        """Queue a chatbot turn for the batched writer (no database round-trip)."""
+        if not self.is_connected():
+            return False
+        return self.chat_writer.submit({
+            'user_id': user_id,
+            'question': question,
+            'response': response,
+            'created_at': datetime.now().isoformat(),
+        })
+
+    def _insert_chatbot_history(self, rows: List[Dict[str, Any]]) -> None:
+        """Bulk insert chatbot turns (called from the batch writer's worker thread)."""
+        self.supabase.table('chatbot_history').insert(rows).execute()
+
+    # Moon notification operations
+    async def get_moon_notification_recipients(self, after_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Users opted in to moon notifications (id, language), keyset-paginated by id."""
+        try:
+            if not self.is_connected():
+                return []
+
+            response = (
+                self.supabase.table('users')
+                .select('id, language')
+                .eq('moon_notifications', True)
+                .gt('id', after_id)
+                .order('id')
+                .limit(limit)
+                .execute()
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error getting moon notification recipients: {e}")
+            return []
+
+    async def get_moon_notification_checkpoint(self, moon_phase: str) -> int:
+        """Highest user id already notified for an event (0 if none), to resume a fan-out."""
+        try:
+            if not self.is_connected():
+                return 0
+
+            response = (
+                self.supabase.table('moon_notifications')
+                .select('user_id')
+                .eq('moon_phase', moon_phase)
+                .order('user_id', desc=True)
+                .limit(1)
+                .execute()
+            )
+            return response.data[0]['user_id'] if response.data else 0
+        except Exception as e:
+            logger.error(f"Error getting moon notification checkpoint: {e}")
+            return 0
+
+    async def record_moon_notifications(self, rows: List[Dict[str, Any]]) -> bool:
+        """Bulk insert sent notifications; rows already recorded for the event are ignored."""
+        if not self.is_connected() or not rows:
+            return False
+        try:
+            self.supabase.table('moon_notifications').upsert(
+                rows, on_conflict='user_id,moon_phase', ignore_duplicates=True
+            ).execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error recording {len(rows)} moon notification(s): {e}")
+            return False
+
+    # Logging operations
+    async def add_log(self, message: str, level: str = "info", user_id: Optional[int] = None) -> bool:
+        """Queue a log entry for the batched writer (no database round-trip)."""
+        if not self.is_connected():
+            return False
+        
+        log_data = {
+            'message': message,
+            'level': level,
+            'user_id': user_id,
+            'created_at': datetime.now().isoformat()
+        }
+        return self.log_writer.submit(log_data)
+    
+    def _insert_logs(self, rows: List[Dict[str, Any]]) -> None:
+        """Bulk insert log rows (called from the batch writer's worker thread)."""
+        self.supabase.table('logs').insert(rows).execute()
     
     async def get_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent logs."""
@@ -670,6 +1112,25 @@ class DatabaseService:
             logger.error(f"Error getting prompt {prompt_type}/{language}: {e}")
             return None
     
+    async def get_generation_profiles(self) -> Optional[List[Dict[str, Any]]]:
+        """Generation profile overrides stored on prompts rows; None if unavailable."""
+        if not self.is_connected() or self._profile_columns_missing:
+            return None
+        try:
+            response = (
+                self.supabase.table('prompts')
+                .select('prompt_type, language, max_output_tokens, temperature, model')
+                .execute()
+            )
+            return response.data or []
+        except Exception as e:
+            if 'does not exist' in str(e) or 'PGRST204' in str(e) or '42703' in str(e):
+                logger.warning("prompts has no generation profile columns, using defaults (apply the sql/ migrations)")
+                self._profile_columns_missing = True
+            else:
+                logger.error(f"Error getting generation profiles: {e}")
+            return None
+
     async def update_prompt(self, key: str, value: str) -> bool:
         """Update a prompt."""
         try:
@@ -0,0 +1,153 @@
+"""
+Generation profiles for the Fal Gram Bot.
+Per-reading-type LLM settings (output token cap, temperature, model
+preference) and per-type prompt/output size accounting.
+
+Defaults live in DEFAULT_PROFILES. Rows of the Supabase `prompts` table can
+override them through the optional max_output_tokens / temperature / model
+columns (see sql/add_generation_profiles.sql), per prompt type and
+optionally per language. Overrides are reloaded every
+GENERATION_PROFILE_TTL seconds.
+"""
+
+import math
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from src.services.database import db_service
+
+DEFAULT_TYPE = 'default'
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    max_output_tokens: int = 1024
+    temperature: float = 0.7
+    # Gemini models tried first, before the standard fallback order
+    models: Tuple[str, ...] = ()
+
+
+# Caps sized from each prompt's requested length (Turkish needs roughly
+# twice as many tokens per word as English), with headroom
+DEFAULT_PROFILES: Dict[str, GenerationProfile] = {
+    DEFAULT_TYPE: GenerationProfile(),
+    'coffee': GenerationProfile(max_output_tokens=600, temperature=0.8),
+    'palm': GenerationProfile(max_output_tokens=600, temperature=0.8),
+    'dream': GenerationProfile(max_output_tokens=600, temperature=0.7),
+    'tarot': GenerationProfile(max_output_tokens=600, temperature=0.8),
+    'daily_horoscope': GenerationProfile(max_output_tokens=400, temperature=0.8),
+    'weekly_horoscope': GenerationProfile(max_output_tokens=500, temperature=0.8),
+    'monthly_horoscope': GenerationProfile(max_output_tokens=700, temperature=0.8),
+    'compatibility': GenerationProfile(max_output_tokens=600, temperature=0.7),
+    'birth_chart': GenerationProfile(max_output_tokens=1024, temperature=0.6),
+    'moon_calendar': GenerationProfile(max_output_tokens=400, temperature=0.7),
+    'astro_chatbot': GenerationProfile(max_output_tokens=350, temperature=0.7),
+    'chatbot_summary': GenerationProfile(max_output_tokens=400, temperature=0.3),
+}
+
+
+class GenerationProfiles:
+    """Resolves the profile for a reading type and language."""
+
+    def __init__(self, defaults: Optional[Dict[str, GenerationProfile]] = None):
+        self.defaults = dict(defaults or DEFAULT_PROFILES)
+        # (prompt_type, language or None) -> column overrides
+        self._overrides: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+
+    def apply_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Replace overrides from prompts rows (prompt_type, language, max_output_tokens, temperature, model)."""
+        overrides: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        for row in rows:
+            values: Dict[str, Any] = {}
+            if row.get('max_output_tokens'):
+                values['max_output_tokens'] = int(row['max_output_tokens'])
+            if row.get('temperature') is not None:
+                values['temperature'] = float(row['temperature'])
+            if row.get('model'):
+                values['models'] = tuple(m.strip() for m in str(row['model']).split(',') if m.strip())
+            if values and row.get('prompt_type'):
+                overrides[(row['prompt_type'], row.get('language') or None)] = values
+        self._overrides = overrides
+
+    async def refresh(self, force: bool = False) -> None:
+        """Reload overrides from the prompts registry when older than the TTL."""
+        now = time.monotonic()
+        if not force and self._loaded_at is not None and now - self._loaded_at < settings.GENERATION_PROFILE_TTL:
+            return
+        self._loaded_at = now
+        rows = await db_service.get_generation_profiles()
+        if rows is not None:
+            self.apply_rows(rows)
+
+    def get(self, reading_type: Optional[str] = None, language: Optional[str] = None) -> GenerationProfile:
+        """Default profile for the type, then type-wide and per-language overrides."""
+        reading_type = reading_type or DEFAULT_TYPE
+        profile = self.defaults.get(reading_type) or self.defaults[DEFAULT_TYPE]
+        for key in ((reading_type, None), (reading_type, language)):
+            values = self._overrides.get(key)
+            if values:
+                profile = replace(profile, **values)
+        return profile
+
+    async def resolve(self, reading_type: Optional[str] = None, language: Optional[str] = None) -> GenerationProfile:
+        await self.refresh()
+        return self.get(reading_type, language)
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        """Effective language-independent profile per known type."""
+        types = set(self.defaults) | {reading_type for reading_type, _ in self._overrides}
+        return {reading_type: asdict(self.get(reading_type)) for reading_type in sorted(types)}
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class UsageStats:
+    """Recent per-type samples of prompt/output size and latency for percentile reports."""
+
+    FIELDS = ('prompt_tokens', 'output_tokens', 'latency_ms')
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, Deque[Tuple[float, float, float]]] = {}
+        self._calls: Dict[str, int] = {}
+        self._truncated: Dict[str, int] = {}
+
+    def record(self, reading_type: str, prompt_tokens: int, output_tokens: int, latency: float,
+               truncated: bool = False) -> None:
+        samples = self._samples.get(reading_type)
+        if samples is None:
+            samples = self._samples[reading_type] = deque(maxlen=self.window)
+        samples.append((float(prompt_tokens), float(output_tokens), latency * 1000.0))
+        self._calls[reading_type] = self._calls.get(reading_type, 0) + 1
+        if truncated:
+            self._truncated[reading_type] = self._truncated.get(reading_type, 0) + 1
+
+    def report(self, percentiles: Tuple[int, ...] = (50, 90, 99)) -> Dict[str, Dict[str, Any]]:
+        """Per type: call counts, truncations and percentiles over the recent window."""
+        report: Dict[str, Dict[str, Any]] = {}
+        for reading_type, samples in sorted(self._samples.items()):
+            entry: Dict[str, Any] = {
+                'calls': self._calls.get(reading_type, 0),
+                'truncated': self._truncated.get(reading_type, 0),
+                'window': len(samples),
+            }
+            for index, name in enumerate(self.FIELDS):
+                ordered = sorted(sample[index] for sample in samples)
+                entry[name] = {f"p{p}": round(_percentile(ordered, p), 1) for p in percentiles}
+            report[reading_type] = entry
+        return report
+
+
+# Global registry and usage statistics
+generation_profiles = GenerationProfiles()
+usage_stats = UsageStats()
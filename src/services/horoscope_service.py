@@ -0,0 +1,91 @@
+"""
+Horoscope service for the Fal Gram Bot.
+Daily, weekly and monthly horoscopes served from a per-period cache.
+
+A horoscope depends only on the sign, language, period and prompt, so each
+one is generated once and shared by every user of that sign until the
+period rolls over. The prefetch layer warms the entry for a user's own sign
+when they open the astrology menu.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Optional, Tuple
+
+from config.settings import settings
+from src.services.ai_service import ai_service, NOT_GENERATED
+from src.services.database import db_service
+from src.services.reading_cache import ReadingCache
+from src.services.weekly_report_service import week_start
+from src.utils.i18n import i18n
+
+# horoscope type -> (placeholder, strftime format of the period)
+PERIODS = {
+    'daily_horoscope': ('{date}', "%Y-%m-%d"),
+    'weekly_horoscope': ('{week_start}', "%Y-%m-%d"),
+    'monthly_horoscope': ('{month}', "%B %Y"),
+}
+
+
+def period_label(horoscope_type: str, now: Optional[datetime] = None) -> str:
+    """Label of the period containing `now`; weekly periods are named by their Monday."""
+    now = now or datetime.now()
+    if horoscope_type == 'weekly_horoscope':
+        return week_start(now.date()).strftime(PERIODS[horoscope_type][1])
+    return now.strftime(PERIODS[horoscope_type][1])
+
+
+class HoroscopeService:
+    """Per-(sign, language, period) horoscopes: memory LRU + SQLite, generated on demand."""
+
+    def __init__(self):
+        self.readings = ReadingCache("horoscopes") if settings.READING_CACHE_ENABLED else None
+
+    async def prompt_template(self, horoscope_type: str, language: str) -> str:
+        template = await db_service.get_prompt(horoscope_type, language)
+        return template or i18n.get_text(f"astrology.{horoscope_type}_prompt", language)
+
+    @staticmethod
+    def build_prompt(template: str, horoscope_type: str, sign: str, period: str) -> str:
+        placeholder = PERIODS[horoscope_type][0]
+        return template.replace('{sign}', sign).replace(placeholder, period)
+
+    @staticmethod
+    def cache_key(horoscope_type: str, sign: str, language: str, period: str, template: str) -> str:
+        version = hashlib.sha1(template.encode('utf-8')).hexdigest()[:10]
+        return f"{horoscope_type}|{sign}|{language}|{period}|{version}"
+
+    async def _key(self, horoscope_type: str, sign: str, language: str,
+                   template: Optional[str]) -> Tuple[str, str, str]:
+        template = template or await self.prompt_template(horoscope_type, language)
+        period = period_label(horoscope_type)
+        return template, period, self.cache_key(horoscope_type, sign, language, period, template)
+
+    async def cached(self, horoscope_type: str, sign: str, language: str,
+                     template: Optional[str] = None) -> Optional[str]:
+        """The current period's horoscope if it is already generated."""
+        if self.readings is None:
+            return None
+        _, _, key = await self._key(horoscope_type, sign, language, template)
+        return await self.readings.get(key)
+
+    async def horoscope(self, horoscope_type: str, sign: str, language: str, user_id: int = 0,
+                        template: Optional[str] = None, plan: Optional[str] = None) -> Optional[str]:
+        """Horoscope for the current period, generated only on a cache miss."""
+        template, period, key = await self._key(horoscope_type, sign, language, template)
+        if self.readings is not None:
+            cached = await self.readings.get(key)
+            if cached:
+                return cached
+
+        text = await ai_service.generate_with_fallback(
+            user_id, self.build_prompt(template, horoscope_type, sign, period),
+            reading_type=horoscope_type, language=language, plan=plan
+        )
+        if self.readings is not None and text and text not in NOT_GENERATED:
+            await self.readings.set(key, text)
+        return text
+
+
+# Global horoscope service instance
+horoscope_service = HoroscopeService()
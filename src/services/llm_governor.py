@@ -0,0 +1,203 @@
+"""
+LLM concurrency governor for the Fal Gram Bot.
+Caps how many upstream LLM requests are in flight, globally and per provider.
+
+Callers that cannot get a slot wait in a queue that is fair in two ways:
+
+- Lanes by plan (vip, premium, basic, free) share freed slots by weight
+  (stride scheduling), so paid traffic goes first without starving free users.
+- Within a lane users take turns (round robin), so one user's burst cannot
+  occupy every slot.
+
+A caller that waits longer than LLM_QUEUE_TIMEOUT gets LLMQueueTimeout and
+AIService answers with BUSY_MESSAGE instead of piling onto the provider.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from config.settings import settings
+from src.services.model_router import parse_quotas, plan_tier
+from src.utils.metrics import metrics, AI_LATENCY_BUCKETS
+
+LLM_QUEUE_WAIT = metrics.histogram(
+    "falgram_llm_queue_wait_seconds", "Time LLM calls waited for a concurrency slot", ["lane"],
+    buckets=AI_LATENCY_BUCKETS
+)
+LLM_QUEUE_TIMEOUTS = metrics.counter(
+    "falgram_llm_queue_timeouts_total", "LLM calls that gave up waiting for a slot", ["lane"]
+)
+LLM_QUEUE_DEPTH = metrics.gauge(
+    "falgram_llm_queue_depth", "LLM calls waiting for a concurrency slot"
+)
+LLM_IN_FLIGHT = metrics.gauge(
+    "falgram_llm_in_flight", "Upstream LLM requests in flight", ["provider"]
+)
+
+# Share of freed slots each lane gets while several lanes are waiting
+LANE_WEIGHTS = {'vip': 8, 'premium': 4, 'basic': 2, 'free': 1}
+
+
+class LLMQueueTimeout(Exception):
+    """No concurrency slot became free within the queue timeout."""
+
+
+class _Waiter:
+    __slots__ = ('user_id', 'lane', 'provider', 'future')
+
+    def __init__(self, user_id: int, lane: str, provider: str, future: asyncio.Future):
+        self.user_id = user_id
+        self.lane = lane
+        self.provider = provider
+        self.future = future
+
+
+class LLMGovernor:
+    """Global and per-provider concurrency caps with weighted, per-user fair queuing."""
+
+    def __init__(self, max_concurrency: Optional[int] = None, provider_limits: Optional[Dict[str, int]] = None,
+                 queue_timeout: Optional[float] = None):
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        if provider_limits is None:
+            provider_limits = parse_quotas(settings.LLM_PROVIDER_CONCURRENCY)
+        self.provider_limits = provider_limits
+        self.queue_timeout = settings.LLM_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.active = 0
+        self.active_by_provider: Dict[str, int] = {}
+        # lane -> user_id -> that user's waiters in arrival order
+        self._lanes: Dict[str, 'OrderedDict[int, Deque[_Waiter]]'] = {lane: OrderedDict() for lane in LANE_WEIGHTS}
+        # Stride scheduling: the waiting lane with the lowest pass is served next
+        self._pass: Dict[str, float] = {lane: 0.0 for lane in LANE_WEIGHTS}
+        self.waiting = 0
+        LLM_QUEUE_DEPTH.set_function(lambda: self.waiting)
+
+    def _has_capacity(self, provider: str) -> bool:
+        limit = self.provider_limits.get(provider, self.max_concurrency)
+        return self.active < self.max_concurrency and self.active_by_provider.get(provider, 0) < limit
+
+    def _take(self, provider: str) -> None:
+        self.active += 1
+        self.active_by_provider[provider] = self.active_by_provider.get(provider, 0) + 1
+        LLM_IN_FLIGHT.inc(provider=provider)
+
+    def release(self, provider: str) -> None:
+        self.active -= 1
+        self.active_by_provider[provider] -= 1
+        LLM_IN_FLIGHT.dec(provider=provider)
+        self._dispatch()
+
+    # Queue
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        users = self._lanes[waiter.lane]
+        if not users:
+            # A lane that was idle rejoins at the current front instead of cashing in its idle time
+            busy = [self._pass[lane] for lane, queued in self._lanes.items() if queued]
+            if busy:
+                self._pass[waiter.lane] = max(self._pass[waiter.lane], min(busy))
+        users.setdefault(waiter.user_id, deque()).append(waiter)
+        self.waiting += 1
+
+    def _remove(self, waiter: _Waiter) -> None:
+        users = self._lanes[waiter.lane]
+        queue = users.get(waiter.user_id)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del users[waiter.user_id]
+        self.waiting -= 1
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for lane in sorted((lane for lane, users in self._lanes.items() if users), key=self._pass.get):
+            users = self._lanes[lane]
+            for user_id, queue in users.items():
+                waiter = queue[0]
+                if not self._has_capacity(waiter.provider) and not waiter.future.done():
+                    continue
+                queue.popleft()
+                if queue:
+                    # Round robin: the user's next call waits behind the other users
+                    users.move_to_end(user_id)
+                else:
+                    del users[user_id]
+                self.waiting -= 1
+                if not waiter.future.done():
+                    self._pass[lane] += 1.0 / LANE_WEIGHTS[lane]
+                return waiter
+        return None
+
+    def _dispatch(self) -> None:
+        while self.active < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            if waiter.future.done():
+                # Cancelled while queued; its task has not cleaned up yet
+                continue
+            self._take(waiter.provider)
+            waiter.future.set_result(None)
+
+    # Slots
+
+    async def acquire(self, user_id: int, plan: Optional[str], provider: str, timeout: Optional[float] = None) -> float:
+        """Wait for a slot; returns the seconds waited. Raises LLMQueueTimeout."""
+        lane = plan_tier(plan)
+        if not self.waiting and self._has_capacity(provider):
+            self._take(provider)
+            LLM_QUEUE_WAIT.observe(0.0, lane=lane)
+            return 0.0
+
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(user_id, lane, provider, loop.create_future())
+        self._enqueue(waiter)
+        self._dispatch()
+        # Await the future itself rather than wait_for(), which drops a cancellation
+        # that arrives together with the grant and lets the cancelled caller run on
+        expire = loop.call_later(
+            self.queue_timeout if timeout is None else timeout,
+            lambda: waiter.future.done() or waiter.future.set_exception(asyncio.TimeoutError())
+        )
+        try:
+            await waiter.future
+        except BaseException as e:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # Granted just as the wait ended: hand the slot on
+                self.release(provider)
+            else:
+                self._remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                LLM_QUEUE_TIMEOUTS.inc(lane=lane)
+                raise LLMQueueTimeout(f"No LLM slot for {provider} within the queue timeout") from None
+            raise
+        finally:
+            expire.cancel()
+        waited = time.monotonic() - started
+        LLM_QUEUE_WAIT.observe(waited, lane=lane)
+        return waited
+
+    @asynccontextmanager
+    async def slot(self, user_id: int, plan: Optional[str], provider: str,
+                   timeout: Optional[float] = None) -> AsyncIterator[float]:
+        waited = await self.acquire(user_id, plan, provider, timeout)
+        try:
+            yield waited
+        finally:
+            self.release(provider)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'max_concurrency': self.max_concurrency,
+            'provider_limits': dict(self.provider_limits),
+            'in_flight': self.active,
+            'in_flight_by_provider': {p: n for p, n in self.active_by_provider.items() if n},
+            'waiting': {lane: sum(len(q) for q in users.values()) for lane, users in self._lanes.items()},
+        }
+
+
+# Global LLM governor
+llm_governor = LLMGovernor()
@@ -0,0 +1,236 @@
+"""
+Model routing policy for the Fal Gram Bot.
+Decides which provider/model chain an LLM call walks through.
+
+The order depends on the user's plan, the reading type's generation profile,
+provider health and the remaining per-model quota:
+
+- Paid plans keep the standard order (profile preference first); free users
+  get the cheapest models first.
+- Each model with a configured quota (requests per minute) holds back
+  MODEL_RESERVED_SHARE of it for paid plans; free traffic skips a model once
+  only the reserved part is left.
+- A model that failed MODEL_FAILURE_THRESHOLD times in a row is moved to the
+  end of the chain for MODEL_COOLDOWN seconds.
+
+The policy itself does no I/O (clock injectable), so it can be exercised
+offline; AIService calls the providers for the returned routes.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from config.settings import settings
+from src.services.database import db_service, premium_active
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+
+AI_ROUTES = metrics.counter(
+    "falgram_ai_routes_total", "Provider/model attempts by plan tier", ["tier", "model"]
+)
+AI_RESERVED_SKIPS = metrics.counter(
+    "falgram_ai_reserved_skips_total", "Free-tier calls kept off a model's reserved quota", ["model"]
+)
+AI_CIRCUIT_OPEN = metrics.counter(
+    "falgram_ai_circuit_open_total", "Models taken out of rotation after repeated failures", ["model"]
+)
+
+PLAN_ORDER = {'free': 0, 'basic': 1, 'premium': 2, 'vip': 3}
+FREE_PLAN = 'free'
+
+# Relative cost per call, used to order free-tier chains
+MODEL_COSTS = {
+    'gemini-2.5-flash-lite': 1.0,
+    'gemini-1.5-flash': 1.2,
+    'gemini-2.0-flash': 1.5,
+    'deepseek-chat': 2.0,
+}
+
+
+@dataclass(frozen=True)
+class Route:
+    provider: str
+    # None: the provider's legacy default model
+    model: Optional[str]
+
+    @property
+    def name(self) -> str:
+        return self.model or f"{self.provider}-legacy"
+
+
+# Standard chain; the legacy Gemini model is always the last chance
+DEFAULT_ROUTES = (
+    Route('gemini', 'gemini-2.5-flash-lite'),
+    Route('gemini', 'gemini-2.0-flash'),
+    Route('deepseek', 'deepseek-chat'),
+    Route('gemini', 'gemini-1.5-flash'),
+)
+LEGACY_ROUTE = Route('gemini', None)
+
+
+def parse_quotas(spec: str) -> Dict[str, int]:
+    """'model=rpm,model=rpm' -> {model: rpm}; malformed entries are ignored."""
+    quotas: Dict[str, int] = {}
+    for item in (spec or '').split(','):
+        model, _, limit = item.partition('=')
+        try:
+            if model.strip() and int(limit) > 0:
+                quotas[model.strip()] = int(limit)
+        except ValueError:
+            continue
+    return quotas
+
+
+def plan_tier(plan: Optional[str]) -> str:
+    plan = (plan or FREE_PLAN).lower()
+    return plan if plan in PLAN_ORDER else FREE_PLAN
+
+
+def is_paid(plan: Optional[str]) -> bool:
+    return PLAN_ORDER[plan_tier(plan)] > PLAN_ORDER[FREE_PLAN]
+
+
+class ModelQuota:
+    """Requests per sliding minute for one model."""
+
+    WINDOW = 60.0
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._calls: Deque[float] = deque()
+
+    def _expire(self, now: float) -> None:
+        while self._calls and now - self._calls[0] >= self.WINDOW:
+            self._calls.popleft()
+
+    def remaining(self, now: float) -> int:
+        self._expire(now)
+        return max(0, self.limit - len(self._calls))
+
+    def acquire(self, now: float) -> None:
+        self._expire(now)
+        self._calls.append(now)
+
+
+class ModelHealth:
+    """Consecutive-failure circuit breaker for one model."""
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def record(self, ok: bool, now: float, threshold: int, cooldown: float) -> bool:
+        """Returns True when this failure opened the circuit."""
+        if ok:
+            self.failures = 0
+            self.open_until = 0.0
+            return False
+        self.failures += 1
+        if self.failures >= threshold and self.available(now):
+            self.open_until = now + cooldown
+            return True
+        return False
+
+
+class ModelRouter:
+    """Maps (plan, generation profile, provider health, remaining quota) to an ordered route list."""
+
+    def __init__(self, quotas: Optional[Dict[str, int]] = None, reserved_share: Optional[float] = None,
+                 failure_threshold: Optional[int] = None, cooldown: Optional[float] = None,
+                 clock=time.monotonic):
+        if quotas is None:
+            quotas = parse_quotas(settings.MODEL_QUOTAS)
+        self.quotas = {model: ModelQuota(limit) for model, limit in quotas.items()}
+        self.reserved_share = settings.MODEL_RESERVED_SHARE if reserved_share is None else reserved_share
+        self.failure_threshold = failure_threshold or settings.MODEL_FAILURE_THRESHOLD
+        self.cooldown = settings.MODEL_COOLDOWN if cooldown is None else cooldown
+        self.clock = clock
+        self.health: Dict[str, ModelHealth] = {}
+        self.plans = TTLCache("ai_user_plans", ttl=settings.USER_PLAN_CACHE_TTL, maxsize=10000)
+
+    # Plan lookup
+
+    async def plan_for(self, user_id: int) -> str:
+        """The user's current plan (expired subscriptions count as free); cached briefly."""
+        if not user_id:
+            return FREE_PLAN
+        plan = self.plans.get(user_id)
+        if plan is None:
+            user = await db_service.get_user(user_id) or {}
+            plan = user.get('premium_plan') or ('basic' if user.get('is_premium') else FREE_PLAN)
+            plan = plan_tier(plan) if premium_active(user) else FREE_PLAN
+            self.plans.set(user_id, plan)
+        return plan
+
+    # Policy
+
+    def _health(self, route: Route) -> ModelHealth:
+        health = self.health.get(route.name)
+        if health is None:
+            health = self.health[route.name] = ModelHealth()
+        return health
+
+    def _within_free_share(self, route: Route, now: float) -> bool:
+        quota = self.quotas.get(route.name)
+        if quota is None:
+            return True
+        return quota.remaining(now) > quota.limit * self.reserved_share
+
+    def route(self, plan: Optional[str] = None, preferred: Iterable[str] = (),
+              now: Optional[float] = None) -> List[Route]:
+        """Ordered routes to try for one call."""
+        now = self.clock() if now is None else now
+        paid = is_paid(plan)
+
+        preferred_routes = [Route('deepseek' if m.startswith('deepseek') else 'gemini', m) for m in preferred]
+        candidates = preferred_routes + [r for r in DEFAULT_ROUTES if r not in preferred_routes]
+        if not paid:
+            # Stable sort keeps profile preference among equally priced models
+            candidates.sort(key=lambda r: MODEL_COSTS.get(r.name, max(MODEL_COSTS.values())))
+
+        healthy: List[Route] = []
+        cooling: List[Route] = []
+        for route in candidates:
+            quota = self.quotas.get(route.name)
+            if quota is not None and quota.remaining(now) == 0:
+                continue
+            if not paid and not self._within_free_share(route, now):
+                AI_RESERVED_SKIPS.inc(model=route.name)
+                continue
+            (healthy if self._health(route).available(now) else cooling).append(route)
+        return healthy + cooling + [LEGACY_ROUTE]
+
+    def acquire(self, route: Route, plan: Optional[str] = None) -> None:
+        """Count an attempt against the model's quota."""
+        AI_ROUTES.inc(tier=plan_tier(plan), model=route.name)
+        quota = self.quotas.get(route.name)
+        if quota is not None:
+            quota.acquire(self.clock())
+
+    def record(self, route: Route, ok: bool) -> None:
+        if self._health(route).record(ok, self.clock(), self.failure_threshold, self.cooldown):
+            AI_CIRCUIT_OPEN.inc(model=route.name)
+
+    def describe(self) -> Dict[str, Any]:
+        """Remaining quota and circuit state per model."""
+        now = self.clock()
+        models: Dict[str, Dict[str, Any]] = {}
+        for name in sorted(set(self.quotas) | set(self.health)):
+            entry: Dict[str, Any] = {}
+            quota = self.quotas.get(name)
+            if quota is not None:
+                entry.update(limit=quota.limit, remaining=quota.remaining(now))
+            health = self.health.get(name)
+            if health is not None:
+                entry.update(failures=health.failures, available=health.available(now))
+            models[name] = entry
+        return {'reserved_share': self.reserved_share, 'models': models}
+
+
+# Global model router
+model_router = ModelRouter()
@@ -0,0 +1,143 @@
+"""
+Moon notifier for the Fal Gram Bot.
+Fans out new/full moon notifications to opted-in users.
+
+Event instants come from the precomputed moon ephemeris, so the notifier
+sleeps until the next one. Recipients are streamed with a keyset-paginated
+query, each message is rendered once per language, and sends go through the
+ThrottledSender. Delivered rows are recorded in bulk per page in
+`moon_notifications`; the highest recorded user id is the resume point, so
+a restart mid fan-out continues where it stopped (repeating at most the page
+in flight) instead of re-sending to everyone.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from src.services.database import db_service
+from src.services.throttled_sender import throttled_sender, ThrottledSender, BLOCKED, SENT
+from src.utils.i18n import i18n
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.utils.moon_ephemeris import moon_ephemeris, MoonEphemeris
+
+logger = get_logger("moon_notifier")
+
+MOON_NOTIFICATIONS = metrics.counter(
+    "falgram_moon_notifications_total", "Moon notification deliveries", ["event", "result"]
+)
+MOON_FANOUT_RATE = metrics.gauge(
+    "falgram_moon_fanout_messages_per_second", "Throughput of the most recent moon notification fan-out"
+)
+MOON_FANOUT_SECONDS = metrics.histogram(
+    "falgram_moon_fanout_duration_seconds", "Duration of moon notification fan-outs",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+
+LOOKAHEAD = timedelta(days=32)
+
+
+class MoonNotifier:
+    """Sleeps until each new/full moon and notifies opted-in users."""
+
+    def __init__(self, sender: ThrottledSender = throttled_sender, ephemeris: MoonEphemeris = moon_ephemeris):
+        self.sender = sender
+        self.ephemeris = ephemeris
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def event_id(kind: str, when: datetime) -> str:
+        """Stable id stored in moon_notifications.moon_phase, e.g. 'full_moon:2026-10-26T04:11Z'."""
+        return f"{kind}:{when.astimezone(timezone.utc):%Y-%m-%dT%H:%MZ}"
+
+    @staticmethod
+    def render(kind: str, when: datetime, language: str) -> str:
+        return i18n.get_text(f"moon_notification.{kind}", language).format(
+            time=f"{when.astimezone(timezone.utc):%d.%m.%Y %H:%M}"
+        )
+
+    async def fan_out(self, kind: str, when: datetime) -> Dict[str, Any]:
+        """Notify every opted-in user about one event; safe to re-run for the same event."""
+        event = self.event_id(kind, when)
+        after_id = await db_service.get_moon_notification_checkpoint(event)
+        if after_id:
+            logger.info(f"Resuming moon fan-out {event} after user {after_id}")
+
+        texts: Dict[str, str] = {}
+        counts: Dict[str, int] = {}
+        started = time.monotonic()
+        while True:
+            page = await db_service.get_moon_notification_recipients(after_id, settings.MOON_NOTIFY_PAGE_SIZE)
+            if not page:
+                break
+            messages = []
+            for row in page:
+                language = row.get('language') or settings.DEFAULT_LANGUAGE
+                if language not in texts:
+                    texts[language] = self.render(kind, when, language)
+                messages.append((row['id'], texts[language], {'parse_mode': 'Markdown'}))
+
+            results = await self.sender.send_all(messages)
+            sent_at = datetime.now(timezone.utc).isoformat()
+            sent: List[Dict[str, Any]] = []
+            for (user_id, _, _), result in zip(messages, results):
+                counts[result] = counts.get(result, 0) + 1
+                if result == SENT:
+                    sent.append({'user_id': user_id, 'notification_type': kind, 'moon_phase': event, 'sent_at': sent_at})
+                elif result == BLOCKED:
+                    await db_service.update_user(user_id, {'moon_notifications': False})
+            await db_service.record_moon_notifications(sent)
+            after_id = page[-1]['id']
+
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        rate = total / elapsed if elapsed > 0 else 0.0
+        for result, count in counts.items():
+            MOON_NOTIFICATIONS.inc(count, event=kind, result=result)
+        MOON_FANOUT_SECONDS.observe(elapsed)
+        MOON_FANOUT_RATE.set(rate)
+        logger.info(
+            f"Moon fan-out {event}: {total} message(s) in {elapsed:.1f}s ({rate:.1f}/s), "
+            f"{len(texts)} language(s), {counts}"
+        )
+        return {'event': event, 'counts': counts, 'seconds': elapsed, 'per_second': rate}
+
+    async def _run(self) -> None:
+        # Look back a little so an event interrupted by a restart is resumed
+        start = datetime.now(timezone.utc) - timedelta(hours=settings.MOON_NOTIFY_GRACE_HOURS)
+        while True:
+            events = self.ephemeris.events_between(start, datetime.now(timezone.utc) + LOOKAHEAD)
+            if not events:
+                await asyncio.sleep(LOOKAHEAD.total_seconds())
+                continue
+            for kind, when in events:
+                delay = (when - datetime.now(timezone.utc)).total_seconds()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    await self.fan_out(kind, when)
+                except Exception as e:
+                    logger.error(f"Moon fan-out {self.event_id(kind, when)} failed: {e}")
+                start = when + timedelta(seconds=1)
+
+    def start(self) -> None:
+        """Start waiting for moon events on the running loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="moon-notifier")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global moon notifier instance
+moon_notifier = MoonNotifier()
@@ -0,0 +1,218 @@
+"""
+Speculative prefetch for the Fal Gram Bot menus.
+
+The tap after opening a menu is predictable: from the astrology menu it is
+usually the user's own sign's horoscope, from the fortune menu a tarot
+spread. On menu entry a background task warms what those handlers read
+next: the user record, the prompts and, for users with a birth date, the
+current daily horoscope of their sign (an LLM call, limited to
+PREFETCH_LLM_PER_MINUTE across all users and not charged to the user).
+
+The task is cancelled when the user taps something outside that menu.
+Handlers read through user() / prompt() / horoscope_served(), which count
+prefetch hits and misses per kind.
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
+
+from telegram import InlineKeyboardMarkup
+
+from config.settings import settings
+from src.keyboards.astrology import AstrologyKeyboards
+from src.keyboards.fortune import FortuneKeyboards
+from src.services.ai_service import NOT_GENERATED
+from src.services.database import db_service
+from src.services.horoscope_service import horoscope_service
+from src.utils.cache import TTLCache
+from src.utils.helpers import get_zodiac_sign
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger("prefetch_service")
+
+PREFETCH = metrics.counter(
+    "falgram_prefetch_total", "Speculative prefetches by kind and outcome", ["kind", "result"]
+)
+
+
+def _menu_prefixes(menu: str, keyboard: InlineKeyboardMarkup, *flows: str) -> Tuple[str, ...]:
+    """The menu itself, its buttons (sign pickers extend these) and follow-up flows, minus the way out."""
+    buttons = [button.callback_data for row in keyboard.inline_keyboard for button in row]
+    return (menu, *(data for data in buttons if data and data != 'main_menu'), *flows)
+
+
+# Callback prefixes that stay within each menu; anything else cancels its prefetch.
+# Read off the menu keyboards so renamed buttons cannot silently cancel prefetches.
+MENU_NEXT: Dict[str, Tuple[str, ...]] = {
+    'astrology': _menu_prefixes('astrology', AstrologyKeyboards.get_astrology_menu(), 'zodiac_', 'compat_'),
+    'fortune': _menu_prefixes('fortune', FortuneKeyboards.get_fortune_menu(), 'palm_reading'),
+}
+
+# Speculative LLM calls run under their own requester id in the free lane, so they
+# never use up a user's rate limit or get ahead of readings users asked for
+PREFETCH_REQUESTER = -1
+
+_MISSING = object()
+
+
+def _sign(user_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    try:
+        return get_zodiac_sign(datetime.fromisoformat(str((user_data or {})['birth_date'])[:10]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class PrefetchService:
+    """Warms likely-next data on menu entry, within a task and LLM budget."""
+
+    def __init__(self):
+        self.warm = TTLCache("prefetch", ttl=settings.PREFETCH_TTL, maxsize=4096)
+        # user_id -> (menu, running prefetch task)
+        self._tasks: Dict[int, Tuple[str, asyncio.Task]] = {}
+        self._llm_calls: Deque[float] = deque()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        db_service.add_user_update_listener(self._user_updated)
+
+    # Bookkeeping
+
+    def _count(self, kind: str, result: str) -> None:
+        PREFETCH.inc(kind=kind, result=result)
+        counts = self._counts.setdefault(kind, {})
+        counts[result] = counts.get(result, 0) + 1
+
+    def _put(self, kind: str, key: Hashable, value: Any) -> None:
+        self.warm.set((kind, key), value)
+        self._count(kind, "issued")
+
+    def _lookup(self, kind: str, key: Hashable, consume: bool) -> Any:
+        value = self.warm.get((kind, key), _MISSING)
+        if value is not _MISSING and consume:
+            self.warm.invalidate((kind, key))
+        if settings.PREFETCH_ENABLED:
+            self._count(kind, "miss" if value is _MISSING else "hit")
+        return value
+
+    def _user_updated(self, user_id: int, updates: Dict[str, Any]) -> None:
+        self.warm.invalidate(('user', user_id))
+
+    def _llm_budget(self) -> bool:
+        """Take one speculative LLM call from the per-minute budget."""
+        now = time.monotonic()
+        while self._llm_calls and now - self._llm_calls[0] >= 60:
+            self._llm_calls.popleft()
+        if len(self._llm_calls) >= settings.PREFETCH_LLM_PER_MINUTE:
+            return False
+        self._llm_calls.append(now)
+        return True
+
+    # Menu entry / navigation
+
+    def on_menu(self, user_id: int, menu: str, language: str, user_data: Optional[Dict[str, Any]] = None) -> None:
+        """Start warming what the user is likely to tap next in `menu`."""
+        if not settings.PREFETCH_ENABLED or menu not in MENU_NEXT:
+            return
+        self.cancel(user_id)
+        if user_data:
+            self._put('user', user_id, user_data)
+        if len(self._tasks) >= settings.PREFETCH_MAX_TASKS:
+            self._count(menu, "skipped")
+            return
+        task = asyncio.get_running_loop().create_task(self._prefetch(user_id, menu, language, user_data))
+        self._tasks[user_id] = (menu, task)
+        task.add_done_callback(lambda done, uid=user_id: self._finished(uid, done))
+
+    def _finished(self, user_id: int, task: asyncio.Task) -> None:
+        running = self._tasks.get(user_id)
+        if running is not None and running[1] is task:
+            del self._tasks[user_id]
+
+    def navigated(self, user_id: int, callback_data: str) -> None:
+        """Cancel the user's prefetch when they leave the menu it was for."""
+        running = self._tasks.get(user_id)
+        if running is not None and not callback_data.startswith(MENU_NEXT[running[0]]):
+            self.cancel(user_id)
+
+    def cancel(self, user_id: int) -> None:
+        running = self._tasks.pop(user_id, None)
+        if running is not None and not running[1].done():
+            running[1].cancel()
+            self._count(running[0], "cancelled")
+
+    async def stop(self) -> None:
+        tasks = [task for _, task in self._tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _prefetch(self, user_id: int, menu: str, language: str, user_data: Optional[Dict[str, Any]]) -> None:
+        try:
+            if user_data is None:
+                user_data = await db_service.get_user(user_id)
+                if user_data:
+                    self._put('user', user_id, user_data)
+            if menu == 'astrology':
+                template = await self._warm_prompt('daily_horoscope', language)
+                sign = _sign(user_data)
+                if sign:
+                    await self._warm_horoscope('daily_horoscope', sign, language, user_id, template)
+            elif menu == 'fortune':
+                await self._warm_prompt('tarot_spread', language)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Prefetch for user {user_id} ({menu}) failed: {e}")
+
+    async def _warm_prompt(self, prompt_type: str, language: str) -> Optional[str]:
+        value = self.warm.get(('prompt', (prompt_type, language)), _MISSING)
+        if value is _MISSING:
+            value = await db_service.get_prompt(prompt_type, language)
+            self._put('prompt', (prompt_type, language), value)
+        return value
+
+    async def _warm_horoscope(self, horoscope_type: str, sign: str, language: str, user_id: int,
+                              template: Optional[str]) -> None:
+        if not await horoscope_service.cached(horoscope_type, sign, language, template):
+            if not self._llm_budget():
+                self._count('horoscope', "skipped")
+                return
+            text = await horoscope_service.horoscope(horoscope_type, sign, language, PREFETCH_REQUESTER,
+                                                     template, plan='free')
+            if not text or text in NOT_GENERATED:
+                return
+        self._put('horoscope', (user_id, horoscope_type, sign, language), True)
+
+    # Reads used by the handlers
+
+    async def user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """The prefetched user record (used once), else a fresh read."""
+        value = self._lookup('user', user_id, consume=True)
+        return value if value is not _MISSING else await db_service.get_user(user_id)
+
+    async def prompt(self, prompt_type: str, language: str) -> Optional[str]:
+        """Supabase prompt text, from the prefetch cache when warm."""
+        value = self._lookup('prompt', (prompt_type, language), consume=False)
+        return value if value is not _MISSING else await db_service.get_prompt(prompt_type, language)
+
+    def horoscope_served(self, user_id: int, horoscope_type: str, sign: str, language: str) -> None:
+        """Count whether the horoscope a user asked for had been prefetched for them."""
+        self._lookup('horoscope', (user_id, horoscope_type, sign, language), consume=True)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per kind: issued/hit/miss/cancelled/skipped counts and the hit rate."""
+        report = {}
+        for kind, counts in sorted(self._counts.items()):
+            entry: Dict[str, Any] = dict(counts)
+            reads = counts.get('hit', 0) + counts.get('miss', 0)
+            if reads:
+                entry['hit_rate'] = round(counts.get('hit', 0) / reads, 3)
+            report[kind] = entry
+        return report
+
+
+# Global prefetch service instance
+prefetch_service = PrefetchService()
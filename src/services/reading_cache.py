@@ -0,0 +1,150 @@
+"""
+Reading cache for the Fal Gram Bot.
+Two-tier cache for generated readings: an in-memory LRU in front of a
+persistent SQLite file, so interpretations survive restarts and deploys.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.settings import settings
+from src.utils.logger import get_logger
+from src.utils.metrics import record_cache, LLM_CALLS_AVOIDED
+
+logger = get_logger("reading_cache")
+
+
+class ReadingCache:
+    """LRU memory tier backed by a SQLite key/value table.
+
+    SQLite access runs in worker threads through a single connection guarded
+    by a lock; the memory tier is only touched from the event loop.
+    """
+
+    def __init__(self, name: str, path: Optional[str] = None, memory_size: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        self.name = name
+        self.path = path if path is not None else os.path.join(settings.CACHE_DIR, f"{name}.sqlite3")
+        self.memory_size = memory_size or settings.READING_CACHE_MEMORY_SIZE
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._disabled = False
+        self.stats: Dict[str, int] = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+
+    # SQLite tier (worker threads)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS readings ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL,"
+                    " created_at REAL NOT NULL)"
+                )
+                self._conn = conn
+            except sqlite3.Error as e:
+                logger.error(f"{self.name}: persistent cache disabled ({self.path}): {e}")
+                self._disabled = True
+        return self._conn
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                return conn.execute("SELECT created_at, value FROM readings WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"{self.name}: read failed: {e}")
+                return None
+
+    def _disk_set_many(self, items: Iterable[Tuple[str, float, str]]) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.executemany(
+                    "INSERT INTO readings (key, created_at, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, created_at = excluded.created_at",
+                    list(items)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"{self.name}: write failed: {e}")
+
+    def _disk_keys(self) -> List[str]:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return []
+            return [row[0] for row in conn.execute("SELECT key FROM readings")]
+
+    # Memory tier (event loop)
+
+    def _fresh(self, created_at: float) -> bool:
+        return self.ttl is None or time.time() - created_at < self.ttl
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Cached value for key, checking memory then SQLite."""
+        entry = self._memory.get(key)
+        if entry is not None and self._fresh(entry[0]):
+            self._memory.move_to_end(key)
+            self._hit('memory')
+            return entry[1]
+
+        row = await asyncio.to_thread(self._disk_get, key)
+        if row is not None and self._fresh(row[0]):
+            self._remember(key, row[0], row[1])
+            self._hit('disk')
+            return row[1]
+
+        self.stats['misses'] += 1
+        record_cache(self.name, False)
+        return None
+
+    def _hit(self, tier: str) -> None:
+        self.stats[f'{tier}_hits'] += 1
+        record_cache(self.name, True)
+        LLM_CALLS_AVOIDED.inc(cache=self.name, tier=tier)
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a value in both tiers."""
+        await self.set_many([(key, value)])
+
+    async def set_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Store several values with a single SQLite transaction."""
+        now = time.time()
+        rows = [(key, now, value) for key, value in items]
+        for key, created_at, value in rows:
+            self._remember(key, created_at, value)
+        self.stats['stores'] += len(rows)
+        await asyncio.to_thread(self._disk_set_many, rows)
+
+    async def keys(self) -> List[str]:
+        """All keys in the persistent tier (used by warm-up jobs)."""
+        return await asyncio.to_thread(self._disk_keys)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
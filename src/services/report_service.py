@@ -0,0 +1,207 @@
+"""
+Report service for the Fal Gram Bot.
+Builds the admin PDF report off the event loop and caches it per time bucket.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from config.settings import settings
+from src.services.database import db_service
+from src.utils.logger import get_logger
+from src.utils.helpers import format_currency
+from src.utils.metrics import metrics, record_cache
+
+logger = get_logger("report_service")
+
+REPORT_RENDER_SECONDS = metrics.histogram(
+    "falgram_report_render_seconds", "Admin PDF render time in the worker thread", ["report"]
+)
+
+# Days of referral history shown in the daily series chart
+DAILY_SERIES_DAYS = 30
+
+
+def _latin1(text: str) -> str:
+    """Core PDF fonts only cover latin-1; replace anything else."""
+    return str(text).encode('latin-1', 'replace').decode('latin-1')
+
+
+def _bar_chart(pdf: Any, title: str, series: List[Tuple[str, float]], label_every: int = 1) -> None:
+    """Draw a simple vertical bar chart with FPDF primitives."""
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, _latin1(title), new_x="LMARGIN", new_y="NEXT")
+    if not series:
+        pdf.set_font("Helvetica", size=10)
+        pdf.cell(0, 8, "No data", new_x="LMARGIN", new_y="NEXT")
+        return
+
+    chart_height = 40.0
+    width = pdf.w - pdf.l_margin - pdf.r_margin
+    bar_width = width / len(series)
+    peak = max(value for _, value in series) or 1
+    top = pdf.get_y() + 2
+    baseline = top + chart_height
+
+    pdf.set_font("Helvetica", size=6)
+    pdf.set_fill_color(102, 51, 153)
+    for i, (label, value) in enumerate(series):
+        x = pdf.l_margin + i * bar_width
+        height = chart_height * value / peak
+        if height:
+            pdf.rect(x + bar_width * 0.1, baseline - height, bar_width * 0.8, height, style="F")
+        if i % label_every == 0:
+            pdf.text(x, baseline + 4, _latin1(label))
+    pdf.set_y(baseline + 8)
+
+
+def render_admin_pdf(snapshot: Dict[str, Any]) -> bytes:
+    """Render the admin report from a pre-aggregated snapshot.
+
+    Pure function (no I/O, no event loop access) so it can run in a worker
+    thread or process.
+    """
+    from fpdf import FPDF
+
+    stats = snapshot['stats']
+    pdf = FPDF()
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, "Fal Gram Bot - Admin Report", new_x="LMARGIN", new_y="NEXT", align='C')
+    pdf.set_font("Helvetica", size=10)
+    pdf.cell(0, 6, f"Generated: {snapshot['generated_at']}", new_x="LMARGIN", new_y="NEXT", align='C')
+    pdf.ln(6)
+
+    pdf.set_font("Helvetica", size=12)
+    lines = [
+        f"Total Users: {stats['total_users']}",
+        f"Active Users: {stats['active_users']}",
+        f"Premium Users: {stats['premium_users']}",
+        f"New Users Today: {stats['new_users_today']}",
+        f"Total Revenue: {format_currency(stats['total_revenue'], 'TRY')}",
+        f"Revenue Today: {stats['revenue_today']} XTR",
+        f"Revenue This Month: {stats['revenue_month']} XTR",
+    ]
+    for line in lines:
+        pdf.cell(0, 8, _latin1(line), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    daily = snapshot['referrals_daily']
+    _bar_chart(pdf, f"Referrals per day (last {len(daily)} days)",
+               [(day[5:], count) for day, count in daily], label_every=5)
+    _bar_chart(pdf, "Referrals per month", [(m['month'], m['count']) for m in snapshot['referrals_monthly']])
+
+    revenue = snapshot['revenue_per_referral']
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, "Revenue per Referral (last 30d)", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=11)
+    pdf.cell(0, 7, f"Total Revenue: {revenue['total_revenue']} XTR", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 7, f"Total Referrals: {revenue['total_referrals']}", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 7, f"Avg / Referral: {revenue['avg_revenue_per_referral']} XTR", new_x="LMARGIN", new_y="NEXT")
+
+    return bytes(pdf.output())
+
+
+class ReportService:
+    """Caches admin reports per time bucket and renders them in a worker thread.
+
+    The expensive inputs are pre-aggregated and kept between reports: closed
+    days of the referral series never change, so after the first report only
+    today and yesterday are re-fetched.
+    """
+
+    def __init__(self, bucket_seconds: Optional[int] = None):
+        self.bucket_seconds = bucket_seconds or settings.REPORT_CACHE_SECONDS
+        self._cache: Dict[str, Tuple[int, bytes, datetime]] = {}
+        self._in_flight: Dict[Tuple[str, int], asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+        # Incrementally maintained referral series: 'YYYY-MM-DD' -> count
+        self._daily_referrals: Dict[str, int] = {}
+        self._daily_synced_on: Optional[str] = None
+
+    def _bucket(self) -> int:
+        return int(time.time() // self.bucket_seconds)
+
+    def spawn(self, coro: Awaitable[Any]) -> asyncio.Task:
+        """Run a delivery coroutine in the background, keeping a reference to it."""
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def get_admin_pdf(self, stats_loader: Callable[[], Awaitable[Dict[str, Any]]],
+                            force: bool = False) -> Tuple[bytes, datetime]:
+        """Return the admin PDF for the current bucket, generating it at most once.
+
+        Concurrent callers in the same bucket share one generation.
+        """
+        bucket = self._bucket()
+        cached = self._cache.get('admin')
+        if cached and cached[0] == bucket and not force:
+            record_cache('admin_report', True)
+            return cached[1], cached[2]
+        record_cache('admin_report', False)
+
+        key = ('admin', bucket)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_admin_pdf(bucket, stats_loader))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _generate_admin_pdf(self, bucket: int,
+                                  stats_loader: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[bytes, datetime]:
+        generated_at = datetime.now()
+        stats, daily, monthly, revenue = await asyncio.gather(
+            stats_loader(),
+            self._referral_series(),
+            db_service.get_referral_counts_by_month(months=6),
+            db_service.get_revenue_per_referral(days=30),
+        )
+        snapshot = {
+            'generated_at': generated_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'stats': stats,
+            'referrals_daily': daily,
+            'referrals_monthly': monthly,
+            'revenue_per_referral': revenue,
+        }
+
+        started = time.perf_counter()
+        pdf_data = await asyncio.to_thread(render_admin_pdf, snapshot)
+        REPORT_RENDER_SECONDS.observe(time.perf_counter() - started, report="admin")
+
+        self._cache['admin'] = (bucket, pdf_data, generated_at)
+        logger.info(f"Admin report generated ({len(pdf_data)} bytes)")
+        return pdf_data, generated_at
+
+    async def _referral_series(self) -> List[Tuple[str, int]]:
+        """Daily referral counts for the last DAILY_SERIES_DAYS days.
+
+        The first call loads the whole window; later calls only refresh
+        the days that can still change.
+        """
+        today = datetime.utcnow().date()
+        fetch_days = DAILY_SERIES_DAYS
+        if self._daily_synced_on:
+            since_sync = (today - datetime.fromisoformat(self._daily_synced_on).date()).days
+            fetch_days = min(DAILY_SERIES_DAYS, since_sync + 2)
+
+        rows = await db_service.get_referral_counts_by_day(days=fetch_days)
+        refreshed = {(today - timedelta(days=i)).isoformat(): 0 for i in range(fetch_days)}
+        refreshed.update({r['date']: r['count'] for r in rows if r.get('date') in refreshed})
+        self._daily_referrals.update(refreshed)
+        if db_service.is_connected():
+            self._daily_synced_on = today.isoformat()
+
+        window = [(today - timedelta(days=i)).isoformat() for i in range(DAILY_SERIES_DAYS - 1, -1, -1)]
+        # Drop days that fell out of the window
+        self._daily_referrals = {day: self._daily_referrals.get(day, 0) for day in window}
+        return [(day, self._daily_referrals[day]) for day in window]
+
+
+# Global report service instance
+report_service = ReportService()
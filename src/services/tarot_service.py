@@ -0,0 +1,249 @@
+"""
+Tarot service for the Fal Gram Bot.
+Full 78-card deck with per-language card tables and spread drawing.
+
+The canonical (English) deck lives in config/tarot_deck.json; locales may
+override names and meanings under `tarot.cards.<card id>`. A card in a
+spread is encoded as a single int, `index * 2 + reversed`, so a whole
+spread is a short tuple of ints that can be cached, stored and used as a key.
+
+Interpretations are cached per (spread, language, prompt version), so a
+spread only reaches the LLM once until the prompt template changes.
+"""
+
+import hashlib
+import json
+import os
+import random
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from config.settings import settings
+from src.services.ai_service import ai_service, NOT_GENERATED
+from src.services.prefetch_service import prefetch_service
+from src.services.reading_cache import ReadingCache
+from src.utils.i18n import i18n
+from src.utils.logger import get_logger
+
+logger = get_logger("tarot_service")
+
+DECK_FILE = os.path.join(settings.CONFIG_DIR, "tarot_deck.json")
+DECK_SIZE = 78
+
+# Spread type -> ordered position keys (labels in locales under tarot.positions)
+SPREADS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    'single': ('card',),
+    'three_card': ('past', 'present', 'future'),
+    'situation_challenge_advice': ('situation', 'challenge', 'advice'),
+    'relationship': ('you', 'partner', 'relationship', 'challenge', 'outcome'),
+    'celtic_cross': (
+        'present', 'crossing', 'foundation', 'recent_past', 'crown',
+        'near_future', 'self', 'environment', 'hopes_fears', 'outcome',
+    ),
+})
+
+DEFAULT_SPREAD_PROMPT = (
+    "You are an expert tarot reader. Provide a cohesive interpretation for the spread.\n\n"
+    "Include: overall theme, present situation, guidance, and a hopeful message."
+)
+
+
+def encode_card(index: int, reversed_: bool = False) -> int:
+    """Pack a deck index and orientation into one int."""
+    return index * 2 + (1 if reversed_ else 0)
+
+
+def decode_card(code: int) -> Tuple[int, bool]:
+    """Inverse of encode_card: (deck index, reversed)."""
+    return code >> 1, bool(code & 1)
+
+
+class Card(NamedTuple):
+    """A card as drawn, resolved against one language table."""
+    code: int
+    index: int
+    card_id: str
+    name: str
+    meaning: str
+    reversed: bool
+    position: str
+
+
+@dataclass(frozen=True)
+class Spread:
+    """A drawn spread: spread type plus encoded cards in position order."""
+    spread_type: str
+    codes: Tuple[int, ...]
+
+    @property
+    def key(self) -> str:
+        """Stable compact key, e.g. 'three_card:17.120.43'."""
+        return f"{self.spread_type}:{'.'.join(str(c) for c in self.codes)}"
+
+    @classmethod
+    def from_key(cls, key: str) -> "Spread":
+        spread_type, _, codes = key.partition(':')
+        if spread_type not in SPREADS:
+            raise ValueError(f"Unknown spread type: {spread_type}")
+        parsed = tuple(int(c) for c in codes.split('.')) if codes else ()
+        if len(parsed) != len(SPREADS[spread_type]) or any(not 0 <= c < DECK_SIZE * 2 for c in parsed):
+            raise ValueError(f"Invalid spread key: {key}")
+        return cls(spread_type, parsed)
+
+
+class TarotTable:
+    """Immutable, tuple-backed card table for one language."""
+
+    __slots__ = ('language', 'ids', 'names', 'upright', 'reversed', 'positions', 'reversed_label')
+
+    def __init__(self, language: str, ids: Sequence[str], names: Sequence[str], upright: Sequence[str],
+                 reversed_: Sequence[str], positions: Mapping[str, str], reversed_label: str):
+        self.language = language
+        self.ids = tuple(ids)
+        self.names = tuple(names)
+        self.upright = tuple(upright)
+        self.reversed = tuple(reversed_)
+        self.positions = MappingProxyType(dict(positions))
+        self.reversed_label = reversed_label
+
+    def card(self, code: int, position: str = '') -> Card:
+        index, is_reversed = decode_card(code)
+        return Card(
+            code=code,
+            index=index,
+            card_id=self.ids[index],
+            name=self.names[index],
+            meaning=self.reversed[index] if is_reversed else self.upright[index],
+            reversed=is_reversed,
+            position=self.positions.get(position, position),
+        )
+
+    def display_name(self, card: Card) -> str:
+        """Card name with the localized reversed marker."""
+        return f"{card.name} ({self.reversed_label})" if card.reversed else card.name
+
+
+class TarotService:
+    """Loads the deck once, builds per-language tables lazily and draws spreads."""
+
+    def __init__(self, deck_file: str = DECK_FILE):
+        self.deck_file = deck_file
+        self._deck: Optional[Tuple[dict, ...]] = None
+        self._tables: Dict[str, TarotTable] = {}
+        self._rng = random.Random()
+        self._listening = False
+        self.readings = ReadingCache("tarot_readings") if settings.READING_CACHE_ENABLED else None
+
+    def _load_deck(self) -> Tuple[dict, ...]:
+        if self._deck is None:
+            with open(self.deck_file, 'r', encoding='utf-8') as f:
+                cards = json.load(f)['cards']
+            if len(cards) != DECK_SIZE:
+                raise ValueError(f"Tarot deck must have {DECK_SIZE} cards, found {len(cards)}")
+            self._deck = tuple(cards)
+            logger.info(f"Loaded {len(cards)}-card tarot deck")
+        return self._deck
+
+    def _on_locales_reloaded(self, languages: List[str]) -> None:
+        # Swap in a new dict so concurrent readers never see a partial update
+        self._tables = {lang: table for lang, table in self._tables.items() if lang not in languages}
+
+    def table(self, language: str) -> TarotTable:
+        """Card table for a language (built on first use, rebuilt after locale reloads)."""
+        table = self._tables.get(language)
+        if table is not None:
+            return table
+
+        if not self._listening:
+            i18n.add_reload_listener(self._on_locales_reloaded)
+            self._listening = True
+
+        deck = self._load_deck()
+        localized = i18n.get_raw('tarot.cards', language)
+        localized = localized if isinstance(localized, dict) else {}
+        positions = i18n.get_raw('tarot.positions', language)
+        reversed_label = i18n.get_raw('tarot.reversed', language)
+
+        names, upright, reversed_ = [], [], []
+        for card in deck:
+            override = localized.get(card['id']) or {}
+            names.append(override.get('name') or card['name'])
+            upright.append(override.get('upright') or card['upright'])
+            reversed_.append(override.get('reversed') or card['reversed'])
+
+        table = TarotTable(
+            language,
+            [card['id'] for card in deck],
+            names,
+            upright,
+            reversed_,
+            positions if isinstance(positions, dict) else {},
+            reversed_label if isinstance(reversed_label, str) else "Reversed",
+        )
+        self._tables = {**self._tables, language: table}
+        return table
+
+    def draw(self, spread_type: str = 'three_card', allow_reversed: bool = True,
+             rng: Optional[random.Random] = None) -> Spread:
+        """Draw a spread without replacement.
+
+        random.sample is a partial Fisher-Yates shuffle over rejection-sampled
+        indices, so every ordered combination is equally likely; orientations
+        come from one getrandbits call.
+        """
+        positions = SPREADS.get(spread_type)
+        if positions is None:
+            raise ValueError(f"Unknown spread type: {spread_type}")
+        rng = rng or self._rng
+        count = len(positions)
+        indices = rng.sample(range(DECK_SIZE), count)
+        bits = rng.getrandbits(count) if allow_reversed else 0
+        return Spread(spread_type, tuple(encode_card(i, bool(bits >> n & 1)) for n, i in enumerate(indices)))
+
+    def resolve(self, spread: Spread, language: str) -> List[Card]:
+        """Localized cards of a spread, in position order."""
+        table = self.table(language)
+        return [table.card(code, position) for code, position in zip(spread.codes, SPREADS[spread.spread_type])]
+
+    async def prompt_template(self, language: str) -> str:
+        """Spread prompt from Supabase, then locales, then the built-in default."""
+        template = await prefetch_service.prompt('tarot_spread', language)
+        if not template:
+            template = i18n.get_text('tarot.spread_prompt', language)
+        if not template or template == 'tarot.spread_prompt':
+            template = DEFAULT_SPREAD_PROMPT
+        return template
+
+    def build_prompt(self, spread: Spread, language: str, template: str) -> str:
+        table = self.table(language)
+        cards = self.resolve(spread, language)
+        card_names = ", ".join(f"{card.position}: {table.display_name(card)}" for card in cards)
+        card_meanings = "; ".join(card.meaning for card in cards)
+        return f"{template}\n\nCards: {card_names}\nMeanings: {card_meanings}"
+
+    @staticmethod
+    def cache_key(spread: Spread, language: str, template: str) -> str:
+        """Cache key; the prompt version changes whenever the template text does."""
+        version = hashlib.sha1(template.encode('utf-8')).hexdigest()[:10]
+        return f"{spread.key}|{language}|{version}"
+
+    async def interpret(self, spread: Spread, language: str, user_id: int = 0) -> Optional[str]:
+        """LLM interpretation of a spread, served from the reading cache when possible."""
+        template = await self.prompt_template(language)
+        key = self.cache_key(spread, language, template)
+        if self.readings is not None:
+            cached = await self.readings.get(key)
+            if cached:
+                return cached
+
+        interpretation = await ai_service.generate_with_fallback(
+            user_id, self.build_prompt(spread, language, template), reading_type='tarot', language=language
+        )
+        if self.readings is not None and interpretation and interpretation not in NOT_GENERATED:
+            await self.readings.set(key, interpretation)
+        return interpretation
+
+
+# Global tarot service instance
+tarot_service = TarotService()
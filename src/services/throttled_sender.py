@@ -0,0 +1,214 @@
+"""
+Throttled sender for the Fal Gram Bot.
+Queues outbound Telegram messages and delivers them under Telegram's
+broadcast limits, so scheduled fan-outs never trip flood control.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from config.settings import settings
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics, OUTBOUND_QUEUE_DEPTH
+
+logger = get_logger("throttled_sender")
+
+MESSAGES_SENT = metrics.counter(
+    "falgram_outbound_messages_total", "Messages handled by throttled senders", ["sender", "result"]
+)
+
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+DROPPED = "dropped"
+
+_STOP = object()
+
+
+class ThrottledSender:
+    """Bounded queue drained by a few workers sharing one token bucket.
+
+    - The bucket refills at `rate` messages/s with at most `burst` tokens, so
+      sustained throughput stays below Telegram's ~30 msg/s bot limit.
+    - `RetryAfter` pauses the whole sender (flood control is per bot), then
+      the message is retried; timeouts/network errors are retried with back-off.
+    - Chats that blocked the bot are reported to `on_blocked` callbacks so
+      subscriptions can be cleaned up.
+    """
+
+    def __init__(self, name: str = "telegram_send", rate: Optional[float] = None, burst: Optional[int] = None,
+                 workers: Optional[int] = None, max_queue: Optional[int] = None, max_attempts: int = 3):
+        self.name = name
+        self.rate = rate or settings.SEND_RATE_PER_SECOND
+        self.burst = burst or max(1, int(self.rate))
+        self.workers = workers or settings.SEND_WORKERS
+        self.max_queue = max_queue or settings.SEND_QUEUE_SIZE
+        self.max_attempts = max_attempts
+
+        self.bot: Any = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._bucket_lock: Optional[asyncio.Lock] = None
+        self._on_blocked: List[Callable[[int], Any]] = []
+        self.stats: Dict[str, int] = {SENT: 0, BLOCKED: 0, FAILED: 0, DROPPED: 0}
+
+    @property
+    def depth(self) -> int:
+        """Messages waiting to be sent."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def add_blocked_listener(self, listener: Callable[[int], Any]) -> None:
+        """Register a callback (sync or async) invoked with chat ids that blocked the bot."""
+        if listener not in self._on_blocked:
+            self._on_blocked.append(listener)
+
+    def start(self, bot: Any) -> None:
+        """Start the workers on the running loop."""
+        if self._tasks:
+            return
+        self.bot = bot
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._bucket_lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker(), name=f"{self.name}-{n}") for n in range(self.workers)]
+        OUTBOUND_QUEUE_DEPTH.set_function(lambda: self.depth, queue=self.name)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Deliver what is queued (up to `timeout`) and stop the workers."""
+        if not self._tasks:
+            return
+        for _ in self._tasks:
+            # Sentinels queue behind pending messages; put_nowait may not fit in a full queue
+            await self._queue.put(_STOP)
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"{self.name}: stopped with {self.depth} message(s) undelivered")
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP and not item[3].done():
+                self._count(DROPPED)
+                item[3].set_result(DROPPED)
+        self._tasks = []
+        OUTBOUND_QUEUE_DEPTH.remove_function(queue=self.name)
+
+    def _count(self, result: str) -> None:
+        self.stats[result] += 1
+        MESSAGES_SENT.inc(sender=self.name, result=result)
+
+    def submit(self, chat_id: int, text: str, **kwargs: Any) -> Optional[asyncio.Future]:
+        """Queue a message without waiting. Returns a future with the result, or None if dropped."""
+        if self._queue is None or not self._tasks:
+            raise RuntimeError(f"{self.name} is not running")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((chat_id, text, kwargs, future))
+        except asyncio.QueueFull:
+            self._count(DROPPED)
+            return None
+        return future
+
+    async def send(self, chat_id: int, text: str, **kwargs: Any) -> str:
+        """Queue a message, waiting for queue space, and return its result."""
+        if self._queue is None or not self._tasks:
+            raise RuntimeError(f"{self.name} is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((chat_id, text, kwargs, future))
+        return await future
+
+    async def send_all(self, messages: List[Tuple[int, str, Dict[str, Any]]]) -> List[str]:
+        """Queue (chat_id, text, kwargs) messages with back-pressure; returns each result in order."""
+        futures = []
+        for chat_id, text, kwargs in messages:
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((chat_id, text, kwargs, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def send_many(self, messages: List[Tuple[int, str, Dict[str, Any]]]) -> Dict[str, int]:
+        """Like send_all, but returns counts per result."""
+        counts: Dict[str, int] = {}
+        for result in await self.send_all(messages):
+            counts[result] = counts.get(result, 0) + 1
+        return counts
+
+    async def _acquire(self) -> None:
+        """Take one token, sleeping until it is available (and any flood pause is over)."""
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+                self._refilled_at = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            chat_id, text, kwargs, future = item
+            try:
+                result = await self._deliver(chat_id, text, kwargs)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"{self.name}: unexpected error sending to {chat_id}: {e}")
+                result = FAILED
+            self._count(result)
+            if not future.done():
+                future.set_result(result)
+
+    async def _deliver(self, chat_id: int, text: str, kwargs: Dict[str, Any]) -> str:
+        for attempt in range(1, self.max_attempts + 1):
+            await self._acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                return SENT
+            except RetryAfter as e:
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                logger.warning(f"{self.name}: flood control, pausing {retry_after}s")
+                self._paused_until = max(self._paused_until, time.monotonic() + float(retry_after))
+            except Forbidden:
+                await self._notify_blocked(chat_id)
+                return BLOCKED
+            except BadRequest as e:
+                logger.error(f"{self.name}: rejected message to {chat_id}: {e}")
+                return FAILED
+            except (TimedOut, NetworkError) as e:
+                if attempt == self.max_attempts:
+                    logger.error(f"{self.name}: giving up on {chat_id} after {attempt} attempts: {e}")
+                    return FAILED
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        return FAILED
+
+    async def _notify_blocked(self, chat_id: int) -> None:
+        for listener in list(self._on_blocked):
+            try:
+                result = listener(chat_id)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"{self.name}: blocked listener failed: {e}")
+
+
+# Global sender for scheduled/broadcast messages
+throttled_sender = ThrottledSender()
@@ -0,0 +1,314 @@
+"""
+Web server for the Fal Gram Bot.
+Serves the Telegram webhook, health, status and metrics endpoints on the
+bot's own asyncio loop (replaces the old Flask thread in app.py).
+"""
+
+import asyncio
+import hmac
+import json
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from config.settings import settings
+from src.services.generation_profiles import generation_profiles, usage_stats
+from src.services.llm_governor import llm_governor
+from src.services.model_router import model_router
+from src.services.prefetch_service import prefetch_service
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics, OUTBOUND_QUEUE_DEPTH
+
+logger = get_logger("web_server")
+
+WEBHOOK_UPDATES = metrics.counter(
+    "falgram_webhook_updates_total", "Webhook updates by outcome", ["result"]
+)
+WEBHOOK_IN_FLIGHT = metrics.gauge(
+    "falgram_webhook_in_flight_updates", "Webhook updates currently being processed"
+)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+class WebhookServer:
+    """aiohttp server feeding Telegram updates into a PTB Application.
+
+    Incoming updates are acknowledged immediately and put on a bounded queue
+    drained by a fixed pool of workers, so at most `max_concurrent_updates`
+    updates are processed at once. When the queue is full the server answers
+    503 with Retry-After, which makes Telegram redeliver the update later
+    instead of it being dropped.
+    """
+
+    def __init__(
+        self,
+        application: Optional[Application] = None,
+        host: str = "0.0.0.0",
+        port: Optional[int] = None,
+        webhook_path: Optional[str] = None,
+        secret_token: Optional[str] = None,
+        max_concurrent_updates: Optional[int] = None,
+        max_pending_updates: Optional[int] = None,
+    ):
+        self.application = application
+        self.host = host
+        self.port = port or settings.PORT
+        self.webhook_path = webhook_path
+        self.secret_token = secret_token
+        self.max_concurrent_updates = max_concurrent_updates or settings.WEBHOOK_MAX_CONCURRENT_UPDATES
+        self.max_pending_updates = max_pending_updates or settings.WEBHOOK_MAX_PENDING_UPDATES
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._runner: Optional[web.AppRunner] = None
+        self._accepting = False
+        self._in_flight = 0
+        self.started_at: Optional[float] = None
+        self.stats: Dict[str, int] = {
+            'received': 0,
+            'processed': 0,
+            'failed': 0,
+            'rejected_full': 0,
+            'rejected_draining': 0,
+            'unauthorized': 0,
+        }
+
+    def _count(self, result: str) -> None:
+        self.stats[result] += 1
+        WEBHOOK_UPDATES.inc(result=result)
+
+    @property
+    def pending_updates(self) -> int:
+        """Number of updates waiting for a worker."""
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of updates currently being processed."""
+        return self._in_flight
+
+    def _build_app(self) -> web.Application:
+        """Create the aiohttp application with all routes."""
+        app = web.Application(client_max_size=settings.WEBHOOK_MAX_BODY_SIZE)
+        app.router.add_get('/', self.handle_home)
+        app.router.add_get('/health', self.handle_health)
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_get('/status', self.handle_status)
+        app.router.add_get('/ai-usage', self.handle_ai_usage)
+        if self.application is not None and self.webhook_path:
+            app.router.add_post(self.webhook_path, self.handle_webhook)
+        return app
+
+    async def start(self) -> None:
+        """Start workers and begin listening."""
+        self._queue = asyncio.Queue(maxsize=self.max_pending_updates)
+        if self.application is not None and self.webhook_path:
+            self._workers = [
+                asyncio.create_task(self._worker(i), name=f"webhook-worker-{i}")
+                for i in range(self.max_concurrent_updates)
+            ]
+
+        self._runner = web.AppRunner(self._build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+        if self._workers:
+            OUTBOUND_QUEUE_DEPTH.set_function(lambda: self.pending_updates, queue="webhook_updates")
+            WEBHOOK_IN_FLIGHT.set_function(lambda: self._in_flight)
+
+        self._accepting = True
+        self.started_at = time.monotonic()
+        logger.info(
+            f"Web server listening on {self.host}:{self.port} "
+            f"(webhook={'on' if self._workers else 'off'}, workers={len(self._workers)}, "
+            f"queue={self.max_pending_updates})"
+        )
+
+    async def stop(self, drain_timeout: Optional[float] = None) -> None:
+        """Stop accepting updates, drain the queue, then shut the server down.
+
+        Args:
+            drain_timeout: Seconds to wait for queued/in-flight updates (defaults to settings)
+        """
+        drain_timeout = settings.WEBHOOK_DRAIN_TIMEOUT if drain_timeout is None else drain_timeout
+        self._accepting = False
+
+        if self._workers and self._queue is not None:
+            pending = self.pending_updates + self._in_flight
+            logger.info(f"Draining {pending} webhook update(s) (timeout {drain_timeout}s)")
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Drain timed out with {self.pending_updates} queued and "
+                    f"{self._in_flight} in-flight update(s)"
+                )
+            for task in self._workers:
+                task.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+            OUTBOUND_QUEUE_DEPTH.remove_function(queue="webhook_updates")
+            WEBHOOK_IN_FLIGHT.remove_function()
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        logger.info("Web server stopped")
+
+    async def _worker(self, index: int) -> None:
+        """Process queued updates one at a time."""
+        while True:
+            update = await self._queue.get()
+            self._in_flight += 1
+            try:
+                await self.application.process_update(update)
+                self._count('processed')
+            except Exception as e:
+                self._count('failed')
+                logger.error(f"Error processing update {getattr(update, 'update_id', '?')}: {e}")
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    def _unavailable(self, reason: str) -> web.Response:
+        """503 with Retry-After so Telegram redelivers the update."""
+        return web.json_response(
+            {'status': 'unavailable', 'reason': reason},
+            status=503,
+            headers={'Retry-After': str(settings.WEBHOOK_RETRY_AFTER)}
+        )
+
+    async def handle_webhook(self, request: web.Request) -> web.Response:
+        """Telegram webhook endpoint."""
+        if not self._accepting:
+            self._count('rejected_draining')
+            return self._unavailable('draining')
+
+        if self.secret_token:
+            supplied = request.headers.get(SECRET_HEADER, '')
+            if not hmac.compare_digest(supplied, self.secret_token):
+                self._count('unauthorized')
+                return web.json_response({'error': 'unauthorized'}, status=403)
+
+        if self._queue.full():
+            self._count('rejected_full')
+            return self._unavailable('busy')
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            return web.json_response({'error': 'invalid payload'}, status=400)
+
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self._count('rejected_full')
+            return self._unavailable('busy')
+
+        self._count('received')
+        return web.json_response({'status': 'received'})
+
+    async def handle_home(self, request: web.Request) -> web.Response:
+        """Bot status summary."""
+        return web.json_response({
+            'message': f"{settings.BOT_NAME} is running!",
+            'version': settings.BOT_VERSION,
+            'status': 'active',
+            'timestamp': datetime.now().isoformat(),
+            'environment': settings.ENVIRONMENT
+        })
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """Render.com health check endpoint."""
+        health_status: Dict[str, Any] = {
+            'status': 'healthy' if self._accepting else 'draining',
+            'bot_status': 'running' if self.application is not None else 'not_initialized',
+            'timestamp': datetime.now().isoformat(),
+            'environment': settings.ENVIRONMENT
+        }
+
+        missing_vars = [
+            var for var in ('BOT_TOKEN', 'GEMINI_API_KEY', 'SUPABASE_URL', 'SUPABASE_KEY')
+            if not getattr(settings, var)
+        ]
+        if missing_vars:
+            health_status['status'] = 'warning'
+            health_status['missing_vars'] = missing_vars
+
+        return web.json_response(health_status, status=200 if self._accepting else 503)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Prometheus metrics in text exposition format."""
+        return web.Response(
+            body=metrics.render().encode('utf-8'),
+            headers={'Content-Type': metrics.CONTENT_TYPE}
+        )
+
+    def _admin_denied(self, request: web.Request) -> Optional[web.Response]:
+        """403 unless the request carries the admin token (open only outside production when unset)."""
+        token = settings.ADMIN_API_TOKEN or settings.WEBHOOK_SECRET
+        if not token:
+            if settings.ENVIRONMENT != 'production':
+                return None
+            return web.json_response({'error': 'admin token not configured'}, status=403)
+
+        supplied = request.headers.get(ADMIN_TOKEN_HEADER, '')
+        authorization = request.headers.get('Authorization', '')
+        if authorization.startswith('Bearer '):
+            supplied = authorization[len('Bearer '):]
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return web.json_response({'error': 'unauthorized'}, status=403)
+        return None
+
+    async def handle_status(self, request: web.Request) -> web.Response:
+        """Detailed bot status (admin token required)."""
+        denied = self._admin_denied(request)
+        if denied is not None:
+            return denied
+        return web.json_response({
+            'bot': {
+                'status': 'running' if self.application is not None else 'not_initialized',
+                'version': settings.BOT_VERSION
+            },
+            'database': {'status': 'connected' if settings.SUPABASE_URL else 'not_configured'},
+            'ai': {'status': 'configured' if settings.GEMINI_API_KEY else 'not_configured'},
+            'payment': {'status': 'configured' if settings.PAYMENT_PROVIDER_TOKEN else 'not_configured'},
+            'webhook': self.get_metrics(),
+            'prefetch': prefetch_service.report(),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    async def handle_ai_usage(self, request: web.Request) -> web.Response:
+        """Per-reading-type size/latency percentiles, active profiles, routing and concurrency state (admin token required)."""
+        denied = self._admin_denied(request)
+        if denied is not None:
+            return denied
+        return web.json_response({
+            'usage': usage_stats.report(),
+            'profiles': generation_profiles.describe(),
+            'routing': model_router.describe(),
+            'concurrency': llm_governor.describe(),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue and throughput counters."""
+        return {
+            'uptime_seconds': round(time.monotonic() - self.started_at, 1) if self.started_at else 0,
+            'version': settings.BOT_VERSION,
+            'accepting': self._accepting,
+            'pending_updates': self.pending_updates,
+            'in_flight_updates': self._in_flight,
+            'max_concurrent_updates': self.max_concurrent_updates,
+            'max_pending_updates': self.max_pending_updates,
+            **self.stats
+        }
@@ -0,0 +1,224 @@
+"""
+Weekly report service for the Fal Gram Bot.
+Generates the premium weekly astrology reports stored in `weekly_reports`.
+
+A report depends only on the user's sun sign, language and week, so users
+are grouped by those inputs and each group is generated once (12 signs per
+language at most) with a bounded number of concurrent LLM calls. Generated
+texts are kept in a ReadingCache and results are written with one bulk
+upsert per page of users. A checkpoint file records the last fully written
+user id, so an interrupted run resumes from there without regenerating
+anything already produced.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from src.services.ai_service import ai_service, NOT_GENERATED
+from src.services.database import db_service, premium_active
+from src.services.reading_cache import ReadingCache
+from src.utils.helpers import get_zodiac_sign
+from src.utils.i18n import i18n
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger("weekly_report_service")
+
+WEEKLY_REPORTS = metrics.counter(
+    "falgram_weekly_reports_total", "Weekly reports written by the batch job", ["result"]
+)
+
+REPORT_TYPE = 'astrology'
+
+Group = Tuple[str, str]  # (sign, language)
+
+
+def week_start(day: Optional[date] = None) -> date:
+    """Monday of the week containing `day` (default: today)."""
+    day = day or date.today()
+    return day - timedelta(days=day.weekday())
+
+
+def _sign(birth_date: Any) -> Optional[str]:
+    try:
+        return get_zodiac_sign(datetime.fromisoformat(str(birth_date)[:10]))
+    except (TypeError, ValueError):
+        return None
+
+
+class WeeklyReportService:
+    """Batch generator: group by shared inputs, generate once, bulk upsert, checkpoint."""
+
+    def __init__(self):
+        self.readings = ReadingCache("weekly_reports") if settings.READING_CACHE_ENABLED else None
+        self._templates: Dict[str, str] = {}
+        # The locale fallback prompt is cached per language; drop it when locales reload
+        i18n.add_reload_listener(self._on_locales_reloaded)
+
+    def _on_locales_reloaded(self, languages: List[str]) -> None:
+        self._templates = {lang: t for lang, t in self._templates.items() if lang not in languages}
+
+    # Checkpoint
+
+    @staticmethod
+    def checkpoint_path(week: date) -> str:
+        return os.path.join(settings.CACHE_DIR, f"weekly_reports_{week.isoformat()}_{REPORT_TYPE}.json")
+
+    def load_checkpoint(self, week: date) -> Dict[str, Any]:
+        try:
+            with open(self.checkpoint_path(week), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'after_id': 0, 'done': False}
+
+    def save_checkpoint(self, week: date, after_id: int, done: bool = False) -> None:
+        path = self.checkpoint_path(week)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'after_id': after_id, 'done': done, 'updated_at': datetime.utcnow().isoformat()}, f)
+        os.replace(tmp, path)
+
+    def reset_checkpoint(self, week: date) -> None:
+        try:
+            os.remove(self.checkpoint_path(week))
+        except OSError:
+            pass
+
+    # Generation
+
+    async def prompt_template(self, language: str) -> str:
+        if language not in self._templates:
+            template = await db_service.get_prompt('weekly_horoscope', language)
+            self._templates[language] = template or i18n.get_text("astrology.weekly_horoscope_prompt", language)
+        return self._templates[language]
+
+    @staticmethod
+    def build_prompt(template: str, sign: str, week: date) -> str:
+        return template.replace('{sign}', sign).replace('{week_start}', week.isoformat()).replace('{username}', '')
+
+    @staticmethod
+    def cache_key(sign: str, language: str, week: date, template: str) -> str:
+        version = hashlib.sha1(template.encode('utf-8')).hexdigest()[:10]
+        return f"{sign}|{language}|{week.isoformat()}|{version}"
+
+    async def report(self, sign: str, language: str, week: date) -> Optional[str]:
+        """Report text for one (sign, language, week) group, generated only on a cache miss."""
+        template = await self.prompt_template(language)
+        key = self.cache_key(sign, language, week, template)
+        if self.readings is not None:
+            cached = await self.readings.get(key)
+            if cached:
+                return cached
+
+        text = await ai_service.generate_with_fallback(
+            0, self.build_prompt(template, sign, week), reading_type='weekly_horoscope', language=language,
+            plan='premium'
+        )
+        if not text or text in NOT_GENERATED:
+            return None
+        if self.readings is not None:
+            await self.readings.set(key, text)
+        return text
+
+    async def _generate(self, groups: List[Group], week: date, semaphore: asyncio.Semaphore) -> Dict[Group, str]:
+        """Generate each group with at most the semaphore's worth of LLM calls in flight."""
+        async def one(group: Group) -> Tuple[Group, Optional[str]]:
+            async with semaphore:
+                try:
+                    return group, await self.report(group[0], group[1], week)
+                except Exception as e:
+                    logger.error(f"Weekly report for {group[0]}/{group[1]} failed: {e}")
+                    return group, None
+
+        results = await asyncio.gather(*(one(group) for group in groups))
+        return {group: text for group, text in results if text}
+
+    # Batch job
+
+    async def run(self, week: Optional[date] = None, concurrency: int = 4, page_size: int = 500,
+                  restart: bool = False) -> Dict[str, Any]:
+        """Write this week's report for every active premium user, resuming from the checkpoint.
+
+        A page whose reports could not all be generated is written partially and the
+        run stops without moving the checkpoint past it, so a re-run retries it.
+        """
+        week = week_start(week)
+        if restart:
+            self.reset_checkpoint(week)
+        checkpoint = self.load_checkpoint(week)
+        counts = {'written': 0, 'skipped': 0, 'failed': 0, 'groups': 0}
+        if checkpoint.get('done'):
+            logger.info(f"Weekly reports for {week} already complete")
+            return {'week': week.isoformat(), 'resumed_from': checkpoint.get('after_id', 0), 'complete': True, **counts}
+
+        after_id = int(checkpoint.get('after_id') or 0)
+        resumed_from = after_id
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        texts: Dict[Group, str] = {}
+        started = time.monotonic()
+        complete = True
+
+        while True:
+            page = await db_service.get_premium_users_page(after_id, page_size)
+            if not page:
+                break
+
+            members: Dict[Group, List[int]] = {}
+            now = datetime.utcnow()
+            for user in page:
+                sign = _sign(user.get('birth_date'))
+                if sign is None or not premium_active(user, now):
+                    counts['skipped'] += 1
+                    continue
+                language = user.get('language') or settings.DEFAULT_LANGUAGE
+                members.setdefault((sign, language), []).append(user['id'])
+
+            missing = [group for group in members if group not in texts]
+            generated = await self._generate(missing, week, semaphore)
+            texts.update(generated)
+            counts['groups'] += len(generated)
+
+            created_at = datetime.utcnow().isoformat()
+            rows = []
+            for group, user_ids in members.items():
+                if group not in texts:
+                    counts['failed'] += len(user_ids)
+                    continue
+                rows.extend(
+                    {'user_id': user_id, 'week_start': week.isoformat(), 'report_type': REPORT_TYPE,
+                     'report_content': texts[group], 'created_at': created_at}
+                    for user_id in user_ids
+                )
+
+            if rows and not await db_service.upsert_weekly_reports(rows):
+                counts['failed'] += len(rows)
+                complete = False
+                break
+            counts['written'] += len(rows)
+            if counts['failed']:
+                complete = False
+                break
+            after_id = page[-1]['id']
+            self.save_checkpoint(week, after_id)
+
+        if complete:
+            self.save_checkpoint(week, after_id, done=True)
+        for result in ('written', 'skipped', 'failed'):
+            if counts[result]:
+                WEEKLY_REPORTS.inc(counts[result], result=result)
+        logger.info(
+            f"Weekly reports {week}: {counts} in {time.monotonic() - started:.1f}s "
+            f"(resumed after user {resumed_from}, {'complete' if complete else 'incomplete'})"
+        )
+        return {'week': week.isoformat(), 'resumed_from': resumed_from, 'complete': complete, **counts}
+
+
+# Global weekly report service instance
+weekly_report_service = WeeklyReportService()
@@ -0,0 +1,332 @@
+"""
+Local astronomy engine for the Fal Gram Bot.
+
+Computes tropical longitudes for a birth chart so the LLM only has to
+narrate placements instead of inventing them:
+
+- Sun and planets: JPL Keplerian elements (Standish, valid 1800-2050,
+  well under a degree for the inner planets), solved for all bodies at
+  once with NumPy, then made geocentric and precessed to the equinox of date
+- Moon: the main terms of Meeus ch. 47 (~0.1 degree)
+- Ascendant / Midheaven: from local sidereal time and latitude
+
+Birth places resolve through config/cities.json (coordinates + IANA time
+zone). Unknown places or times still give a chart, just without angles.
+"""
+
+import json
+import math
+import os
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date as date_cls, datetime, time as time_cls, timezone
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from config.settings import settings
+from src.utils.logger import get_logger
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+logger = get_logger("astro_engine")
+
+CITIES_FILE = os.path.join(settings.CONFIG_DIR, "cities.json")
+
+J2000 = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+# General precession in longitude, degrees per Julian century
+PRECESSION = 1.3969713
+
+SIGNS: Tuple[str, ...] = (
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces",
+)
+
+# Keplerian elements at J2000 and rates per century:
+# a (AU), e, I, L, long. perihelion, long. ascending node (degrees)
+PLANETS: Tuple[str, ...] = ("Mercury", "Venus", "Earth", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune", "Pluto")
+_ELEMENTS = (
+    (0.38709927, 0.20563593, 7.00497902, 252.25032350, 77.45779628, 48.33076593),
+    (0.72333566, 0.00677672, 3.39467605, 181.97909950, 131.60246718, 76.67984255),
+    (1.00000261, 0.01671123, -0.00001531, 100.46457166, 102.93768193, 0.0),
+    (1.52371034, 0.09339410, 1.84969142, -4.55343205, -23.94362959, 49.55953891),
+    (5.20288700, 0.04838624, 1.30439695, 34.39644051, 14.72847983, 100.47390909),
+    (9.53667594, 0.05386179, 2.48599187, 49.95424423, 92.59887831, 113.66242448),
+    (19.18916464, 0.04725744, 0.77263783, 313.23810451, 170.95427630, 74.01692503),
+    (30.06992276, 0.00859048, 1.77004347, -55.12002969, 44.96476227, 131.78422574),
+    (39.48211675, 0.24882730, 17.14001206, 238.92903833, 224.06891629, 110.30393684),
+)
+_RATES = (
+    (0.00000037, 0.00001906, -0.00594749, 149472.67411175, 0.16047689, -0.12534081),
+    (0.00000390, -0.00004107, -0.00078890, 58517.81538729, 0.00268329, -0.27769418),
+    (0.00000562, -0.00004392, -0.01294668, 35999.37244981, 0.32327364, 0.0),
+    (0.00001847, 0.00007882, -0.00813131, 19140.30268499, 0.44441088, -0.29257343),
+    (-0.00011607, -0.00013253, -0.00183714, 3034.74612775, 0.21252668, 0.20469106),
+    (-0.00125060, -0.00050991, 0.00193609, 1222.49362201, -0.41897216, -0.28867794),
+    (-0.00196176, -0.00004397, -0.00242939, 428.48202785, 0.40805281, 0.04240589),
+    (0.00026291, 0.00005105, 0.00035372, 218.45945325, -0.32241464, -0.00508664),
+    (-0.00031596, 0.00005170, 0.00004818, 145.20780515, -0.04062942, -0.01183482),
+)
+_EARTH = PLANETS.index("Earth")
+
+# Meeus ch. 47 longitude terms: (D, M, M', F multipliers, coefficient in 1e-6 degrees)
+_MOON_TERMS = (
+    (0, 0, 1, 0, 6288774), (2, 0, -1, 0, 1274027), (2, 0, 0, 0, 658314),
+    (0, 0, 2, 0, 213618), (0, 1, 0, 0, -185116), (0, 0, 0, 2, -114332),
+    (2, 0, -2, 0, 58793), (2, -1, -1, 0, 57066), (2, 0, 1, 0, 53322),
+    (2, -1, 0, 0, 45758), (0, 1, -1, 0, -40923), (1, 0, 0, 0, -34720),
+    (0, 1, 1, 0, -30383), (2, 0, 0, -2, 15327), (0, 0, 1, 2, -12528),
+    (0, 0, 1, -2, 10980), (4, 0, -1, 0, 10675), (0, 0, 3, 0, 10034),
+    (4, 0, -2, 0, 8548), (2, 1, -1, 0, -7888), (2, 1, 0, 0, -6766),
+    (1, 0, -1, 0, -5163), (1, 1, 0, 0, 4987), (2, -1, 1, 0, 4036),
+)
+
+
+class Placement(NamedTuple):
+    """A body (or angle) at a tropical ecliptic longitude."""
+    body: str
+    longitude: float
+    retrograde: bool = False
+    house: Optional[int] = None
+
+    @property
+    def sign(self) -> str:
+        return SIGNS[int(self.longitude // 30) % 12]
+
+    def describe(self) -> str:
+        degrees = self.longitude % 30
+        text = f"{self.body}: {int(degrees)}°{int(degrees % 1 * 60):02d}' {self.sign}"
+        if self.retrograde:
+            text += " (R)"
+        if self.house:
+            text += f", house {self.house}"
+        return text
+
+
+class City(NamedTuple):
+    name: str
+    lat: float
+    lon: float
+    tz: str
+
+
+@dataclass(frozen=True)
+class BirthChart:
+    """Computed placements for one birth moment/place."""
+    moment_utc: datetime
+    placements: Tuple[Placement, ...]
+    ascendant: Optional[Placement] = None
+    midheaven: Optional[Placement] = None
+    city: Optional[City] = None
+    time_known: bool = False
+    notes: Tuple[str, ...] = field(default_factory=tuple)
+
+    def placement(self, body: str) -> Optional[Placement]:
+        return next((p for p in self.placements if p.body == body), None)
+
+    def summary(self) -> str:
+        """Compact, prompt-ready list of placements."""
+        lines = [p.describe() for p in self.placements]
+        if self.ascendant:
+            lines.append(self.ascendant.describe())
+            lines.append(self.midheaven.describe())
+        lines.extend(self.notes)
+        return "\n".join(lines)
+
+
+def _fold(text: str) -> str:
+    """Case/diacritic-insensitive form of a place name ('İzmir' -> 'izmir')."""
+    text = text.replace('ı', 'i').replace('İ', 'I')
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold().strip()
+
+
+@lru_cache(maxsize=1)
+def _city_index() -> Dict[str, City]:
+    try:
+        with open(CITIES_FILE, 'r', encoding='utf-8') as f:
+            rows = json.load(f)['cities']
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"City table unavailable ({CITIES_FILE}): {e}")
+        return {}
+    index = {}
+    for row in rows:
+        city = City(row['name'], float(row['lat']), float(row['lon']), row['tz'])
+        for alias in [row['name'], *row.get('aliases', [])]:
+            index[_fold(alias)] = city
+    return index
+
+
+@lru_cache(maxsize=4096)
+def find_city(place: str) -> Optional[City]:
+    """Resolve a free-text birth place ('Izmir', 'Estambul, Turquía') to a known city."""
+    if not place:
+        return None
+    index = _city_index()
+    folded = _fold(place)
+    if folded in index:
+        return index[folded]
+    for part in folded.replace('/', ',').replace('-', ',').split(','):
+        city = index.get(part.strip())
+        if city is not None:
+            return city
+    return None
+
+
+def julian_day(moment: datetime) -> float:
+    """Julian Day (UT) of an aware datetime."""
+    return moment.timestamp() / 86400.0 + UNIX_EPOCH_JD
+
+
+def _delta_t_days(jd: float) -> float:
+    t = (jd - J2000) / 365.25
+    return (62.92 + 0.32217 * t + 0.005589 * t * t) / 86400.0
+
+
+def planet_longitudes(jd: float) -> Tuple[Any, float]:
+    """Geocentric tropical longitudes of all non-Earth PLANETS and the Sun."""
+    t = (jd + _delta_t_days(jd) - J2000) / 36525.0
+    elements = np.asarray(_ELEMENTS) + np.asarray(_RATES) * t
+    a, e, inc, mean_long, peri, node = elements.T
+    inc, node = np.radians(inc), np.radians(node)
+    omega = np.radians(peri) - node
+    m = np.radians((mean_long - peri) % 360.0)
+
+    # Kepler's equation, Newton iterations for every planet at once
+    ecc = m + e * np.sin(m)
+    for _ in range(6):
+        ecc -= (ecc - e * np.sin(ecc) - m) / (1.0 - e * np.cos(ecc))
+
+    xp = a * (np.cos(ecc) - e)
+    yp = a * np.sqrt(1.0 - e * e) * np.sin(ecc)
+    cw, sw, cn, sn, ci = np.cos(omega), np.sin(omega), np.cos(node), np.sin(node), np.cos(inc)
+    x = (cw * cn - sw * sn * ci) * xp + (-sw * cn - cw * sn * ci) * yp
+    y = (cw * sn + sw * cn * ci) * xp + (-sw * sn + cw * cn * ci) * yp
+
+    precession = PRECESSION * t
+    geo = np.degrees(np.arctan2(y - y[_EARTH], x - x[_EARTH])) + precession
+    sun = math.degrees(math.atan2(-y[_EARTH], -x[_EARTH])) + precession
+    return np.delete(geo % 360.0, _EARTH), sun % 360.0
+
+
+def moon_longitude(jd: float) -> Tuple[float, float]:
+    """Tropical longitude of the Moon and of its mean north node."""
+    t = (jd + _delta_t_days(jd) - J2000) / 36525.0
+    mean_long = 218.3164477 + 481267.88123421 * t
+    d = math.radians(297.8501921 + 445267.1114034 * t)
+    m = math.radians(357.5291092 + 35999.0502909 * t)
+    mp = math.radians(134.9633964 + 477198.8675055 * t)
+    f = math.radians(93.2720950 + 483202.0175233 * t)
+    ecc = 1.0 - 0.002516 * t
+    total = 0.0
+    for cd, cm, cmp, cf, coeff in _MOON_TERMS:
+        total += coeff * ecc ** abs(cm) * math.sin(cd * d + cm * m + cmp * mp + cf * f)
+    node = 125.0445479 - 1934.1362891 * t
+    return (mean_long + total / 1e6) % 360.0, node % 360.0
+
+
+def angles(jd: float, lat: float, lon: float) -> Tuple[float, float]:
+    """Ascendant and Midheaven longitudes for a place (east longitude positive)."""
+    t = (jd - J2000) / 36525.0
+    gmst = 280.46061837 + 360.98564736629 * (jd - J2000) + 0.000387933 * t * t
+    ramc = math.radians((gmst + lon) % 360.0)
+    eps = math.radians(23.4392911 - 0.0130042 * t)
+    phi = math.radians(lat)
+    asc = math.degrees(math.atan2(math.cos(ramc), -(math.sin(ramc) * math.cos(eps) + math.tan(phi) * math.sin(eps))))
+    mc = math.degrees(math.atan2(math.sin(ramc), math.cos(ramc) * math.cos(eps)))
+    return asc % 360.0, mc % 360.0
+
+
+def _parse_time(value: Any) -> Optional[time_cls]:
+    if isinstance(value, time_cls):
+        return value
+    if not value or not isinstance(value, str):
+        return None
+    for fmt in ("%H:%M", "%H:%M:%S", "%H.%M"):
+        try:
+            return datetime.strptime(value.strip(), fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_date(value: Any) -> Optional[date_cls]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_cls):
+        return value
+    if isinstance(value, str) and value:
+        for parse in (lambda v: datetime.fromisoformat(v[:10]), lambda v: datetime.strptime(v[:10], "%d.%m.%Y")):
+            try:
+                return parse(value).date()
+            except ValueError:
+                continue
+    return None
+
+
+def compute_chart(birth_date: Any, birth_time: Any = None, birth_place: Optional[str] = None) -> Optional[BirthChart]:
+    """Birth chart from stored birth data; None if the date is unusable or NumPy is missing."""
+    if not NUMPY_AVAILABLE:
+        return None
+    day = _parse_date(birth_date)
+    if day is None:
+        return None
+
+    at = _parse_time(birth_time)
+    city = find_city(birth_place) if isinstance(birth_place, str) else None
+    time_known = at is not None
+    notes = []
+    if not time_known:
+        at = time_cls(12, 0)
+        notes.append("Birth time unknown: noon used, Moon within ~7°, no rising sign or houses")
+    tz = ZoneInfo(city.tz) if city and ZoneInfo else timezone.utc
+    if city is None:
+        notes.append("Birth place not recognised: UTC used, no rising sign or houses")
+    local = datetime.combine(day, at).replace(tzinfo=tz)
+    jd = julian_day(local)
+
+    # Longitudes half a day either side give direction of motion (retrogrades)
+    lon_now, sun = planet_longitudes(jd)
+    lon_before, _ = planet_longitudes(jd - 0.5)
+    motion = (lon_now - lon_before + 540.0) % 360.0 - 180.0
+    moon, node = moon_longitude(jd)
+
+    ascendant = midheaven = None
+    if time_known and city is not None:
+        asc, mc = angles(jd, city.lat, city.lon)
+        ascendant = Placement("Ascendant", asc)
+        midheaven = Placement("Midheaven", mc)
+
+    def house(longitude: float) -> Optional[int]:
+        # Whole-sign houses counted from the rising sign
+        if ascendant is None:
+            return None
+        return (int(longitude // 30) - int(ascendant.longitude // 30)) % 12 + 1
+
+    bodies = [("Sun", sun, False), ("Moon", moon, False)]
+    bodies += [
+        (name, float(longitude), bool(speed < 0))
+        for name, longitude, speed in zip((p for p in PLANETS if p != "Earth"), lon_now, motion)
+    ]
+    bodies.append(("North Node", node, True))
+    placements = tuple(Placement(name, longitude, retro, house(longitude)) for name, longitude, retro in bodies)
+
+    return BirthChart(
+        moment_utc=local.astimezone(timezone.utc),
+        placements=placements,
+        ascendant=ascendant,
+        midheaven=midheaven,
+        city=city,
+        time_known=time_known,
+        notes=tuple(notes),
+    )
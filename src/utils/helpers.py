@@ -28,53 +28,21 @@ def calculate_moon_phase(date: datetime = None) -> Dict[str, Any]:
     Returns:
         Dictionary with moon phase information
     """
+    from src.utils.moon_ephemeris import moon_ephemeris
+    
     if not date:
         date = datetime.now()
     
-    # Simple moon phase calculation (approximate)
-    # This is a simplified version - for more accuracy, use astronomical libraries
-    
-    # Moon phases cycle every ~29.5 days
-    # Starting from a known new moon date
-    known_new_moon = datetime(2024, 1, 11)  # Known new moon date
-    days_since_new_moon = (date - known_new_moon).days
-    
-    # Calculate phase (0-1, where 0 is new moon, 0.5 is full moon)
-    phase = (days_since_new_moon % 29.5) / 29.5
-    
-    # Determine moon phase name
-    if phase < 0.0625:
-        phase_name = "New Moon"
-        phase_emoji = "🌑"
-    elif phase < 0.1875:
-        phase_name = "Waxing Crescent"
-        phase_emoji = "🌒"
-    elif phase < 0.3125:
-        phase_name = "First Quarter"
-        phase_emoji = "🌓"
-    elif phase < 0.4375:
-        phase_name = "Waxing Gibbous"
-        phase_emoji = "🌔"
-    elif phase < 0.5625:
-        phase_name = "Full Moon"
-        phase_emoji = "🌕"
-    elif phase < 0.6875:
-        phase_name = "Waning Gibbous"
-        phase_emoji = "🌖"
-    elif phase < 0.8125:
-        phase_name = "Last Quarter"
-        phase_emoji = "🌗"
-    elif phase < 0.9375:
-        phase_name = "Waning Crescent"
-        phase_emoji = "🌘"
-    else:
-        phase_name = "New Moon"
-        phase_emoji = "🌑"
-    
+    phase = moon_ephemeris.phase(date)
     return {
-        "phase": phase_name,
-        "emoji": phase_emoji,
-        "percentage": int(phase * 100),
+        "phase": phase.name,
+        "emoji": phase.emoji,
+        "percentage": int(phase.age * 100),
+        "illumination": round(phase.illumination * 100),
+        "age_days": round(phase.age_days, 1),
+        "waxing": phase.waxing,
+        "next_new_moon": moon_ephemeris.next_event(date),
+        "next_full_moon": moon_ephemeris.next_event(date, full=True),
         "date": date.strftime("%d.%m.%Y")
     }
 
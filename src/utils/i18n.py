@@ -3,10 +3,14 @@ Internationalization (i18n) utility for the Fal Gram Bot.
 Handles multi-language support with JSON locale files.
 """
 
+import asyncio
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from config.settings import settings
+from src.utils.logger import get_logger
+
+logger = get_logger("i18n")
 
 
 class I18n:
@@ -14,6 +18,10 @@ class I18n:
     
     def __init__(self):
         self.translations = {}
+        # (mtime_ns, size) per language file, used to detect changed catalogues
+        self._file_stamps: Dict[str, Tuple[int, int]] = {}
+        self._reload_listeners: List[Callable[[List[str]], None]] = []
+        self._watch_task: Optional[asyncio.Task] = None
         self._load_translations()
     
     def _load_translations(self) -> None:
@@ -24,17 +32,145 @@ class I18n:
             print(f"⚠️  Warning: Locales directory '{locales_dir}' not found")
             return
         
+        translations = dict(self.translations)
         for filename in os.listdir(locales_dir):
             if filename.endswith('.json'):
                 lang = filename.replace('.json', '')
                 filepath = os.path.join(locales_dir, filename)
                 
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        self.translations[lang] = json.load(f)
+                    stamp = self._stat_file(filepath)
+                    translations[lang] = self._read_catalogue(filepath)
+                    self._file_stamps[lang] = stamp
                     print(f"✅ Loaded translations for {lang}")
                 except Exception as e:
                     print(f"❌ Error loading {lang} translations: {e}")
+        
+        # Swap the whole mapping in one assignment so readers never see a partial load
+        self.translations = translations
+    
+    def load_translations(self) -> List[str]:
+        """(Re)load every locale file and return the loaded language codes."""
+        self._load_translations()
+        return self.get_available_languages()
+    
+    @staticmethod
+    def _stat_file(filepath: str) -> Tuple[int, int]:
+        """Return a cheap change stamp (mtime_ns, size) for a locale file."""
+        st = os.stat(filepath)
+        return st.st_mtime_ns, st.st_size
+    
+    @staticmethod
+    def _read_catalogue(filepath: str) -> Dict[str, Any]:
+        """Parse and validate a locale file.
+        
+        Raises:
+            ValueError: If the file is not a non-empty JSON object
+        """
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not data:
+            raise ValueError(f"{filepath} must contain a non-empty JSON object")
+        return data
+    
+    def _scan_changed(self) -> List[Tuple[str, str, Tuple[int, int]]]:
+        """Return (lang, filepath, stamp) for locale files changed since last load."""
+        locales_dir = settings.LOCALES_DIR
+        if not os.path.isdir(locales_dir):
+            return []
+        changed = []
+        for filename in os.listdir(locales_dir):
+            if not filename.endswith('.json'):
+                continue
+            lang = filename[:-len('.json')]
+            filepath = os.path.join(locales_dir, filename)
+            try:
+                stamp = self._stat_file(filepath)
+            except OSError:
+                continue
+            if self._file_stamps.get(lang) != stamp:
+                changed.append((lang, filepath, stamp))
+        return changed
+    
+    async def reload_changed(self) -> List[str]:
+        """Reload only the locale files whose mtime/size changed.
+        
+        Each changed file is parsed and validated off the event loop; invalid
+        files are skipped and the previous catalogue stays active. Valid ones
+        are swapped in with a single assignment, then reload listeners run.
+        
+        Returns:
+            List of language codes that were reloaded
+        """
+        changed = self._scan_changed()
+        if not changed:
+            return []
+        
+        loaded: Dict[str, Dict[str, Any]] = {}
+        for lang, filepath, stamp in changed:
+            try:
+                loaded[lang] = await asyncio.to_thread(self._read_catalogue, filepath)
+            except Exception as e:
+                logger.error(f"Rejected reload of {lang} translations: {e}")
+            # Remember the stamp either way so a broken file is not re-parsed every tick
+            self._file_stamps[lang] = stamp
+        
+        if not loaded:
+            return []
+        
+        translations = dict(self.translations)
+        translations.update(loaded)
+        self.translations = translations
+        
+        languages = sorted(loaded)
+        logger.info(f"Reloaded translations for {', '.join(languages)}")
+        for listener in list(self._reload_listeners):
+            try:
+                listener(languages)
+            except Exception as e:
+                logger.error(f"i18n reload listener failed: {e}")
+        return languages
+    
+    def add_reload_listener(self, listener: Callable[[List[str]], None]) -> None:
+        """Register a callback invoked with the reloaded language codes.
+        
+        Use this to drop caches derived from translations (card tables, prompt templates).
+        Keyboards are built from get_text() on every call and need no invalidation.
+        """
+        if listener not in self._reload_listeners:
+            self._reload_listeners.append(listener)
+    
+    def remove_reload_listener(self, listener: Callable[[List[str]], None]) -> None:
+        """Unregister a reload callback."""
+        if listener in self._reload_listeners:
+            self._reload_listeners.remove(listener)
+    
+    async def _watch(self, interval: float) -> None:
+        """Poll locale files and hot-reload them until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload_changed()
+            except Exception as e:
+                logger.error(f"Error while hot-reloading translations: {e}")
+    
+    def start_watcher(self, interval: Optional[float] = None) -> None:
+        """Start the locale file watcher on the running event loop."""
+        if self._watch_task and not self._watch_task.done():
+            return
+        interval = interval or settings.LOCALES_RELOAD_INTERVAL
+        self._watch_task = asyncio.get_running_loop().create_task(self._watch(interval))
+        logger.info(f"Watching '{settings.LOCALES_DIR}' for translation changes every {interval}s")
+    
+    async def stop_watcher(self) -> None:
+        """Stop the locale file watcher."""
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
     
     def get_text(self, key: str, lang: str = None) -> str:
         """
@@ -0,0 +1,117 @@
+"""
+In-flight operation guard for the Fal Gram Bot.
+
+Double-tapped buttons and re-sent photos arrive as separate updates and would
+each run the whole reading (LLM call and usage charge). Handlers claim
+(user, action) before starting; a duplicate claim while the first operation
+is still running gets None, so the handler only acknowledges the tap.
+Each claimed operation gets an id that makes its usage charge idempotent;
+for Telegram updates it is derived from the update id, so a redelivered
+update is not charged twice.
+"""
+
+import functools
+import inspect
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple, Union
+
+from src.utils.i18n import i18n
+from src.utils.metrics import metrics
+
+DUPLICATE_REQUESTS = metrics.counter(
+    "falgram_duplicate_requests_total", "Duplicate requests collapsed into a running operation", ["action"]
+)
+
+# Claims older than this are treated as leaked (e.g. a handler killed mid-way)
+STALE_AFTER = 300.0
+
+
+class InFlightGuard:
+    """One running operation per (user, action)."""
+
+    def __init__(self, stale_after: float = STALE_AFTER):
+        self.stale_after = stale_after
+        self._running: Dict[Tuple[int, str], Tuple[str, float]] = {}
+        self._ids = itertools.count(1)
+
+    def begin(self, user_id: int, action: str, operation_id: Optional[str] = None) -> Optional[str]:
+        """Operation id for a new operation, or None if one is already running.
+
+        `operation_id` should be stable across redeliveries of the same request;
+        a unique id is generated when none is given.
+        """
+        key = (user_id, action)
+        now = time.monotonic()
+        running = self._running.get(key)
+        if running is not None and now - running[1] < self.stale_after:
+            DUPLICATE_REQUESTS.inc(action=action)
+            return None
+        if operation_id is None:
+            operation_id = f"{user_id}:{action}:{int(time.time() * 1000)}:{next(self._ids)}"
+        self._running[key] = (operation_id, now)
+        return operation_id
+
+    def end(self, user_id: int, action: str, operation_id: str) -> None:
+        key = (user_id, action)
+        running = self._running.get(key)
+        if running is not None and running[0] == operation_id:
+            del self._running[key]
+
+    @asynccontextmanager
+    async def claim(self, user_id: int, action: str,
+                    operation_id: Optional[str] = None) -> AsyncIterator[Optional[str]]:
+        """Yields the operation id, or None for a duplicate (nothing to do)."""
+        operation_id = self.begin(user_id, action, operation_id)
+        try:
+            yield operation_id
+        finally:
+            if operation_id is not None:
+                self.end(user_id, action, operation_id)
+
+
+# Global guard shared by the handlers
+inflight = InFlightGuard()
+
+
+async def _acknowledge(update) -> None:
+    """Answer a duplicate right away; the running operation delivers the result."""
+    user = update.effective_user
+    text = i18n.get_text("fortune_in_progress", (user.language_code if user else None) or "en")
+    if update.callback_query is not None:
+        await update.callback_query.answer(text)
+    elif update.message is not None:
+        await update.message.reply_text(text)
+
+
+def update_operation_id(update, user_id: int, action: str) -> Optional[str]:
+    """Operation id of a Telegram update; the same for every delivery of that update."""
+    update_id = getattr(update, 'update_id', None)
+    return f"{user_id}:{action}:{update_id}" if update_id is not None else None
+
+
+def collapse_duplicates(action: Union[str, Callable[..., str]]):
+    """Handler decorator: one run per (user, action) at a time, extra taps are only acknowledged.
+
+    `action` is a name or a callable of (update, context). Handlers that take an
+    `operation_id` keyword argument (to charge usage) receive the operation id.
+    """
+    def decorator(handler):
+        wants_operation_id = 'operation_id' in inspect.signature(handler).parameters
+
+        @functools.wraps(handler)
+        async def wrapper(update, context, *args, **kwargs):
+            user = update.effective_user
+            if user is None:
+                return await handler(update, context, *args, **kwargs)
+            name = action(update, context) if callable(action) else action
+            async with inflight.claim(user.id, name, update_operation_id(update, user.id, name)) as operation_id:
+                if operation_id is None:
+                    await _acknowledge(update)
+                    return None
+                if wants_operation_id:
+                    kwargs['operation_id'] = operation_id
+                return await handler(update, context, *args, **kwargs)
+        return wrapper
+    return decorator
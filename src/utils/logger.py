@@ -4,48 +4,33 @@ Provides centralized logging functionality.
 """
 
 import logging
-from config.settings import settings
+from config.logging import ROOT_LOGGER_NAME, get_logger as _get_namespaced_logger
 
 
 def setup_logger(name: str = None) -> logging.Logger:
     """
     Set up a logger with the specified name.
-    
+
+    Loggers live under the 'fal_gram_bot' namespace so they share the
+    queue-based handlers configured in config/logging.py.
+
     Args:
         name: Logger name (defaults to 'fal_gram_bot')
-    
+
     Returns:
         Configured logger instance
     """
-    if not name:
-        name = 'fal_gram_bot'
-    
-    logger = logging.getLogger(name)
-    
-    # Only configure if not already configured
-    if not logger.handlers:
-        logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-        
-        # Create console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-        
-        # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        console_handler.setFormatter(formatter)
-        
-        # Add handler to logger
-        logger.addHandler(console_handler)
-    
-    return logger
+    if not name or name == ROOT_LOGGER_NAME:
+        return _get_namespaced_logger()
+    if name.startswith(f"{ROOT_LOGGER_NAME}."):
+        return logging.getLogger(name)
+    return _get_namespaced_logger(name)
 
 
 # Global logger instance
-logger = setup_logger() 
+logger = setup_logger()
 
 # Backward-compatible alias used by some modules
 def get_logger(name: str = None) -> logging.Logger:
     """Alias for setup_logger to preserve older imports."""
-    return setup_logger(name)
\ No newline at end of file
+    return setup_logger(name)
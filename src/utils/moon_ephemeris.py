@@ -0,0 +1,321 @@
+"""
+Lunar ephemeris for the Fal Gram Bot.
+
+Phase angle and illumination follow Meeus, Astronomical Algorithms ch. 48
+(low-accuracy series, ~0.5 degree); new/full moon instants follow ch. 49
+including the planetary corrections (within about a minute).
+
+With NumPy the whole range from MOON_TABLE_START_YEAR to MOON_TABLE_END_YEAR
+is precomputed into two compact .npy tables under EPHEMERIS_DIR:
+
+    moon_<start>_<end>_daily.npy   float32 (days,): age fraction at 00:00 UTC
+    moon_<start>_<end>_events.npy  float64 (lunations, 2): new moon JD, full moon JD (UT)
+
+Both are memory-mapped, so lookups are O(1) index arithmetic. Without NumPy,
+or outside the table range, values are computed directly.
+"""
+
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from config.settings import settings
+from src.utils.logger import get_logger
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = get_logger("moon_ephemeris")
+
+J2000 = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+SYNODIC_MONTH = 29.530588861
+# JDE of the mean new moon for k = 0 (2000-01-06)
+NEW_MOON_EPOCH = 2451550.09766
+
+# Principal phases by age fraction, same boundaries the bot has always used
+PHASE_NAMES: Tuple[Tuple[float, str, str], ...] = (
+    (0.0625, "New Moon", "🌑"),
+    (0.1875, "Waxing Crescent", "🌒"),
+    (0.3125, "First Quarter", "🌓"),
+    (0.4375, "Waxing Gibbous", "🌔"),
+    (0.5625, "Full Moon", "🌕"),
+    (0.6875, "Waning Gibbous", "🌖"),
+    (0.8125, "Last Quarter", "🌗"),
+    (0.9375, "Waning Crescent", "🌘"),
+    (1.0001, "New Moon", "🌑"),
+)
+
+# Ch. 49 periodic terms: (new moon coeff, full moon coeff, E power, M, M', F, Omega multipliers)
+_PHASE_TERMS: Tuple[Tuple[float, float, int, int, int, int, int], ...] = (
+    (-0.40720, -0.40614, 0, 0, 1, 0, 0),
+    (0.17241, 0.17302, 1, 1, 0, 0, 0),
+    (0.01608, 0.01614, 0, 0, 2, 0, 0),
+    (0.01039, 0.01043, 0, 0, 0, 2, 0),
+    (0.00739, 0.00734, 1, -1, 1, 0, 0),
+    (-0.00514, -0.00515, 1, 1, 1, 0, 0),
+    (0.00208, 0.00209, 2, 2, 0, 0, 0),
+    (-0.00111, -0.00111, 0, 0, 1, -2, 0),
+    (-0.00057, -0.00057, 0, 0, 1, 2, 0),
+    (0.00056, 0.00056, 1, 1, 2, 0, 0),
+    (-0.00042, -0.00042, 0, 0, 3, 0, 0),
+    (0.00042, 0.00042, 1, 1, 0, 2, 0),
+    (0.00038, 0.00038, 1, 1, 0, -2, 0),
+    (-0.00024, -0.00024, 1, -1, 2, 0, 0),
+    (-0.00017, -0.00017, 0, 0, 0, 0, 1),
+    (-0.00007, -0.00007, 0, 2, 1, 0, 0),
+    (0.00004, 0.00004, 0, 0, 2, -2, 0),
+    (0.00004, 0.00004, 0, 3, 0, 0, 0),
+    (0.00003, 0.00003, 0, 1, 1, -2, 0),
+    (0.00003, 0.00003, 0, 0, 2, 2, 0),
+    (-0.00003, -0.00003, 0, 1, 1, 2, 0),
+    (0.00003, 0.00003, 0, -1, 1, 2, 0),
+    (-0.00002, -0.00002, 0, -1, 1, -2, 0),
+    (-0.00002, -0.00002, 0, 1, 3, 0, 0),
+    (0.00002, 0.00002, 0, 0, 4, 0, 0),
+)
+
+# Ch. 49 planetary arguments: (coefficient, A0, A1 per k, A2 per T^2)
+_PLANETARY_TERMS: Tuple[Tuple[float, float, float, float], ...] = (
+    (0.000325, 299.77, 0.107408, -0.009173),
+    (0.000165, 251.88, 0.016321, 0.0),
+    (0.000164, 251.83, 26.651886, 0.0),
+    (0.000126, 349.42, 36.412478, 0.0),
+    (0.000110, 84.66, 18.206239, 0.0),
+    (0.000062, 141.74, 53.303771, 0.0),
+    (0.000060, 207.14, 2.453732, 0.0),
+    (0.000056, 154.84, 7.306860, 0.0),
+    (0.000047, 34.52, 27.261239, 0.0),
+    (0.000042, 207.19, 0.121824, 0.0),
+    (0.000040, 291.34, 1.844379, 0.0),
+    (0.000037, 161.72, 24.198154, 0.0),
+    (0.000035, 239.56, 25.513099, 0.0),
+    (0.000023, 331.55, 3.592518, 0.0),
+)
+
+
+class MoonPhase(NamedTuple):
+    """Moon state at one instant."""
+    age: float            # fraction of the lunation, 0 = new, 0.5 = full
+    illumination: float   # illuminated fraction of the disc, 0..1
+    name: str
+    emoji: str
+
+    @property
+    def waxing(self) -> bool:
+        return self.age < 0.5
+
+    @property
+    def age_days(self) -> float:
+        return self.age * SYNODIC_MONTH
+
+
+def _xp(value: Any):
+    """NumPy for arrays, math for scalars."""
+    return np if NUMPY_AVAILABLE and isinstance(value, np.ndarray) else math
+
+
+def to_jd(moment: datetime) -> float:
+    """Julian Day (UT) of a datetime; naive values are taken as local time."""
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.timestamp() / 86400.0 + UNIX_EPOCH_JD
+
+
+def from_jd(jd: float) -> datetime:
+    """Aware UTC datetime of a Julian Day (UT)."""
+    return datetime.fromtimestamp((jd - UNIX_EPOCH_JD) * 86400.0, tz=timezone.utc)
+
+
+def delta_t_days(jd):
+    """TT - UT (Espenak & Meeus polynomial for 2005-2050, used as an approximation outside it)."""
+    t = (jd - J2000) / 365.25
+    return (62.92 + 0.32217 * t + 0.005589 * t * t) / 86400.0
+
+
+def phase_angle(jd):
+    """Age fraction and illuminated fraction at Julian Day(s) `jd` (scalar or array)."""
+    xp = _xp(jd)
+    t = (jd + delta_t_days(jd) - J2000) / 36525.0
+    d = xp.radians((297.8501921 + 445267.1114034 * t - 0.0018819 * t * t) % 360.0)
+    m = xp.radians((357.5291092 + 35999.0502909 * t - 0.0001536 * t * t) % 360.0)
+    mp = xp.radians((134.9633964 + 477198.8675055 * t + 0.0087414 * t * t) % 360.0)
+    i = (180.0 - xp.degrees(d)
+         - 6.289 * xp.sin(mp)
+         + 2.100 * xp.sin(m)
+         - 1.274 * xp.sin(2 * d - mp)
+         - 0.658 * xp.sin(2 * d)
+         - 0.214 * xp.sin(2 * mp)
+         - 0.110 * xp.sin(d))
+    age = ((180.0 - i) % 360.0) / 360.0
+    return age, illumination_from_age(age)
+
+
+def illumination_from_age(age):
+    """Illuminated fraction for an age fraction (the phase angle is 180 - 360 * age degrees)."""
+    return (1.0 - _xp(age).cos(2.0 * math.pi * age)) / 2.0
+
+
+def phase_instants(k, full: bool = False):
+    """Julian Day (UT) of the new (or full) moon of lunation(s) `k` (integers, 0 = Jan 2000)."""
+    xp = _xp(k)
+    k = k + 0.5 if full else k
+    t = k / 1236.85
+    jde = (NEW_MOON_EPOCH + SYNODIC_MONTH * k + 0.00015437 * t ** 2
+           - 0.000000150 * t ** 3 + 0.00000000073 * t ** 4)
+    e = 1.0 - 0.002516 * t - 0.0000074 * t ** 2
+    m = xp.radians((2.5534 + 29.10535670 * k - 0.0000014 * t ** 2 - 0.00000011 * t ** 3) % 360.0)
+    mp = xp.radians((201.5643 + 385.81693528 * k + 0.0107582 * t ** 2
+                     + 0.00001238 * t ** 3 - 0.000000058 * t ** 4) % 360.0)
+    f = xp.radians((160.7108 + 390.67050284 * k - 0.0016118 * t ** 2
+                    - 0.00000227 * t ** 3 + 0.000000011 * t ** 4) % 360.0)
+    omega = xp.radians((124.7746 - 1.56375588 * k + 0.0020672 * t ** 2 + 0.00000215 * t ** 3) % 360.0)
+
+    correction = 0.0
+    for new_coeff, full_coeff, e_power, cm, cmp, cf, co in _PHASE_TERMS:
+        coeff = full_coeff if full else new_coeff
+        correction = correction + coeff * e ** e_power * xp.sin(cm * m + cmp * mp + cf * f + co * omega)
+    for coeff, a0, a1, a2 in _PLANETARY_TERMS:
+        correction = correction + coeff * xp.sin(xp.radians((a0 + a1 * k + a2 * t ** 2) % 360.0))
+
+    jde = jde + correction
+    return jde - delta_t_days(jde)
+
+
+def describe(age: float, illumination: float) -> MoonPhase:
+    for upper, name, emoji in PHASE_NAMES:
+        if age < upper:
+            return MoonPhase(float(age), float(illumination), name, emoji)
+    return MoonPhase(float(age), float(illumination), "New Moon", "🌑")
+
+
+def _lunation(jd: float) -> int:
+    return int(math.floor((jd - NEW_MOON_EPOCH) / SYNODIC_MONTH))
+
+
+class MoonEphemeris:
+    """Precomputed phase/event tables with O(1) lookups."""
+
+    def __init__(self, directory: Optional[str] = None, start_year: Optional[int] = None,
+                 end_year: Optional[int] = None):
+        self.directory = directory or settings.EPHEMERIS_DIR
+        self.start_year = start_year or settings.MOON_TABLE_START_YEAR
+        self.end_year = end_year or settings.MOON_TABLE_END_YEAR
+        self.start_jd = to_jd(datetime(self.start_year, 1, 1, tzinfo=timezone.utc))
+        self.end_jd = to_jd(datetime(self.end_year + 1, 1, 1, tzinfo=timezone.utc))
+        # One lunation of margin so "next event" lookups near the edges stay in the table
+        self.first_k = _lunation(self.start_jd) - 1
+        self._daily = None
+        self._events = None
+        self._loaded = False
+
+    def _paths(self) -> Tuple[str, str]:
+        stem = os.path.join(self.directory, f"moon_{self.start_year}_{self.end_year}")
+        return f"{stem}_daily.npy", f"{stem}_events.npy"
+
+    def build(self) -> Tuple[Any, Any]:
+        """Compute both tables for the configured year range (vectorised)."""
+        days = int(round(self.end_jd - self.start_jd))
+        jd = self.start_jd + np.arange(days + 1, dtype=np.float64)
+        daily = phase_angle(jd)[0].astype(np.float32)
+
+        k = np.arange(self.first_k, _lunation(self.end_jd) + 2, dtype=np.float64)
+        events = np.stack([phase_instants(k), phase_instants(k, full=True)], axis=1)
+        return daily, events
+
+    def save(self) -> Tuple[str, str]:
+        """Build and write the tables; returns their paths."""
+        daily, events = self.build()
+        daily_path, events_path = self._paths()
+        os.makedirs(self.directory, exist_ok=True)
+        np.save(daily_path, daily)
+        np.save(events_path, events)
+        self._daily, self._events, self._loaded = daily, events, True
+        return daily_path, events_path
+
+    def _ensure_tables(self) -> bool:
+        if not self._loaded:
+            self._loaded = True
+            if not NUMPY_AVAILABLE:
+                return False
+            daily_path, events_path = self._paths()
+            try:
+                if os.path.exists(daily_path) and os.path.exists(events_path):
+                    self._daily = np.load(daily_path, mmap_mode='r')
+                    self._events = np.load(events_path, mmap_mode='r')
+                else:
+                    self._daily, self._events = self.build()
+                    logger.info(f"Moon tables computed in memory ({self.start_year}-{self.end_year}); "
+                                f"run scripts/build_moon_table.py to persist them")
+            except (OSError, ValueError) as e:
+                logger.error(f"Moon tables unavailable, computing directly: {e}")
+                self._daily = self._events = None
+        return self._daily is not None
+
+    def phase_at_jd(self, jd: float) -> MoonPhase:
+        if self._ensure_tables() and self.start_jd <= jd < self.end_jd:
+            offset = jd - self.start_jd
+            day = int(offset)
+            frac = offset - day
+            age0, age1 = self._daily[day:day + 2].tolist()
+            if age1 < age0:
+                age1 += 1.0  # new moon between the two samples
+            age = (age0 + (age1 - age0) * frac) % 1.0
+            return describe(age, illumination_from_age(age))
+        return describe(*phase_angle(jd))
+
+    def phase(self, moment: Optional[datetime] = None) -> MoonPhase:
+        """Moon phase at `moment` (defaults to now)."""
+        return self.phase_at_jd(to_jd(moment or datetime.now(timezone.utc)))
+
+    def _event_jd(self, k: int, full: bool) -> float:
+        if self._ensure_tables():
+            index = k - self.first_k
+            if 0 <= index < len(self._events):
+                return float(self._events[index, 1 if full else 0])
+        return float(phase_instants(float(k), full))
+
+    def next_event(self, moment: Optional[datetime] = None, full: bool = False) -> datetime:
+        """First new (or full) moon at or after `moment`."""
+        jd = to_jd(moment or datetime.now(timezone.utc))
+        k = _lunation(jd) - 1
+        while True:
+            event = self._event_jd(k, full)
+            if event >= jd:
+                return from_jd(event)
+            k += 1
+
+    def events_between(self, start: datetime, end: datetime) -> List[Tuple[str, datetime]]:
+        """New/full moon instants in [start, end), in order, as ('new_moon' | 'full_moon', when)."""
+        start_jd, end_jd = to_jd(start), to_jd(end)
+        events = []
+        for k in range(_lunation(start_jd) - 1, _lunation(end_jd) + 1):
+            for full, kind in ((False, 'new_moon'), (True, 'full_moon')):
+                jd = self._event_jd(k, full)
+                if start_jd <= jd < end_jd:
+                    events.append((jd, kind))
+        return [(kind, from_jd(jd)) for jd, kind in sorted(events)]
+
+    def calendar(self, start: datetime, days: int) -> List[Dict[str, Any]]:
+        """Daily phase summary (00:00 UTC) for `days` days from `start`."""
+        start = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+        rows = []
+        for n in range(days):
+            day = start + timedelta(days=n)
+            phase = self.phase(day)
+            rows.append({
+                'date': day.date().isoformat(),
+                'phase': phase.name,
+                'emoji': phase.emoji,
+                'illumination': round(phase.illumination * 100),
+            })
+        return rows
+
+
+# Global moon ephemeris instance
+moon_ephemeris = MoonEphemeris()
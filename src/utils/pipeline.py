@@ -0,0 +1,45 @@
+"""
+Request pipeline helpers for the Fal Gram Bot handlers.
+
+Handlers used to await every step in turn (answer the callback, load the
+user, load the prompt, call the LLM, reply, record usage). These helpers let
+a handler run the independent steps together and keep non-critical steps
+from failing the request:
+
+    _, user_data = await concurrently(quietly(query.answer()), db_service.get_user(user.id))
+
+Writes that a later request reads back, such as the usage counter behind the
+daily limit, are awaited before replying. Log writes go through the batched
+log writer (DatabaseService.add_log), which already returns without waiting
+for Supabase.
+"""
+
+import asyncio
+from typing import Any, Awaitable, List
+
+from src.utils.logger import get_logger
+
+logger = get_logger("pipeline")
+
+
+async def concurrently(*aws: Awaitable[Any]) -> List[Any]:
+    """Await independent operations together; results in argument order.
+
+    If one fails the others are cancelled and the error propagates.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def quietly(aw: Awaitable[Any], default: Any = None) -> Any:
+    """Await a non-critical step (callback answer, chat action); log and return `default` on failure."""
+    try:
+        return await aw
+    except Exception as e:
+        logger.warning(f"Non-critical step failed: {e}")
+        return default
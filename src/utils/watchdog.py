@@ -0,0 +1,156 @@
+"""
+Event loop watchdog for the Fal Gram Bot.
+Measures loop lag continuously and captures the stack of callbacks that block
+the loop for longer than a threshold.
+
+A heartbeat task on the loop stamps the time on every tick; a daemon thread
+checks the stamp and, when it goes stale, snapshots the loop thread's frame
+with sys._current_frames(). The stack therefore points at the code that is
+running *while* the loop is blocked (a synchronous Supabase call, FPDF, ...),
+not at whoever happens to run next.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics, LOOP_LAG, LOOP_LAG_HISTOGRAM
+
+logger = get_logger("watchdog")
+
+BLOCKED_TOTAL = metrics.counter(
+    "falgram_event_loop_blocked_total", "Times the event loop was blocked longer than the threshold", ["culprit"]
+)
+BLOCKED_SECONDS = metrics.histogram(
+    "falgram_event_loop_blocked_seconds", "Duration of event loop blocks above the threshold",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class LoopWatchdog:
+    """Detects event loop stalls and reports the blocking stack."""
+
+    def __init__(self, interval: Optional[float] = None, threshold: Optional[float] = None,
+                 stack_limit: Optional[int] = None):
+        self.interval = interval or settings.WATCHDOG_INTERVAL
+        self.threshold = threshold or settings.WATCHDOG_BLOCK_THRESHOLD
+        self.stack_limit = stack_limit or settings.WATCHDOG_STACK_LIMIT
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._monitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_beat = 0.0
+        # Stall currently being tracked by the monitor thread
+        self._stall_started: Optional[float] = None
+        self._stall_report: Optional[Dict[str, Any]] = None
+        self.reports: List[Dict[str, Any]] = []
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the monitor thread."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat(), name="loop-watchdog")
+        self._monitor = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._monitor.start()
+        logger.info(f"Loop watchdog started (interval={self.interval}s, threshold={self.threshold}s)")
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and monitor thread."""
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._monitor is not None:
+            await asyncio.to_thread(self._monitor.join, self.interval * 2)
+            self._monitor = None
+
+    async def _heartbeat(self) -> None:
+        """Stamp the time every tick and record scheduling lag."""
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - before - self.interval)
+            LOOP_LAG.set(lag)
+            LOOP_LAG_HISTOGRAM.observe(lag)
+
+    def _watch(self) -> None:
+        """Monitor thread: compare the last heartbeat against the threshold."""
+        check_every = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(check_every):
+            now = time.monotonic()
+            stale_for = now - self._last_beat - self.interval
+            if stale_for >= self.threshold:
+                if self._stall_started is None:
+                    self._stall_started = self._last_beat
+                    self._stall_report = self._capture(stale_for)
+            elif self._stall_started is not None:
+                self._finish_stall()
+
+    def _capture(self, stale_for: float) -> Dict[str, Any]:
+        """Snapshot the loop thread's stack while it is still blocked."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame, limit=self.stack_limit) if frame else []
+        report = {
+            'event': 'event_loop_blocked',
+            'threshold_seconds': self.threshold,
+            'blocked_at_detection_seconds': round(stale_for, 3),
+            'culprit': self._culprit(frame),
+            'stack': [line.rstrip() for line in stack],
+        }
+        logger.warning(
+            f"Event loop blocked for more than {self.threshold}s in {report['culprit']}\n"
+            + "".join(stack)
+        )
+        return report
+
+    def _finish_stall(self) -> None:
+        """The loop is beating again: record how long it was blocked."""
+        duration = self._last_beat - self._stall_started - self.interval
+        report = self._stall_report or {'culprit': 'unknown'}
+        report['blocked_seconds'] = round(max(duration, 0.0), 3)
+        self._stall_started = None
+        self._stall_report = None
+
+        BLOCKED_TOTAL.inc(culprit=report['culprit'])
+        BLOCKED_SECONDS.observe(report['blocked_seconds'])
+        self.reports = (self.reports + [report])[-20:]
+        logger.warning(json.dumps({k: v for k, v in report.items() if k != 'stack'}))
+
+    @staticmethod
+    def _culprit(frame) -> str:
+        """Innermost project frame (outside site-packages) as 'path:line function'."""
+        while frame is not None:
+            filename = os.path.abspath(frame.f_code.co_filename)
+            if filename.startswith(_PROJECT_ROOT) and 'site-packages' not in filename:
+                relative = os.path.relpath(filename, _PROJECT_ROOT)
+                return f"{relative}:{frame.f_lineno} {frame.f_code.co_name}"
+            frame = frame.f_back
+        return "unknown"
+
+
+# Global watchdog instance
+loop_watchdog = LoopWatchdog()
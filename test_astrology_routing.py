@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Offline checks that keyboard buttons reach the handler that parses them,
+using stub Telegram objects instead of the Bot API.
+"""
+
+import asyncio
+import inspect
+from types import SimpleNamespace
+
+import main_new
+from src.handlers.astrology import AstrologyHandlers
+from src.keyboards.fortune import FortuneKeyboards
+from src.keyboards.payment import PaymentKeyboards
+
+
+class Query:
+    def __init__(self, data):
+        self.data = data
+        self.from_user = SimpleNamespace(id=42)
+        self.edits = []
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+    async def edit_message_text(self, text, reply_markup=None, **kwargs):
+        self.edits.append((text, reply_markup))
+
+
+def make_update(data):
+    return SimpleNamespace(
+        callback_query=Query(data),
+        effective_user=SimpleNamespace(id=42, language_code='en'),
+        effective_chat=SimpleNamespace(id=42),
+        message=None,
+    )
+
+
+def buttons(markup):
+    return [button.callback_data for row in markup.inline_keyboard for button in row]
+
+
+def route(monkeypatch, data):
+    """Name of the handler method main_new routes `data` to."""
+    called = []
+
+    def stub(name):
+        async def handler(update, context):
+            called.append(name)
+        return handler
+
+    handlers = (main_new.astrology_handlers, main_new.fortune_handlers, main_new.payment_handlers,
+                main_new.referral_handlers, main_new.admin_handlers, main_new.UserHandlers)
+    for handler in handlers:
+        for name, method in inspect.getmembers(handler, inspect.iscoroutinefunction):
+            if not name.startswith('_'):
+                monkeypatch.setattr(handler, name, stub(name))
+    asyncio.run(main_new.handle_callback_query(make_update(data), SimpleNamespace(user_data={})))
+    return called[0] if called else None
+
+
+def test_compatibility_sign_buttons_reach_the_selection_handler(monkeypatch):
+    async def premium(*args, **kwargs):
+        return {'has_access': True}
+
+    generated = []
+
+    async def generate(query, selection, language):
+        generated.append(dict(selection))
+
+    monkeypatch.setattr(AstrologyHandlers, '_check_premium_access', premium)
+    monkeypatch.setattr(AstrologyHandlers, '_generate_compatibility', generate)
+    context = SimpleNamespace(user_data={})
+
+    update = make_update('compatibility_love')
+    asyncio.run(AstrologyHandlers.handle_compatibility(update, context))
+    first = [b for b in buttons(update.callback_query.edits[-1][1]) if b.startswith('compat_')]
+    assert 'compat_first_aries' in first and len(first) == 12
+
+    update = make_update('compat_first_aries')
+    asyncio.run(AstrologyHandlers.handle_compatibility_selection(update, context))
+    second = [b for b in buttons(update.callback_query.edits[-1][1]) if b.startswith('compat_')]
+    assert 'compat_second_leo' in second
+
+    asyncio.run(AstrologyHandlers.handle_compatibility_selection(make_update('compat_second_leo'), context))
+    assert generated == [{'first': 'aries', 'second': 'leo'}]
+
+    assert route(monkeypatch, 'compatibility_love') == 'handle_compatibility'
+    assert route(monkeypatch, first[0]) == 'handle_compatibility_selection'
+    assert route(monkeypatch, second[0]) == 'handle_compatibility_selection'
+
+
+def test_horoscope_sign_buttons_reach_the_selection_handler(monkeypatch):
+    from src.services.prefetch_service import prefetch_service
+
+    async def premium(*args, **kwargs):
+        return {'has_access': True}
+
+    async def no_prompt(*args):
+        return None
+
+    generated = []
+
+    async def generate(query, horoscope_type, zodiac_sign, language, prompt_template=None):
+        generated.append((horoscope_type, zodiac_sign))
+
+    monkeypatch.setattr(AstrologyHandlers, '_check_premium_access', premium)
+    monkeypatch.setattr(AstrologyHandlers, '_generate_horoscope', generate)
+    monkeypatch.setattr(prefetch_service, 'prompt', no_prompt)
+
+    for horoscope_type in ('daily_horoscope', 'weekly_horoscope', 'monthly_horoscope'):
+        update = make_update(horoscope_type)
+        asyncio.run(getattr(AstrologyHandlers, f"handle_{horoscope_type}")(update, SimpleNamespace(user_data={})))
+        signs = [b for b in buttons(update.callback_query.edits[-1][1]) if b.startswith(horoscope_type)]
+        assert len(signs) == 12 and f"{horoscope_type}_aries" in signs
+
+        update = make_update(signs[0])
+        update.update_id = len(generated)
+        bot = SimpleNamespace(send_chat_action=lambda *args, **kwargs: asyncio.sleep(0))
+        asyncio.run(AstrologyHandlers.handle_zodiac_selection(update, SimpleNamespace(user_data={}, bot=bot)))
+        assert generated[-1] == (horoscope_type, 'aries')
+
+        assert route(monkeypatch, horoscope_type) == f"handle_{horoscope_type}"
+        assert route(monkeypatch, signs[0]) == 'handle_zodiac_selection'
+
+
+def test_fortune_menu_buttons_reach_their_handlers(monkeypatch):
+    expected = {
+        'coffee_fortune': 'handle_coffee_reading',
+        'tarot_fortune': 'handle_tarot_reading',
+        'dream_fortune': 'handle_dream_interpretation',
+        'main_menu': 'show_main_menu',
+    }
+    assert buttons(FortuneKeyboards.get_fortune_menu_keyboard()) == list(expected)
+    for data, handler in expected.items():
+        assert route(monkeypatch, data) == handler
+
+
+def test_payment_and_referral_buttons_reach_their_handlers(monkeypatch):
+    expected = {
+        'premium_plans': 'show_premium_plans',
+        'premium_info': 'show_premium_info',
+        'premium': 'show_premium_menu',
+        'plan_details_vip': 'show_plan_details',
+        'plan_basic': 'handle_plan_selection',
+        'pay_basic': 'handle_payment',
+        'toggle_auto_renew': 'toggle_auto_renew',
+        'cancel_subscription': 'cancel_subscription',
+        'referral': 'show_referral_menu',
+        'referral_stats': 'show_referral_stats',
+        'referral_share': 'show_referral_share',
+        'share_whatsapp': 'handle_share_whatsapp',
+        'back_to_admin': 'handle_admin_callback',
+        'set_lang_tr': 'handle_language_change',
+    }
+    for markup in (PaymentKeyboards.get_premium_menu_keyboard(), PaymentKeyboards.get_premium_plans_keyboard(),
+                   PaymentKeyboards.get_payment_confirmation_keyboard('basic')):
+        for data in buttons(markup):
+            assert route(monkeypatch, data) != 'callback_query_handler', data
+    for data, handler in expected.items():
+        assert route(monkeypatch, data) == handler, data
+
+
+def test_menu_buttons_keep_the_menu_prefetch():
+    from src.keyboards.astrology import AstrologyKeyboards
+    from src.services.prefetch_service import MENU_NEXT
+
+    menus = {
+        'fortune': buttons(FortuneKeyboards.get_fortune_menu()),
+        'astrology': buttons(AstrologyKeyboards.get_astrology_menu()) + ['daily_horoscope_aries', 'compat_first_leo'],
+    }
+    for menu, callbacks in menus.items():
+        for data in callbacks:
+            assert data.startswith(MENU_NEXT[menu]) == (data != 'main_menu'), data
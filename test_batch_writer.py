@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Offline checks for the batch writer: lazy start and spill file replay.
+"""
+
+import asyncio
+import json
+
+from src.services.batch_writer import BatchWriter
+
+
+def test_first_submit_starts_the_writer():
+    written = []
+
+    async def run():
+        writer = BatchWriter("test", written.extend, batch_size=2, flush_interval=0.01)
+        writer.submit({'n': 1})
+        writer.submit({'n': 2})
+        await asyncio.sleep(0.1)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert written == [{'n': 1}, {'n': 2}]
+
+
+def test_replay_keeps_rows_left_by_an_unfinished_replay(tmp_path):
+    spill = tmp_path / "logs.jsonl"
+    # Left behind by a crash during the previous replay
+    (tmp_path / "logs.jsonl.replay").write_text(json.dumps({'n': 'old'}) + '\n', encoding='utf-8')
+    spill.write_text(json.dumps({'n': 'new'}) + '\n', encoding='utf-8')
+    written = []
+
+    async def run():
+        writer = BatchWriter("test", written.extend, spill_path=str(spill))
+        await writer._replay_spill()
+        return writer
+
+    writer = asyncio.run(run())
+    assert written == [{'n': 'old'}, {'n': 'new'}]
+    assert writer.stats['replayed'] == 2
+    assert not spill.exists() and not (tmp_path / "logs.jsonl.replay").exists()
+
+
+def test_failed_replay_re_spills_the_rows(tmp_path):
+    spill = tmp_path / "logs.jsonl"
+    spill.write_text(json.dumps({'n': 1}) + '\n', encoding='utf-8')
+
+    def fail(rows):
+        raise ConnectionError("down")
+
+    asyncio.run(BatchWriter("test", fail, spill_path=str(spill))._replay_spill())
+    assert [json.loads(line) for line in spill.read_text(encoding='utf-8').splitlines()] == [{'n': 1}]
+    assert not (tmp_path / "logs.jsonl.replay").exists()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Offline checks for DatabaseService logic that does not need Supabase:
+the daily reading count and payment statistics caching.
+"""
+
+import asyncio
+
+from src.services.database import DatabaseService, readings_today
+
+
+def test_readings_from_earlier_days_do_not_count():
+    assert readings_today({'daily_readings_used': 3, 'daily_usage_date': '2026-10-18'}, '2026-10-19') == 0
+    assert readings_today({'daily_readings_used': 3, 'daily_usage_date': '2026-10-19'}, '2026-10-19') == 3
+    # Rows stamped before the daily_usage_date column existed
+    assert readings_today({'daily_readings_used': 3, 'last_activity': '2026-10-18T23:59:00'}, '2026-10-19') == 0
+    assert readings_today({'daily_readings_used': 3}, '2026-10-19') == 0
+
+
+def test_increment_usage_restarts_the_daily_count(monkeypatch):
+    db = DatabaseService()
+    written = []
+
+    async def get_user(user_id):
+        return {'total_readings': 10, 'daily_readings_used': 3, 'daily_usage_date': '2000-01-01'}
+
+    async def update_user(user_id, updates):
+        written.append(updates)
+        return True
+
+    monkeypatch.setattr(db, 'is_connected', lambda: True)
+    monkeypatch.setattr(db, 'get_user', get_user)
+    monkeypatch.setattr(db, 'update_user', update_user)
+
+    assert asyncio.run(db.increment_usage(42))
+    assert written[0]['daily_readings_used'] == 1
+    assert written[0]['total_readings'] == 11
+    assert readings_today(written[0]) == 1
+
+
+def test_failed_payment_statistics_are_not_cached(monkeypatch):
+    db = DatabaseService()
+    loads = []
+
+    def scan(page_size=1000):
+        loads.append(page_size)
+        if len(loads) == 1:
+            raise ConnectionError("payment_transactions unreachable")
+        return {'total_revenue': 500, 'revenue_today': 0, 'revenue_month': 500}
+
+    monkeypatch.setattr(db, 'is_connected', lambda: True)
+    monkeypatch.setattr(db, '_call_rpc', lambda fn, params=None: None)
+    monkeypatch.setattr(db, '_scan_payment_statistics', scan)
+
+    async def run():
+        failed = await db.get_payment_statistics()
+        recovered = await db.get_payment_statistics()
+        cached = await db.get_payment_statistics()
+        return failed, recovered, cached
+
+    failed, recovered, cached = asyncio.run(run())
+    assert failed['total_revenue'] == 0
+    assert recovered['total_revenue'] == cached['total_revenue'] == 500
+    assert len(loads) == 2
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Offline checks that fortune readings are only charged when a reading was generated.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from src.handlers.fortune import FortuneHandlers
+from src.services.ai_service import ai_service, BUSY_MESSAGE, RATE_LIMIT_MESSAGE
+from src.services.database import db_service
+from src.utils.i18n import i18n
+
+
+class Message:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, reply_markup=None, **kwargs):
+        self.replies.append(text)
+
+
+def dream(monkeypatch, result):
+    charged = []
+
+    async def generate(*args, **kwargs):
+        return result
+
+    async def prompt(*args):
+        return None
+
+    async def increment_usage(user_id, **kwargs):
+        charged.append(user_id)
+        return True
+
+    monkeypatch.setattr(ai_service, 'generate_with_fallback', generate)
+    monkeypatch.setattr(db_service, 'get_prompt', prompt)
+    monkeypatch.setattr(db_service, 'increment_usage', increment_usage)
+    update = SimpleNamespace(message=Message(), effective_user=SimpleNamespace(id=42, first_name='Ada'))
+    asyncio.run(FortuneHandlers._process_dream_text(update, SimpleNamespace(user_data={}), 'a dream', 'tr', 'op'))
+    return update.message.replies, charged
+
+
+def test_busy_and_rate_limited_readings_are_not_charged(monkeypatch):
+    for result, key in ((BUSY_MESSAGE, 'error.ai_busy'), (RATE_LIMIT_MESSAGE, 'error.rate_limited'),
+                        (None, 'error.generation_failed')):
+        replies, charged = dream(monkeypatch, result)
+        assert replies == [i18n.get_text(key, 'tr')]
+        assert charged == []
+
+
+def test_generated_readings_are_charged(monkeypatch):
+    replies, charged = dream(monkeypatch, 'You will fly.')
+    assert 'You will fly.' in replies[0]
+    assert charged == [42]
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Offline checks for horoscope period labels, which name the prompt period and the cache entry.
+"""
+
+from datetime import datetime
+
+from src.services.horoscope_service import period_label
+
+
+def test_weekly_horoscopes_share_one_period_from_monday_to_sunday():
+    week = {period_label('weekly_horoscope', datetime(2026, 10, day)) for day in range(19, 26)}
+    assert week == {'2026-10-19'}
+    assert period_label('weekly_horoscope', datetime(2026, 10, 26)) == '2026-10-26'
+    assert period_label('daily_horoscope', datetime(2026, 10, 22)) == '2026-10-22'
+    assert period_label('monthly_horoscope', datetime(2026, 10, 22)) == 'October 2026'
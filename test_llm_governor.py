@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Offline checks for the LLM concurrency governor: queue order, timeouts and
+slot accounting when waiters give up.
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.llm_governor import LLMGovernor, LLMQueueTimeout
+
+
+def governor():
+    return LLMGovernor(max_concurrency=1, provider_limits={}, queue_timeout=5)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def grant_order(gov, waiters):
+    """Queue (label, user_id, plan) waiters behind a held slot; labels in grant order."""
+    order = []
+
+    async def wait(label, user_id, plan):
+        await gov.acquire(user_id, plan, 'gemini')
+        order.append(label)
+
+    await gov.acquire(0, 'vip', 'gemini')
+    tasks = [asyncio.ensure_future(wait(*waiter)) for waiter in waiters]
+    await settle()
+    for _ in waiters:
+        gov.release('gemini')
+        await settle()
+    gov.release('gemini')
+    await asyncio.gather(*tasks)
+    assert gov.active == 0 and gov.waiting == 0
+    return order
+
+
+def test_paid_lanes_get_freed_slots_by_weight():
+    async def run():
+        gov = governor()
+        waiters = [('free', 100 + i, 'free') for i in range(10)] + [('premium', 200 + i, 'premium') for i in range(10)]
+        return await grant_order(gov, waiters)
+
+    order = asyncio.run(run())
+    # premium weight 4 : free weight 1
+    assert order[:10].count('premium') == 8
+    assert order[:10].count('free') == 2
+
+
+def test_users_take_turns_within_a_lane():
+    async def run():
+        gov = governor()
+        waiters = [('a', 1, 'free'), ('a', 1, 'free'), ('a', 1, 'free'), ('b', 2, 'free')]
+        return await grant_order(gov, waiters)
+
+    assert asyncio.run(run()) == ['a', 'b', 'a', 'a']
+
+
+def test_queue_timeout_raises_and_leaves_no_waiter():
+    async def run():
+        gov = governor()
+        await gov.acquire(0, 'free', 'gemini')
+        with pytest.raises(LLMQueueTimeout):
+            await gov.acquire(1, 'free', 'gemini', timeout=0.01)
+        assert gov.waiting == 0
+        gov.release('gemini')
+        assert gov.active == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiters_do_not_leak_slots():
+    async def run():
+        gov = governor()
+
+        async def call(user_id):
+            async with gov.slot(user_id, 'free', 'gemini'):
+                await asyncio.sleep(10)
+
+        await gov.acquire(0, 'free', 'gemini')
+
+        # Cancelled while queued
+        queued = asyncio.ensure_future(call(1))
+        await settle()
+        assert gov.waiting == 1
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert gov.waiting == 0
+
+        # Cancelled just as a slot was granted: either the wait hands the slot
+        # on or the call owns it and releases it on the way out
+        granted = asyncio.ensure_future(call(2))
+        await settle()
+        gov.release('gemini')
+        granted.cancel()
+        await asyncio.gather(granted, return_exceptions=True)
+
+        assert gov.active == 0 and gov.waiting == 0
+        assert gov.active_by_provider['gemini'] == 0
+        # The freed slot is usable again
+        async with gov.slot(3, 'free', 'gemini', timeout=0.01):
+            assert gov.active == 1
+        assert gov.active == 0
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Offline check that main_new.py's post_init / post_shutdown run end to end,
+with the database, schedulers and web server replaced by stubs.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import main_new
+from config.settings import settings
+
+
+def test_post_init_and_post_shutdown_run_with_stubbed_services(monkeypatch):
+    calls = []
+
+    def record(name, result=None):
+        def call(*args, **kwargs):
+            calls.append(name)
+            return result
+        return call
+
+    def record_async(name):
+        async def call(*args, **kwargs):
+            calls.append(name)
+        return call
+
+    class StubServer:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        start = record_async('web_server.start')
+        stop = record_async('web_server.stop')
+
+    monkeypatch.setattr(main_new.db_service, 'initialize', record_async('db.initialize'))
+    monkeypatch.setattr(main_new.db_service, 'is_connected', record('db.is_connected', True))
+    monkeypatch.setattr(main_new.db_service, 'close', record_async('db.close'))
+    for service, name in ((main_new.daily_card_scheduler, 'daily_card'), (main_new.moon_notifier, 'moon')):
+        monkeypatch.setattr(service, 'start', record(f"{name}.start"))
+        monkeypatch.setattr(service, 'stop', record_async(f"{name}.stop"))
+    monkeypatch.setattr(main_new, 'WebhookServer', StubServer)
+    monkeypatch.setattr(settings, 'ENVIRONMENT', 'development')
+    monkeypatch.setattr(settings, 'WEB_SERVER_ENABLED', True)
+    monkeypatch.setattr(settings, 'DAILY_CARD_ENABLED', True)
+    monkeypatch.setattr(settings, 'MOON_NOTIFICATIONS_ENABLED', True)
+    monkeypatch.setattr(settings, 'LOCALES_HOT_RELOAD', False)
+
+    application = SimpleNamespace(bot=SimpleNamespace())
+
+    async def run():
+        await main_new.post_init(application)
+        assert main_new.web_server is not None
+        await main_new.post_shutdown(application)
+        assert main_new.web_server is None
+
+    asyncio.run(run())
+    assert calls.index('db.initialize') < calls.index('daily_card.start')
+    for name in ('moon.start', 'web_server.start', 'web_server.stop', 'daily_card.stop', 'moon.stop', 'db.close'):
+        assert name in calls
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Offline checks that the web server's admin endpoints require the admin token.
+"""
+
+import asyncio
+
+from aiohttp.test_utils import make_mocked_request
+
+from config.settings import settings
+from src.services.web_server import WebhookServer
+
+
+def status(path, headers=None):
+    server = WebhookServer()
+    handler = server.handle_status if path == '/status' else server.handle_ai_usage
+    return asyncio.run(handler(make_mocked_request('GET', path, headers=headers or {}))).status
+
+
+def test_admin_endpoints_require_the_token(monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_API_TOKEN', '')
+    monkeypatch.setattr(settings, 'WEBHOOK_SECRET', 's3cret')
+    for path in ('/status', '/ai-usage'):
+        assert status(path) == 403
+        assert status(path, {'Authorization': 'Bearer wrong'}) == 403
+        assert status(path, {'Authorization': 'Bearer s3cret'}) == 200
+        assert status(path, {'X-Admin-Token': 's3cret'}) == 200
+
+
+def test_admin_endpoints_without_a_token(monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_API_TOKEN', '')
+    monkeypatch.setattr(settings, 'WEBHOOK_SECRET', '')
+    monkeypatch.setattr(settings, 'ENVIRONMENT', 'development')
+    assert status('/status') == 200
+    monkeypatch.setattr(settings, 'ENVIRONMENT', 'production')
+    assert status('/status') == 403